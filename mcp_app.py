@@ -36,15 +36,46 @@ def say_hello(name: str) -> str:
     return presenter.say_hello(name)
 
 @mcp.tool()
-def scrape_colorhunt_palettes(limit: int = 5) -> str:
-    """抓取ColorHunt网站的配色方案"""
-    return presenter.scrape_colorhunt_palettes(limit)
+async def scrape_colorhunt_palettes(limit: int = 5) -> str:
+    """抓取ColorHunt网站的配色方案（异步执行，不阻塞其他工具调用）"""
+    return await presenter.scrape_colorhunt_palettes_async(limit)
+
+@mcp.tool()
+async def scrape_colorhunt_by_tag(tag: str, limit: int = 5) -> str:
+    """根据标签（如summer、vintage、pastel）抓取ColorHunt网站的配色方案"""
+    return await presenter.scrape_colorhunt_by_tag_async(tag, limit)
 
 @mcp.tool()
 def test_simple_colorhunt(limit: int = 5) -> str:
     """测试简化的配色方案抓取"""
     return presenter.test_simple_colorhunt(limit)
 
+@mcp.tool()
+def query_local_palettes(tag: str = "", order_by: str = "likes", limit: int = 20, min_likes: int = 0) -> str:
+    """查询本地配色方案库（不访问网络），可按标签过滤，按点赞数（likes）或日期（date）排序"""
+    return presenter.query_local_palettes(tag, order_by, limit, min_likes)
+
+@mcp.tool()
+async def store_colorhunt_tag(tag: str, limit: int = 100) -> str:
+    """抓取指定标签的配色方案并保存到本地配色方案库，之后可用 query_local_palettes 查询"""
+    return await presenter.store_colorhunt_tag_async(tag, limit)
+
+@mcp.tool()
+async def sync_colorhunt_palettes(tags: str = "", max_pages: int = 10) -> str:
+    """增量同步本地配色方案库，只抓取上次同步之后发布的配色方案；tags为逗号分隔的标签，为空时同步最新列表"""
+    return await presenter.sync_colorhunt_palettes_async(tags, max_pages)
+
+@mcp.tool()
+async def find_similar_palettes(code: str = "", image_path: str = "", colors: str = "", limit: int = 10,
+                                ignore_order: bool = True) -> str:
+    """在本地配色方案库中查找相似的配色方案；查询可以是24位配色代码、图片路径或逗号分隔的颜色代码"""
+    return await presenter.find_similar_palettes_async(code, image_path, colors, limit, ignore_order)
+
+@mcp.tool()
+async def query_palettes_by_tags(query: str, limit: int = 20, offset: int = 0) -> str:
+    """按标签组合查询本地配色方案库并按点赞数排序，支持 AND、OR、NOT、-标签 和括号，如 warm AND vintage NOT dark"""
+    return await presenter.query_palettes_by_tags_async(query, limit, offset)
+
 # 注册MCP资源
 @mcp.resource("config://app_settings")
 def get_app_config() -> dict:
@@ -0,0 +1,349 @@
+"""
+配色方案模型类，用紧凑的打包格式表示配色方案，按需生成与原有字典一致的数据
+"""
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_SUPPORT = True
+except ImportError:
+    NUMPY_SUPPORT = False
+
+# 所有配色方案共用的常量字符串
+SOURCE = sys.intern("colorhunt.co")
+AUTHOR = sys.intern("ColorHunt用户")
+PALETTE_URL_PREFIX = "https://colorhunt.co/palette/"
+FEED_API_URL = "https://colorhunt.co/php/feed.php"
+UNKNOWN_DATE = sys.intern("未知日期")
+
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+# 相同的标签组合共用同一个元组
+_tags_cache: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_tags(tags: Iterable[str]) -> Tuple[str, ...]:
+    """将标签列表转换为共享的元组，标签字符串同样被驻留"""
+    key = tuple(sys.intern(str(tag)) for tag in tags)
+    return _tags_cache.setdefault(key, key)
+
+
+def _intern_optional(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+class Palette:
+    """
+    配色方案模型
+
+    4种颜色打包为12字节（4 × RGB），颜色代码、十六进制颜色、ID、名称和元数据等
+    可以推导的字段都在 to_dict 时生成，不在对象中保存。
+    """
+
+    __slots__ = ('rgb', 'likes', 'date', 'tags', 'idx', 'kind', 'tag', 'status_code', 'created', 'flags')
+
+    # 数据来源，决定 to_dict 生成的字段格式
+    KIND_FEED = sys.intern("feed")    # WebService.build_palette_from_feed_item
+    KIND_TAG = sys.intern("tag")      # WebService.build_tag_palette
+    KIND_GUI = sys.intern("gui")      # ColorHuntScraper.create_palette_from_api_data
+    KINDS = (KIND_FEED, KIND_TAG, KIND_GUI)
+
+    # flags 位
+    TAGS_INFERRED = 1
+
+    def __init__(self, rgb: bytes, likes: int = 0, date: str = "", tags: Iterable[str] = (), idx: int = 0,
+                 kind: str = KIND_FEED, tag: Optional[str] = None, status_code: int = 200,
+                 created: Optional[float] = None, flags: int = 0):
+        """
+        初始化配色方案
+
+        Args:
+            rgb: 12字节的打包颜色，依次为4种颜色的R、G、B
+            likes: 点赞数
+            date: 日期（feed接口的相对时间）
+            tags: 标签列表
+            idx: 在结果中的序号，用于生成ID和名称
+            kind: 数据来源，见 KINDS
+            tag: 抓取时使用的分类标签
+            status_code: 请求的HTTP状态码
+            created: 创建时间戳，为None时使用当前时间
+            flags: 标记位，见 TAGS_INFERRED
+        """
+        if len(rgb) != 12:
+            raise ValueError(f"打包颜色必须为12字节: {len(rgb)}")
+        self.rgb = bytes(rgb)
+        self.likes = likes
+        self.date = sys.intern(date)
+        self.tags = intern_tags(tags)
+        self.idx = idx
+        self.kind = kind
+        self.tag = _intern_optional(tag)
+        self.status_code = status_code
+        self.created = time.time() if created is None else created
+        self.flags = flags
+
+    @staticmethod
+    def pack_code(code: str) -> Optional[bytes]:
+        """
+        将24位配色代码打包为12字节
+
+        Returns:
+            Optional[bytes]: 打包后的颜色，代码格式不正确时返回None
+        """
+        if not code or len(code) != 24 or not _HEX_DIGITS.issuperset(code):
+            return None
+        return bytes.fromhex(code)
+
+    @classmethod
+    def from_code(cls, code: str, **kwargs) -> Optional["Palette"]:
+        """从24位配色代码创建配色方案，代码格式不正确时返回None"""
+        rgb = cls.pack_code(code)
+        return cls(rgb, **kwargs) if rgb is not None else None
+
+    @property
+    def code(self) -> str:
+        """24位配色代码（小写）"""
+        return self.rgb.hex()
+
+    @property
+    def colors(self) -> List[str]:
+        """#RRGGBB格式的颜色列表"""
+        hex_code = self.rgb.hex().upper()
+        return [f"#{hex_code[i:i + 6]}" for i in range(0, 24, 6)]
+
+    @property
+    def rgb_tuples(self) -> List[Tuple[int, int, int]]:
+        """(R, G, B) 元组列表"""
+        rgb = self.rgb
+        return [(rgb[i], rgb[i + 1], rgb[i + 2]) for i in range(0, 12, 3)]
+
+    @property
+    def source_url(self) -> str:
+        return PALETTE_URL_PREFIX + self.code
+
+    @property
+    def tags_inferred(self) -> bool:
+        return bool(self.flags & self.TAGS_INFERRED)
+
+    @property
+    def timestamp(self) -> str:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+
+    def __repr__(self) -> str:
+        return f"Palette({self.code!r}, likes={self.likes}, date={self.date!r}, tags={list(self.tags)})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Palette):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def to_dict(self) -> Dict:
+        """生成与原有构建函数相同格式的字典"""
+        if self.kind == self.KIND_TAG:
+            return self._tag_dict()
+        if self.kind == self.KIND_GUI:
+            return self._gui_dict()
+        return self._feed_dict()
+
+    def _feed_dict(self) -> Dict:
+        code, likes, date, tags = self.code, self.likes, self.date, list(self.tags)
+        return {
+            "id": f"colorhunt-{self.idx + 1}-{code}",
+            "name": f"ColorHunt Palette {code}",
+            "colors": self.colors,
+            "source": SOURCE,
+            "source_url": PALETTE_URL_PREFIX + code,
+            "palette_id": code,
+            "likes": likes,
+            "date": date,
+            "tags": tags,
+            "author": AUTHOR,
+            "timestamp": self.timestamp,
+            "extraction_success": True,
+            "metadata": {
+                "colors_extracted_method": "URL解析",
+                "has_detailed_info": bool(likes > 0 or date != UNKNOWN_DATE or len(tags) > 1),
+                "response_status": self.status_code,
+                "page_title": "",
+                "extraction_notes": f"点赞数: {likes}, 日期: {date}, 标签数: {len(tags)}",
+                "tags_inferred": self.tags_inferred,
+                "details_fetched": False
+            }
+        }
+
+    def _tag_dict(self) -> Dict:
+        code, likes, date, tag, i = self.code, self.likes, self.date, self.tag or "", self.idx
+        return {
+            "id": f"{tag}-api-{i + 1}-{code}",
+            "name": f"{tag.title()} Palette {i + 1}",
+            "colors": self.colors,
+            "source": SOURCE,
+            "source_url": PALETTE_URL_PREFIX + code,
+            "palette_id": code,
+            "likes": likes,
+            "date": date,
+            "tags": [f"{tag.title()} (API标签)", "ColorHunt"],
+            "author": AUTHOR,
+            "timestamp": self.timestamp,
+            "extraction_success": True,
+            "metadata": {
+                "colors_extracted_method": "API直接获取 (准确)",
+                "has_detailed_info": True,
+                "response_status": self.status_code,
+                "page_title": f"{tag.title()} Color Palettes - Color Hunt",
+                "extraction_notes": f"通过API获取，点赞数: {likes}, 日期: {date}",
+                "tag_source": f"从 {tag} 标签API提取",
+                "tag_page_url": f"https://colorhunt.co/palettes/{tag.lower()}",
+                "api_endpoint": FEED_API_URL,
+                "api_response": "JSON格式"
+            }
+        }
+
+    def _gui_dict(self) -> Dict:
+        code, tag = self.code, self.tag or ""
+        if tag == 'popular-month':
+            name = "ColorHunt Popular (Month) Palette"
+        elif tag == 'popular-year':
+            name = "ColorHunt Popular (Year) Palette"
+        elif tag == 'popular-alltime':
+            name = "ColorHunt Popular (All Time) Palette"
+        else:
+            name = f"ColorHunt {tag.title()} Palette"
+        return {
+            "id": f"colorhunt-api-{self.idx + 1}-{code}",
+            "name": name,
+            "colors": self.colors,
+            "source": SOURCE,
+            "source_url": PALETTE_URL_PREFIX + code,
+            "palette_id": code,
+            "likes": self.likes,
+            "date": self.date,
+            "tags": list(self.tags),
+            "timestamp": self.timestamp,
+            "extraction_method": "Direct API data with user selected tags",
+            "api_source": True
+        }
+
+
+class PaletteBatch:
+    """
+    列式存储的配色方案集合
+
+    每个字段保存为一个紧凑数组：颜色为连续的12字节记录，日期、标签组合和分类标签
+    保存为字符串表中的序号。适合保存大批量抓取结果，按下标访问时才生成 Palette 对象。
+    """
+
+    def __init__(self, palettes: Iterable[Palette] = ()):
+        self._rgb = bytearray()
+        self._likes = array('q')
+        self._idx = array('l')
+        self._status = array('H')
+        self._created = array('d')
+        self._flags = array('B')
+        self._kind = array('B')
+        self._date = array('l')
+        self._tags = array('l')
+        self._tag = array('l')
+        self._values: List = []          # 日期、标签元组和分类标签的共享值表
+        self._value_index: Dict = {}
+        self.extend(palettes)
+
+    def _ref(self, value) -> int:
+        """返回值在共享值表中的序号，不存在时追加"""
+        ref = self._value_index.get(value)
+        if ref is None:
+            ref = len(self._values)
+            self._values.append(value)
+            self._value_index[value] = ref
+        return ref
+
+    def append(self, palette: Palette) -> None:
+        """追加一个配色方案"""
+        self._rgb += palette.rgb
+        self._likes.append(palette.likes)
+        self._idx.append(palette.idx)
+        self._status.append(palette.status_code)
+        self._created.append(palette.created)
+        self._flags.append(palette.flags)
+        self._kind.append(Palette.KINDS.index(palette.kind))
+        self._date.append(self._ref(palette.date))
+        self._tags.append(self._ref(palette.tags))
+        self._tag.append(self._ref(palette.tag))
+
+    def extend(self, palettes: Iterable[Palette]) -> None:
+        """追加多个配色方案"""
+        for palette in palettes:
+            self.append(palette)
+
+    def __len__(self) -> int:
+        return len(self._likes)
+
+    def __getitem__(self, i: int) -> Palette:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("PaletteBatch index out of range")
+        values = self._values
+        return Palette(
+            bytes(self._rgb[i * 12:(i + 1) * 12]),
+            likes=self._likes[i],
+            date=values[self._date[i]],
+            tags=values[self._tags[i]],
+            idx=self._idx[i],
+            kind=Palette.KINDS[self._kind[i]],
+            tag=values[self._tag[i]],
+            status_code=self._status[i],
+            created=self._created[i],
+            flags=self._flags[i],
+        )
+
+    def __iter__(self) -> Iterator[Palette]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def codes(self) -> List[str]:
+        """所有配色方案的24位代码"""
+        rgb = bytes(self._rgb)
+        return [rgb[i:i + 12].hex() for i in range(0, len(rgb), 12)]
+
+    def to_dicts(self) -> Iterator[Dict]:
+        """逐个生成与原有构建函数相同格式的字典"""
+        for palette in self:
+            yield palette.to_dict()
+
+    def rgb_array(self):
+        """
+        以 (N, 4, 3) uint8 数组返回所有颜色（需要NumPy，与批次共享内存，只读）
+
+        数组存在期间批次不能再追加配色方案，否则 append 抛出 BufferError。
+
+        Returns:
+            numpy.ndarray: 颜色数组
+        """
+        if not NUMPY_SUPPORT:
+            raise RuntimeError("未安装NumPy，无法生成颜色数组")
+        rgb = np.frombuffer(self._rgb, dtype=np.uint8).reshape(-1, 4, 3)
+        rgb.setflags(write=False)
+        return rgb
+
+    def likes_array(self):
+        """
+        以 int64 数组返回所有点赞数（需要NumPy）
+
+        返回副本，索引长期持有该数组时批次仍然可以追加配色方案。
+
+        Returns:
+            numpy.ndarray: 点赞数数组
+        """
+        if not NUMPY_SUPPORT:
+            raise RuntimeError("未安装NumPy，无法生成点赞数数组")
+        return np.array(self._likes, dtype=np.int64)
+
+    def nbytes(self) -> int:
+        """列数据占用的字节数（不含共享值表）"""
+        columns = (self._likes, self._idx, self._status, self._created, self._flags,
+                   self._kind, self._date, self._tags, self._tag)
+        return len(self._rgb) + sum(column.itemsize * len(column) for column in columns)
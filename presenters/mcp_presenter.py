@@ -1,12 +1,18 @@
 """
 MCP表示层，连接模型层和视图层
 """
+import asyncio
 from typing import List, Dict, Any, Tuple, Optional
 
 from views.mcp_view import IMcpView
 from services.file_service import FileService
 from services.app_service import AppService
 from services.web_service import WebService
+from services.async_web_service import AsyncWebService
+from services.palette_repository import get_palette_repository
+from services.palette_sync import sync_tags
+from services.palette_similarity import find_similar_palettes, SIMILARITY_ORDERED, SIMILARITY_UNORDERED
+from services.tag_index import query_palettes_by_tags
 
 class McpPresenter:
     """MCP表示层类，处理业务逻辑并更新视图"""
@@ -21,6 +27,15 @@ class McpPresenter:
         self.view = view
         self.file_service = FileService()
         self.app_service = AppService()
+        self.async_web_service = AsyncWebService()
+        self._palette_repository = None
+    
+    @property
+    def palette_repository(self):
+        """本地配色方案库，首次使用时获取，不使用配色方案库的工具不会打开数据库"""
+        if self._palette_repository is None:
+            self._palette_repository = get_palette_repository()
+        return self._palette_repository
     
     def list_desktop_files(self) -> List[str]:
         """获取桌面文件列表并显示"""
@@ -57,6 +72,39 @@ class McpPresenter:
         except Exception as e:
             return f"抓取配色方案时出错: {str(e)}"
     
+    async def scrape_colorhunt_palettes_async(self, limit: int = 5) -> str:
+        """
+        异步抓取ColorHunt配色方案，抓取期间不阻塞其他工具调用
+        
+        Args:
+            limit: 配色方案数量限制
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            success, error, palettes = await self.async_web_service.scrape_colorhunt_palettes(limit)
+            return self.view.show_colorhunt_palettes(success, error, palettes)
+        except Exception as e:
+            return f"抓取配色方案时出错: {str(e)}"
+    
+    async def scrape_colorhunt_by_tag_async(self, tag: str, limit: int = 5) -> str:
+        """
+        异步根据标签抓取ColorHunt配色方案
+        
+        Args:
+            tag: 标签名称
+            limit: 配色方案数量限制
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            success, error, palettes = await self.async_web_service.scrape_colorhunt_by_tag(tag, limit)
+            return self.view.show_colorhunt_palettes(success, error, palettes)
+        except Exception as e:
+            return f"抓取 {tag} 标签配色方案时出错: {str(e)}"
+    
     def test_simple_colorhunt(self, limit: int = 5) -> str:
         """
         测试简化的配色方案抓取
@@ -72,3 +120,108 @@ class McpPresenter:
             return self.view.show_colorhunt_palettes(success, error, palettes)
         except Exception as e:
             return f"测试配色方案抓取时出错: {str(e)}"
+    
+    def query_local_palettes(self, tag: str = "", order_by: str = "likes", limit: int = 20,
+                             min_likes: int = 0) -> str:
+        """
+        查询本地配色方案库，不访问网络
+        
+        Args:
+            tag: 标签名称，为空时查询所有配色方案
+            order_by: 排序方式，likes 或 date
+            limit: 返回数量
+            min_likes: 最少点赞数
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            palettes = self.palette_repository.query(tag or None, order_by, limit, min_likes=min_likes)
+            total = self.palette_repository.count(tag or None)
+            return self.view.show_local_palettes([p.to_dict() for p in palettes], tag, total)
+        except Exception as e:
+            return f"查询本地配色方案时出错: {str(e)}"
+    
+    async def store_colorhunt_tag_async(self, tag: str, limit: int = 100) -> str:
+        """
+        抓取指定标签的配色方案并写入本地配色方案库，在线程中执行不阻塞事件循环
+        
+        Args:
+            tag: 标签名称
+            limit: 最多抓取的配色方案数量
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            success, error, stored = await asyncio.to_thread(
+                WebService.store_tag_palettes, tag, limit, None, self.palette_repository
+            )
+            return self.view.show_store_result(success, error, stored, tag, self.palette_repository.count(tag))
+        except Exception as e:
+            return f"保存 {tag} 标签配色方案时出错: {str(e)}"
+    
+    async def sync_colorhunt_palettes_async(self, tags: str = "", max_pages: int = 10) -> str:
+        """
+        增量同步本地配色方案库，只抓取上次同步之后发布的配色方案
+        
+        Args:
+            tags: 逗号分隔的标签列表，为空时同步不限标签的最新列表
+            max_pages: 每个标签最多请求的页数
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()] or ['']
+            success, error, results = await asyncio.to_thread(
+                sync_tags, tag_list, self.palette_repository, max_pages
+            )
+            return self.view.show_sync_result(success, error, results)
+        except Exception as e:
+            return f"同步配色方案时出错: {str(e)}"
+    
+    async def find_similar_palettes_async(self, code: str = "", image_path: str = "", colors: str = "",
+                                          limit: int = 10, ignore_order: bool = True) -> str:
+        """
+        在本地配色方案库中查找相似的配色方案，提取图片颜色和建立索引在线程中执行，不阻塞事件循环
+        
+        Args:
+            code: 24位配色代码
+            image_path: 图片路径
+            colors: 逗号分隔的颜色代码
+            limit: 返回数量
+            ignore_order: 是否忽略颜色顺序
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            color_list = [color.strip() for color in colors.split(',') if color.strip()]
+            mode = SIMILARITY_UNORDERED if ignore_order else SIMILARITY_ORDERED
+            success, error, palettes = await asyncio.to_thread(
+                find_similar_palettes, code, image_path, color_list, limit, mode, self.palette_repository
+            )
+            return self.view.show_similar_palettes(success, error, palettes)
+        except Exception as e:
+            return f"查找相似配色方案时出错: {str(e)}"
+    
+    async def query_palettes_by_tags_async(self, query: str, limit: int = 20, offset: int = 0) -> str:
+        """
+        在本地配色方案库中按标签组合查询配色方案，按点赞数排序，建立索引和查询在线程中执行，不阻塞事件循环
+        
+        Args:
+            query: 标签查询，如 "warm AND vintage NOT dark"
+            limit: 返回数量
+            offset: 跳过的数量
+            
+        Returns:
+            str: 处理结果
+        """
+        try:
+            success, error, result = await asyncio.to_thread(
+                query_palettes_by_tags, query, limit, offset, self.palette_repository
+            )
+            return self.view.show_tag_query_result(success, error, query, result)
+        except Exception as e:
+            return f"按标签查询配色方案时出错: {str(e)}"
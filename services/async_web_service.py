@@ -0,0 +1,415 @@
+"""
+异步网络服务类，基于aiohttp提供不阻塞事件循环的ColorHunt抓取接口
+"""
+import asyncio
+import contextlib
+import json
+import logging
+from typing import Tuple, Optional, List, Dict, AsyncIterator
+
+import aiohttp
+
+from services.feed_cache import FeedCache, get_feed_cache
+from services.rate_limiter import RateLimiter, RateSlot, get_rate_limiter
+from services.http_client import BASE_HEADERS, FEED_HEADERS, PAGE_HEADERS, FEED_API_URL, RETRY_STATUS_CODES
+from services.web_service import WebService, FeedRequestError, COLORHUNT_TAGS, TAG_FETCH_WORKERS, PER_HOST_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWebService:
+    """异步网络服务类，提供与 WebService 相同数据格式的协程版本抓取接口"""
+
+    def __init__(self, max_concurrency: int = TAG_FETCH_WORKERS, per_host_limit: int = PER_HOST_CONCURRENCY,
+                 timeout: float = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 feed_cache: Optional[FeedCache] = None, use_feed_cache: bool = True,
+                 rate_limiter: Optional[RateLimiter] = None, use_rate_limiter: bool = True):
+        """
+        初始化异步网络服务
+
+        Args:
+            max_concurrency: 连接池总连接数
+            per_host_limit: 同一主机的最大并发连接数
+            timeout: 默认超时时间（秒）
+            max_retries: 连接错误和可重试状态码的最大重试次数
+            backoff_factor: 指数退避系数，第n次重试前等待 backoff_factor * 2^(n-1) 秒
+            feed_cache: feed接口响应缓存，为None时使用进程内共享缓存
+            use_feed_cache: 是否启用feed缓存
+            rate_limiter: 请求限流器，为None时与同步客户端共享进程内的限流器
+            use_rate_limiter: 是否启用限流
+        """
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.feed_cache = (feed_cache or get_feed_cache()) if use_feed_cache else None
+        self.rate_limiter = (rate_limiter or get_rate_limiter()) if use_rate_limiter else None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环上的会话，会话不存在或属于其他事件循环时重新创建"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_limit)
+            self._session = aiohttp.ClientSession(headers=BASE_HEADERS, connector=connector)
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """关闭会话并释放连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _rate_slot(self):
+        """占用限流名额，未启用限流时返回空的上下文"""
+        if self.rate_limiter is None:
+            return contextlib.nullcontext(RateSlot())
+        return self.rate_limiter.async_slot()
+
+    async def _request(self, method: str, url: str, headers: Dict, data: Optional[Dict] = None,
+                       timeout: Optional[float] = None) -> Tuple[int, str, Dict]:
+        """
+        发送请求并读取响应文本，连接错误和可重试状态码按指数退避重试
+
+        Returns:
+            Tuple[int, str, Dict]: (状态码, 响应文本, 响应头)
+        """
+        session = await self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff_factor * (2 ** attempt)
+            try:
+                async with self._rate_slot() as slot:
+                    async with session.request(method, url, headers=headers, data=data,
+                                               timeout=client_timeout) as response:
+                        text = await response.text()
+                        slot.status_code = response.status
+                        slot.retry_after = response.headers.get('Retry-After')
+                if response.status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    logger.warning(f"请求 {url} 返回状态码 {response.status}, {delay:.1f} 秒后重试")
+                    await asyncio.sleep(delay)
+                    continue
+                return response.status, text, dict(response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"请求 {url} 出错: {e}, {delay:.1f} 秒后重试")
+                await asyncio.sleep(delay)
+
+        raise RuntimeError(f"请求 {url} 重试次数已用尽")
+
+    async def post_feed(self, post_data: Dict, referer: Optional[str] = None,
+                        timeout: Optional[float] = None) -> Tuple[int, str]:
+        """请求ColorHunt的feed.php接口，缓存策略与 HttpClient.post_feed 相同"""
+        headers = dict(FEED_HEADERS, Referer=referer) if referer else dict(FEED_HEADERS)
+        if self.feed_cache is None:
+            status, text, _ = await self._request('POST', FEED_API_URL, headers=headers, data=post_data,
+                                                  timeout=timeout)
+            return status, text
+
+        # 缓存读写涉及SQLite和线程锁，在线程中执行，不阻塞事件循环
+        key = FeedCache.make_key(post_data)
+        entry = await asyncio.to_thread(self.feed_cache.get, key)
+        if entry is not None and entry.is_fresh:
+            return 200, entry.body
+
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        status, text, response_headers = await self._request('POST', FEED_API_URL, headers=headers,
+                                                             data=post_data, timeout=timeout)
+        if status == 304 and entry is not None:
+            await asyncio.to_thread(self.feed_cache.refresh, key, entry)
+            return 200, entry.body
+        if status == 200:
+            await asyncio.to_thread(self.feed_cache.put, key, text, response_headers.get('ETag'),
+                                    response_headers.get('Last-Modified'))
+        return status, text
+
+    async def get_page(self, url: str, timeout: Optional[float] = None) -> Tuple[int, str]:
+        """请求ColorHunt网页"""
+        status, text, _ = await self._request('GET', url, headers=PAGE_HEADERS, timeout=timeout)
+        return status, text
+
+    async def _fetch_tag_items(self, tag: str) -> List[Dict]:
+        """请求单个分类标签的feed数据，失败时返回空列表"""
+        try:
+            logger.info(f"请求分类: {tag}")
+            post_data = {'step': 0, 'sort': 'new', 'tags': tag, 'timeframe': ''}
+            status, text = await self.post_feed(post_data)
+
+            if status != 200:
+                logger.warning(f"请求分类 {tag} 失败, 状态码: {status}")
+                return []
+
+            try:
+                palette_data = json.loads(text)
+            except json.JSONDecodeError as e:
+                logger.warning(f"解析分类 {tag} 的JSON数据失败: {e}")
+                return []
+
+            logger.info(f"分类 {tag} 获取到 {len(palette_data)} 个配色方案")
+            return [item for item in palette_data if 'code' in item]
+
+        except Exception as e:
+            logger.warning(f"处理分类 {tag} 时出错: {e}")
+            return []
+
+    async def get_palette_feed_items(self) -> List[Dict]:
+        """
+        并发请求所有分类的feed接口，合并为去重后的配色方案列表
+
+        Returns:
+            List[Dict]: 配色方案列表，按分类顺序合并，每项包含 code、likes、date、tags
+        """
+        tag_items = await asyncio.gather(*(self._fetch_tag_items(tag) for tag in COLORHUNT_TAGS))
+        return WebService.merge_feed_items(zip(COLORHUNT_TAGS, tag_items))
+
+    async def get_palette_urls(self) -> List[str]:
+        """
+        获取调色板URL列表 - 并发请求所有分类的feed接口
+
+        Returns:
+            List[str]: URL列表，按分类顺序合并
+        """
+        return WebService.feed_items_to_urls(await self.get_palette_feed_items())
+
+    async def fetch_palette_details(self, palette: Dict) -> Dict:
+        """
+        按需请求配色页面，补充feed数据中没有的字段
+
+        Args:
+            palette: WebService.build_palette_from_feed_item 构建的调色板数据
+
+        Returns:
+            Dict: 补充后的调色板数据，页面请求失败时原样返回
+        """
+        if palette.get("metadata", {}).get("details_fetched"):
+            return palette
+
+        page_data = await self.extract_palette_data_from_url(palette["source_url"])
+        if page_data:
+            WebService.merge_palette_details(palette, page_data)
+        return palette
+
+    async def extract_palette_data_from_url(self, url: str, idx: int = 0) -> Optional[Dict]:
+        """
+        从URL中提取调色板数据，HTML解析在线程中执行以免阻塞事件循环
+
+        Args:
+            url: 调色板URL
+            idx: 索引，用于生成ID
+
+        Returns:
+            Optional[Dict]: 调色板数据
+        """
+        try:
+            logger.info(f"请求调色板页面: {url}")
+            status, html = await self.get_page(url)
+            if status != 200:
+                logger.warning(f"请求 {url} 失败, 状态码: {status}")
+                return None
+
+            return await asyncio.to_thread(WebService.parse_palette_page, url, html, idx, status)
+
+        except asyncio.TimeoutError:
+            logger.warning(f"请求 {url} 超时")
+            return None
+        except aiohttp.ClientError as e:
+            logger.warning(f"请求 {url} 网络错误: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"处理URL {url} 时出错: {e}")
+            return None
+
+    async def scrape_colorhunt_palettes(self, limit: int = 5,
+                                        fetch_details: bool = False) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
+        """
+        抓取colorhunt.co网站的配色方案 - 异步版本，直接使用feed数据构建记录
+
+        Args:
+            limit: 要抓取的配色方案数量限制
+            fetch_details: 是否并发请求配色页面补充feed中没有的字段，并发数由限流器控制
+
+        Returns:
+            Tuple[bool, Optional[str], Optional[List[Dict]]]: (是否成功, 错误信息, 配色方案列表)
+        """
+        try:
+            logger.info(f"开始异步抓取 {limit} 个配色方案")
+
+            feed_items = await self.get_palette_feed_items()
+            if not feed_items:
+                return False, "未能获取到任何调色板URL", None
+
+            feed_items = feed_items[:limit]
+            logger.info(f"将处理 {len(feed_items)} 个配色方案")
+
+            all_palettes = [palette for palette in (
+                WebService.build_palette_from_feed_item(item, idx) for idx, item in enumerate(feed_items)
+            ) if palette]
+            if fetch_details:
+                await asyncio.gather(*(self.fetch_palette_details(palette) for palette in all_palettes))
+
+            if not all_palettes:
+                return False, "未能提取到任何调色板数据", None
+
+            logger.info(f"成功提取 {len(all_palettes)} 个调色板数据")
+            return True, None, all_palettes
+
+        except Exception as e:
+            error_msg = f"抓取配色方案时出错: {str(e)}"
+            logger.exception(error_msg)
+            return False, error_msg, None
+
+    async def fetch_feed_page(self, post_data: Dict, referer: Optional[str] = None,
+                              timeout: Optional[float] = None) -> List[Dict]:
+        """
+        请求feed接口的单页数据
+
+        Raises:
+            FeedRequestError: 接口返回非200状态码
+            json.JSONDecodeError: 响应不是合法的JSON
+        """
+        status, text = await self.post_feed(post_data, referer=referer, timeout=timeout)
+        if status != 200:
+            raise FeedRequestError(status)
+        return json.loads(text) or []
+
+    async def iter_feed_items(self, post_data: Dict, limit: Optional[int] = None, referer: Optional[str] = None,
+                              timeout: Optional[float] = None, max_pages: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        按 step 逐页遍历feed接口，逐条产出配色方案 - 异步版本
+
+        停止条件和去重规则与 WebService.iter_feed_items 相同，调用方处理当前页时
+        下一页的请求已作为任务在事件循环中执行。
+
+        Args:
+            post_data: POST参数，其中的 step 为起始页
+            limit: 最多产出的配色方案数量，为None时不限制
+            referer: 自定义Referer
+            timeout: 单页请求的超时时间（秒）
+            max_pages: 最多请求的页数，为None时不限制
+
+        Yields:
+            Dict: feed接口返回的单个配色方案（code、likes、date）
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        def fetch(step: int) -> asyncio.Task:
+            return asyncio.ensure_future(self.fetch_feed_page(dict(post_data, step=step), referer, timeout))
+
+        step = int(post_data.get('step', 0))
+        pages = 1
+        yielded = 0
+        previous_codes = set()
+        task: Optional[asyncio.Task] = fetch(step)
+        try:
+            while task is not None:
+                page = await task
+                task = None
+                if not page:
+                    return
+
+                # 当前页未取完limit且未达到页数上限时，预取下一页
+                has_more = ((limit is None or yielded + len(page) < limit)
+                            and (max_pages is None or pages < max_pages))
+                task = fetch(step + 1) if has_more else None
+                step += 1
+                pages += 1
+
+                page_codes = set()
+                for item in page:
+                    code = item.get('code')
+                    if not code or code in previous_codes or code in page_codes:
+                        continue
+                    page_codes.add(code)
+                    yield item
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+
+                if not page_codes:
+                    logger.info(f"第 {step} 页没有新的配色方案，停止翻页")
+                    return
+                previous_codes = page_codes
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def iter_tag_palettes(self, tag: str, limit: Optional[int] = None,
+                                max_pages: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        按标签逐页产出配色方案数据，格式与 WebService.iter_tag_palettes 相同
+
+        Args:
+            tag: 标签名称 (如: summer, retro, vintage等)
+            limit: 最多产出的配色方案数量，为None时遍历所有分页
+            max_pages: 最多请求的页数，为None时不限制
+
+        Yields:
+            Dict: 配色方案数据
+        """
+        post_data = {'step': 0, 'sort': 'new', 'tags': tag.lower(), 'timeframe': ''}
+        items = self.iter_feed_items(post_data, limit=limit, referer=f'https://colorhunt.co/palettes/{tag.lower()}',
+                                     timeout=15, max_pages=max_pages)
+        i = 0
+        async for item in items:
+            palette_data = WebService.build_tag_palette(tag, item, i)
+            i += 1
+            if palette_data:
+                yield palette_data
+
+    async def scrape_colorhunt_by_tag(self, tag: str, limit: int = 5) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
+        """
+        根据标签抓取ColorHunt网站的配色方案 - 异步版本
+
+        Args:
+            tag: 标签名称 (如: summer, retro, vintage等)
+            limit: 要抓取的配色方案数量限制
+
+        Returns:
+            Tuple[bool, Optional[str], Optional[List[Dict]]]: (是否成功, 错误信息, 配色方案列表)
+        """
+        try:
+            logger.info(f"开始通过API异步抓取 {tag} 标签的配色方案")
+
+            try:
+                extracted_palettes = [palette async for palette in self.iter_tag_palettes(tag, limit)]
+            except FeedRequestError as e:
+                logger.warning(f"API请求失败, 状态码: {e.status_code}")
+                return False, f"API请求失败，状态码: {e.status_code}", None
+            except json.JSONDecodeError as e:
+                logger.warning(f"解析API响应JSON失败: {e}")
+                return False, f"解析API响应失败: {e}", None
+
+            if not extracted_palettes:
+                return False, f"API未返回任何 {tag} 标签的配色方案", None
+
+            logger.info(f"成功通过API提取到 {len(extracted_palettes)} 个 {tag} 标签的配色方案")
+            return True, None, extracted_palettes
+
+        except asyncio.TimeoutError:
+            error_msg = f"API请求 {tag} 标签超时"
+            logger.warning(error_msg)
+            return False, error_msg, None
+        except aiohttp.ClientError as e:
+            error_msg = f"API请求 {tag} 标签网络错误: {e}"
+            logger.warning(error_msg)
+            return False, error_msg, None
+        except Exception as e:
+            error_msg = f"抓取 {tag} 标签配色方案时出错: {str(e)}"
+            logger.exception(error_msg)
+            return False, error_msg, None
@@ -0,0 +1,395 @@
+"""
+颜色标签推断服务，所有规则以NumPy布尔掩码的形式批量作用于颜色数组
+"""
+import os
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 规则集名称
+RULE_SET_DETAILED = "detailed"   # 颜色可同时命中多条规则，用于GUI的标签推断
+RULE_SET_BASIC = "basic"         # 每种颜色只取第一条命中的规则，用于feed数据的标签推断
+
+# 单个配色方案最多保留的标签数
+MAX_TAGS = 8
+
+# 颜色查找表：环境变量取值 full 使用24位完整查找表，quantized 使用每通道5位的量化查找表
+COLOR_LUT_ENV = "JONNYMCP_COLOR_LUT"
+LUT_FULL_BITS = 8
+LUT_QUANTIZED_BITS = 5
+LUT_VERSION = 1                  # 修改规则后递增，使已生成的查找表文件失效
+LUT_BUILD_CHUNK = 1 << 20        # 生成查找表时每批计算的颜色数
+
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+
+class _Channels:
+    """规则使用的通道数组，均为int16，避免uint8运算溢出"""
+
+    __slots__ = ('r', 'g', 'b', 'max', 'min')
+
+    def __init__(self, rgb: np.ndarray):
+        rgb = rgb.astype(np.int16)
+        self.r = rgb[..., 0]
+        self.g = rgb[..., 1]
+        self.b = rgb[..., 2]
+        self.max = rgb.max(axis=-1)
+        self.min = rgb.min(axis=-1)
+
+
+Rule = Callable[[_Channels], np.ndarray]
+
+# 多标签规则，与 ColorHuntScraper.analyze_colors_for_tags 原有的逐颜色判断相同
+DETAILED_RULES: Dict[str, Rule] = {
+    'green': lambda c: (c.g > c.r) & (c.g > c.b) & (c.g > 100),
+    'sage': lambda c: (c.r >= 90) & (c.r <= 120) & (c.g >= 100) & (c.g <= 130) & (c.b >= 60) & (c.b <= 80),
+    'beige': lambda c: (c.r > 200) & (c.g > 200) & (c.b > 180) & (np.abs(c.r - c.g) < 30),
+    'earth': lambda c: ((c.r > c.g) & (c.g > c.b)) | ((c.r > 100) & (c.g > 80) & (c.b < 100)),
+    'nature': lambda c: (c.g > c.r) | (c.g > c.b),
+    'warm': lambda c: (c.r > 150) | ((c.r > c.g) & (c.r > c.b)),
+    'light': lambda c: (c.r > 200) & (c.g > 200) & (c.b > 200),
+    'pastel': lambda c: (c.min > 150) & (c.max < 255),
+    'vintage': lambda c: (c.max - c.min < 100) & (c.max < 200),
+    'dark': lambda c: c.max < 100,
+    'bright': lambda c: (c.max > 200) & (c.max - c.min > 100),
+    'muted': lambda c: c.max - c.min < 50,
+    'blue': lambda c: (c.b > c.r) & (c.b > c.g) & (c.b > 100),
+    'red': lambda c: (c.r > c.g) & (c.r > c.b) & (c.r > 150),
+    'yellow': lambda c: (c.r > 200) & (c.g > 200) & (c.b < 150),
+    'orange': lambda c: (c.r > 200) & (c.g > 150) & (c.b < 100),
+    'purple': lambda c: (c.r > 100) & (c.b > 100) & (c.g < np.minimum(c.r, c.b)),
+    'pink': lambda c: (c.r > 200) & (c.b > 150) & (c.g < c.r),
+    'brown': lambda c: (c.r > c.g) & (c.g > c.b) & (c.r < 150) & (c.g < 120),
+    'gray': lambda c: (np.abs(c.r - c.g) < 20) & (np.abs(c.g - c.b) < 20) & (np.abs(c.r - c.b) < 20),
+    'cream': lambda c: (c.r > 240) & (c.g > 230) & (c.b > 200),
+    'gold': lambda c: (c.r > 200) & (c.g > 180) & (c.b < 100),
+    'sky': lambda c: (c.b > c.r) & (c.b > c.g) & (c.b > 150) & (c.r < 200),
+    'ocean': lambda c: (c.b > c.g) & (c.g > c.r) & (c.b > 100),
+    'forest': lambda c: (c.g > c.r) & (c.g > c.b) & (c.g < 150),
+    'sunset': lambda c: (c.r > 200) & (c.g > 100) & (c.b < 150),
+    'summer': lambda c: ((c.r > 200) | (c.g > 200)) & (c.b < 200),
+    'winter': lambda c: (c.max < 150) | ((c.r > 200) & (c.g > 200) & (c.b > 200)),
+    'spring': lambda c: (c.g > 150) & ((c.r > 150) | (c.b > 150)),
+    'fall': lambda c: (c.r > 150) & (c.g > 100) & (c.b < 150),
+}
+
+# 单标签规则链，按顺序取第一条命中的规则，与 WebService.infer_tags_from_colors 原有的判断相同
+BASIC_RULES: Dict[str, Rule] = {
+    'light': lambda c: (c.r > 200) & (c.g > 200) & (c.b > 200),
+    'dark': lambda c: (c.r < 100) & (c.g < 100) & (c.b < 100),
+    'red': lambda c: (c.r > c.g) & (c.r > c.b) & (c.r > 200),
+    'maroon': lambda c: (c.r > c.g) & (c.r > c.b),
+    'green': lambda c: (c.g > c.r) & (c.g > c.b),
+    'blue': lambda c: (c.b > c.r) & (c.b > c.g),
+    'yellow': lambda c: (c.r > 150) & (c.g > 150) & (c.b < 100),
+    'purple': lambda c: (c.r > 150) & (c.g < 150) & (c.b > 150),
+    'orange': lambda c: (c.r > 150) & (c.g > 100) & (c.b < 100),
+}
+
+
+def parse_hex_colors(colors: Iterable[str]) -> np.ndarray:
+    """
+    将#RRGGBB格式的颜色列表转换为 (K, 3) uint8 数组
+
+    每个颜色取去掉#后的前6个字符，格式不正确的颜色被跳过。
+
+    Args:
+        colors: 颜色列表
+
+    Returns:
+        np.ndarray: 颜色数组
+    """
+    values = []
+    for color in colors:
+        hex_color = color.replace('#', '')[:6]
+        if len(hex_color) == 6 and _HEX_DIGITS.issuperset(hex_color):
+            values.append(hex_color)
+    if not values:
+        return np.zeros((0, 3), dtype=np.uint8)
+    return np.frombuffer(bytes.fromhex(''.join(values)), dtype=np.uint8).reshape(-1, 3)
+
+
+class ColorTagger:
+    """
+    向量化的颜色标签推断引擎
+
+    每个标签对应 uint32 中的一位，规则以布尔掩码的形式一次作用于整个颜色数组，
+    配色方案的标签为其所有颜色标签位的按位或。细分规则集的标签按名称排序分配位，
+    因此从低位到高位取前 MAX_TAGS 个即为原有实现的排序截断结果。
+    """
+
+    def __init__(self, rule_set: str = RULE_SET_DETAILED):
+        """
+        初始化标签推断引擎
+
+        Args:
+            rule_set: 规则集，RULE_SET_DETAILED 或 RULE_SET_BASIC
+        """
+        if rule_set == RULE_SET_DETAILED:
+            rules = sorted(DETAILED_RULES.items(), key=lambda item: item[0].title())
+        elif rule_set == RULE_SET_BASIC:
+            rules = list(BASIC_RULES.items())
+        else:
+            raise ValueError(f"未知的规则集: {rule_set}")
+        self.rule_set = rule_set
+        self.first_match = rule_set == RULE_SET_BASIC
+        self.tags: Tuple[str, ...] = tuple(name.title() for name, _ in rules)
+        self._rules: List[Rule] = [rule for _, rule in rules]
+        self._tag_lists: Dict[int, List[str]] = {}
+        self.lut: Optional["ColorTagLUT"] = None
+
+    def use_lut(self, lut: Optional["ColorTagLUT"]) -> None:
+        """设置颜色查找表，之后的标签推断改为查表；传入None时恢复逐规则计算"""
+        self.lut = lut
+
+    def color_bits(self, rgb: np.ndarray) -> np.ndarray:
+        """
+        计算每种颜色的标签位，设置了查找表时直接查表
+
+        Args:
+            rgb: 最后一维为 (R, G, B) 的uint8数组，如 (K, 3) 或 (N, 4, 3)
+
+        Returns:
+            np.ndarray: 形状为 rgb.shape[:-1] 的uint32标签位数组
+        """
+        if self.lut is not None:
+            return self.lut.lookup(rgb)
+        return self.compute_bits(rgb)
+
+    def compute_bits(self, rgb: np.ndarray) -> np.ndarray:
+        """
+        逐条规则计算每种颜色的标签位
+
+        Args:
+            rgb: 最后一维为 (R, G, B) 的uint8数组，如 (K, 3) 或 (N, 4, 3)
+
+        Returns:
+            np.ndarray: 形状为 rgb.shape[:-1] 的uint32标签位数组
+        """
+        rgb = np.asarray(rgb, dtype=np.uint8)
+        channels = _Channels(rgb)
+        bits = np.zeros(rgb.shape[:-1], dtype=np.uint32)
+        unmatched = np.ones(rgb.shape[:-1], dtype=bool) if self.first_match else None
+        for i, rule in enumerate(self._rules):
+            mask = rule(channels)
+            if unmatched is not None:
+                mask = mask & unmatched
+                unmatched &= ~mask
+            bits |= mask.astype(np.uint32) << np.uint32(i)
+        return bits
+
+    def palette_bits(self, palettes: np.ndarray) -> np.ndarray:
+        """
+        计算每个配色方案的标签位
+
+        Args:
+            palettes: (N, K, 3) uint8 数组，如 PaletteBatch.rgb_array() 的结果
+
+        Returns:
+            np.ndarray: (N,) uint32 数组
+        """
+        bits = self.color_bits(palettes)
+        if bits.shape[-1] == 0:
+            return np.zeros(bits.shape[:-1], dtype=np.uint32)
+        return np.bitwise_or.reduce(bits, axis=-1)
+
+    def bits_to_tags(self, bits: int) -> List[str]:
+        """将标签位转换为标签列表（细分规则集最多 MAX_TAGS 个）"""
+        bits = int(bits)
+        tags = self._tag_lists.get(bits)
+        if tags is None:
+            tags = [tag for i, tag in enumerate(self.tags) if bits >> i & 1]
+            if not self.first_match:
+                tags = tags[:MAX_TAGS]
+            self._tag_lists[bits] = tags
+        return list(tags)
+
+    def tag_palettes(self, palettes: np.ndarray) -> List[List[str]]:
+        """
+        批量推断配色方案的标签
+
+        Args:
+            palettes: (N, K, 3) uint8 数组
+
+        Returns:
+            List[List[str]]: 每个配色方案的标签列表
+        """
+        bits = self.palette_bits(palettes)
+        unique_bits, inverse = np.unique(bits, return_inverse=True)
+        tag_lists = [self.bits_to_tags(value) for value in unique_bits]
+        return [tag_lists[i].copy() for i in inverse.ravel().tolist()]
+
+    def tag_colors(self, colors: Sequence[str]) -> List[str]:
+        """
+        推断单个配色方案的标签
+
+        Args:
+            colors: #RRGGBB格式的颜色列表，格式不正确的颜色被忽略
+
+        Returns:
+            List[str]: 标签列表
+        """
+        rgb = parse_hex_colors(colors)
+        if not len(rgb):
+            return []
+        return self.bits_to_tags(np.bitwise_or.reduce(self.color_bits(rgb)))
+
+
+
+class ColorTagLUT:
+    """
+    颜色标签查找表，每个颜色（或量化后的颜色格）对应一个uint32标签位
+
+    每通道8位时为覆盖全部16M种颜色的完整查找表（64MB），结果与逐规则计算完全相同，
+    默认生成一次后保存到缓存目录，之后以内存映射方式打开，多个进程共享同一份物理内存。
+    每通道位数较少时为量化查找表，每个颜色格取格中心颜色的标签，结果为近似值，
+    在首次查询时于内存中生成（5位时仅128KB）。
+    """
+
+    def __init__(self, tagger: ColorTagger, bits: int = LUT_FULL_BITS, persistent: Optional[bool] = None,
+                 cache_dir: Optional[str] = None):
+        """
+        初始化查找表（首次查询时才生成或加载）
+
+        Args:
+            tagger: 用于生成查找表的标签推断引擎
+            bits: 每通道保留的位数，1-8
+            persistent: 是否保存为文件并以内存映射方式加载，为None时仅完整查找表保存
+            cache_dir: 查找表文件目录，为None时使用 Config.get_cache_dir()
+        """
+        if not 1 <= bits <= 8:
+            raise ValueError(f"每通道位数必须在1-8之间: {bits}")
+        self.tagger = tagger
+        self.bits = bits
+        self.persistent = bits == LUT_FULL_BITS if persistent is None else persistent
+        self.cache_dir = cache_dir
+        self._table: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        """查表结果是否与逐规则计算完全相同"""
+        return self.bits == LUT_FULL_BITS
+
+    @property
+    def size(self) -> int:
+        """查找表条目数"""
+        return 1 << (3 * self.bits)
+
+    @property
+    def path(self) -> str:
+        """查找表文件路径，文件名包含规则集、位数和规则版本"""
+        digest = hashlib.sha1("|".join(self.tagger.tags).encode("utf-8")).hexdigest()[:8]
+        name = f"color_tags_{self.tagger.rule_set}_{self.bits}bit_v{LUT_VERSION}_{digest}.npy"
+        return os.path.join(self.cache_dir or Config.get_cache_dir(), name)
+
+    def _index(self, rgb: np.ndarray) -> np.ndarray:
+        """将颜色转换为查找表下标"""
+        rgb = np.asarray(rgb, dtype=np.uint8)
+        shift = 8 - self.bits
+        channels = (rgb >> shift).astype(np.uint32) if shift else rgb.astype(np.uint32)
+        return (channels[..., 0] << (2 * self.bits)) | (channels[..., 1] << self.bits) | channels[..., 2]
+
+    def _cell_colors(self, start: int, stop: int) -> np.ndarray:
+        """查找表下标 [start, stop) 对应的颜色，量化时取颜色格中心"""
+        index = np.arange(start, stop, dtype=np.uint32)
+        mask = (1 << self.bits) - 1
+        rgb = np.stack([(index >> (2 * self.bits)) & mask, (index >> self.bits) & mask, index & mask], axis=-1)
+        shift = 8 - self.bits
+        if shift:
+            rgb = (rgb << shift) | (1 << (shift - 1))
+        return rgb.astype(np.uint8)
+
+    def _fill(self, table: np.ndarray) -> None:
+        for start in range(0, self.size, LUT_BUILD_CHUNK):
+            stop = min(start + LUT_BUILD_CHUNK, self.size)
+            table[start:stop] = self.tagger.compute_bits(self._cell_colors(start, stop))
+
+    def _load_file(self) -> Optional[np.ndarray]:
+        """以内存映射方式打开已生成的查找表文件，文件不存在或不完整时返回None"""
+        try:
+            table = np.load(self.path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if table.dtype != np.uint32 or table.shape != (self.size,):
+            logger.warning(f"颜色查找表文件格式不正确，将重新生成: {self.path}")
+            return None
+        return table
+
+    def _build_file(self) -> np.ndarray:
+        """生成查找表文件后以内存映射方式打开，先写入临时文件避免其他进程读到不完整的表"""
+        path = self.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        logger.info(f"生成颜色查找表: {path}")
+        table = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint32, shape=(self.size,))
+        try:
+            self._fill(table)
+            table.flush()
+        finally:
+            del table
+        os.replace(tmp_path, path)
+        return np.load(path, mmap_mode='r')
+
+    def load(self) -> np.ndarray:
+        """获取查找表数组，首次调用时加载或生成"""
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    if self.persistent:
+                        table = self._load_file()
+                        if table is None:
+                            table = self._build_file()
+                    else:
+                        table = np.empty(self.size, dtype=np.uint32)
+                        self._fill(table)
+                    self._table = table
+        return self._table
+
+    def lookup(self, rgb: np.ndarray) -> np.ndarray:
+        """
+        查询每种颜色的标签位
+
+        Args:
+            rgb: 最后一维为 (R, G, B) 的uint8数组
+
+        Returns:
+            np.ndarray: 形状为 rgb.shape[:-1] 的uint32标签位数组
+        """
+        return np.asarray(self.load()[self._index(rgb)], dtype=np.uint32)
+
+
+_taggers: Dict[str, ColorTagger] = {}
+_taggers_lock = threading.Lock()
+
+
+def _lut_from_env(tagger: ColorTagger) -> Optional[ColorTagLUT]:
+    """根据环境变量 JONNYMCP_COLOR_LUT 创建查找表"""
+    mode = os.environ.get(COLOR_LUT_ENV, "").strip().lower()
+    if mode == "full":
+        return ColorTagLUT(tagger, LUT_FULL_BITS)
+    if mode == "quantized":
+        return ColorTagLUT(tagger, LUT_QUANTIZED_BITS)
+    if mode:
+        logger.warning(f"未知的颜色查找表模式: {mode}，将逐规则计算标签")
+    return None
+
+
+def get_color_tagger(rule_set: str = RULE_SET_DETAILED) -> ColorTagger:
+    """获取进程内共享的标签推断引擎（首次调用时创建，按环境变量 JONNYMCP_COLOR_LUT 启用查找表）"""
+    tagger: Optional[ColorTagger] = _taggers.get(rule_set)
+    if tagger is None:
+        with _taggers_lock:
+            tagger = _taggers.get(rule_set)
+            if tagger is None:
+                tagger = ColorTagger(rule_set)
+                tagger.use_lut(_lut_from_env(tagger))
+                _taggers[rule_set] = tagger
+    return tagger
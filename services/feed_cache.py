@@ -0,0 +1,282 @@
+"""
+feed接口响应缓存，负责ColorHunt feed.php数据的本地持久化、过期控制和LRU淘汰
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 按排序方式和时间范围划分的缓存有效期（秒），0 表示不缓存
+FEED_CACHE_TTLS = {
+    ('new', ''): 5 * 60,                 # 最新列表变化快，短时间缓存
+    ('popular', '30'): 60 * 60,          # 月度热门
+    ('popular', '365'): 6 * 60 * 60,     # 年度热门
+    ('popular', '9999'): 24 * 60 * 60,   # 全部时间热门几乎不变
+    ('random', ''): 0,                   # 随机列表每次都应重新获取
+}
+DEFAULT_FEED_TTL = 5 * 60
+
+# feed请求的标准参数，其他POST字段会附加到缓存键中
+FEED_KEY_FIELDS = ('sort', 'tags', 'timeframe', 'step')
+
+
+class FeedCacheEntry:
+    """单条feed缓存记录"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, body: str, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def is_fresh(self) -> bool:
+        """是否仍在有效期内"""
+        return time.time() < self.expires_at
+
+    @property
+    def can_revalidate(self) -> bool:
+        """服务器是否提供了条件请求所需的校验信息"""
+        return bool(self.etag or self.last_modified)
+
+
+class FeedCache:
+    """feed接口响应缓存，内存LRU作为热点层，SQLite文件作为持久层"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 1024, memory_entries: int = 128,
+                 ttls: Optional[Dict[Tuple[str, str], int]] = None):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite缓存文件路径，为None时使用配置的缓存目录
+            max_entries: 持久层最多保留的记录数，超出后按最近访问时间淘汰
+            memory_entries: 内存热点层最多保留的记录数
+            ttls: 自定义的 (sort, timeframe) -> 有效期（秒） 映射
+        """
+        self.db_path = db_path or os.path.join(Config.get_cache_dir(), "feed_cache.sqlite3")
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttls = dict(FEED_CACHE_TTLS)
+        self.ttls.update(ttls or {})
+        self._memory: "OrderedDict[Tuple, FeedCacheEntry]" = OrderedDict()
+        # 内存层命中的访问时间，淘汰前或关闭时批量写回持久层
+        self._pending_access: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(post_data: Dict) -> Tuple[str, ...]:
+        """
+        根据feed请求参数生成缓存键
+
+        前四项为 (sort, tags, timeframe, step)，标准参数之外的字段按名称排序后以
+        "名称=值" 附加在后面，参数不同的请求不会共用缓存记录。
+        """
+        key = (
+            str(post_data.get('sort', '')),
+            str(post_data.get('tags', '')),
+            str(post_data.get('timeframe', '')),
+            str(post_data.get('step', 0)),
+        )
+        extra = sorted((str(name), str(value)) for name, value in post_data.items() if name not in FEED_KEY_FIELDS)
+        return key + tuple(f"{name}={value}" for name, value in extra)
+
+    def ttl_for(self, key: Tuple[str, ...]) -> int:
+        """获取缓存键对应的有效期（秒）"""
+        sort, timeframe = key[0], key[2]
+        if (sort, timeframe) in self.ttls:
+            return self.ttls[(sort, timeframe)]
+        if sort == 'popular':
+            return self.ttls[('popular', '30')]
+        return DEFAULT_FEED_TTL
+
+    def _connect(self) -> sqlite3.Connection:
+        """延迟打开SQLite连接，首次使用时建表"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_cache (
+                    key TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_cache_access ON feed_cache(last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _db_key(key: Tuple) -> str:
+        return "|".join(key)
+
+    def _remember(self, key: Tuple, entry: FeedCacheEntry) -> None:
+        """放入内存热点层并维护LRU顺序（调用方持有锁）"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_access(self, conn: sqlite3.Connection) -> None:
+        """将内存层命中的访问时间写回持久层（调用方持有锁）"""
+        if self._pending_access:
+            pending, self._pending_access = self._pending_access, {}
+            conn.executemany("UPDATE feed_cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+                             [(accessed, self._db_key(key)) for key, accessed in pending.items()])
+
+    def get(self, key: Tuple) -> Optional[FeedCacheEntry]:
+        """
+        查询缓存记录，过期记录同样返回以便调用方发起条件请求
+
+        Args:
+            key: make_key 生成的缓存键
+
+        Returns:
+            Optional[FeedCacheEntry]: 缓存记录，不存在时返回None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._pending_access[key] = time.time()
+            else:
+                try:
+                    conn = self._connect()
+                    row = conn.execute(
+                        "SELECT body, etag, last_modified, expires_at FROM feed_cache WHERE key = ?",
+                        (self._db_key(key),)
+                    ).fetchone()
+                    if row:
+                        conn.execute("UPDATE feed_cache SET last_access = ? WHERE key = ?",
+                                     (time.time(), self._db_key(key)))
+                        conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"读取feed缓存失败: {e}")
+                    row = None
+                if row:
+                    entry = FeedCacheEntry(*row)
+                    self._remember(key, entry)
+
+            if entry is not None and entry.is_fresh:
+                self._stats['hits'] += 1
+            else:
+                self._stats['misses'] += 1
+            return entry
+
+    def put(self, key: Tuple, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        写入缓存记录，有效期为0的排序方式不会被缓存
+
+        Args:
+            key: make_key 生成的缓存键
+            body: 响应文本
+            etag: 响应的ETag头
+            last_modified: 响应的Last-Modified头
+        """
+        ttl = self.ttl_for(key)
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        entry = FeedCacheEntry(body, etag, last_modified, now + ttl)
+        with self._lock:
+            self._remember(key, entry)
+            self._stats['stores'] += 1
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO feed_cache (key, body, etag, last_modified, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self._db_key(key), body, etag, last_modified, entry.expires_at, now)
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"写入feed缓存失败: {e}")
+
+    def refresh(self, key: Tuple, entry: FeedCacheEntry) -> None:
+        """服务器返回304后延长缓存记录的有效期"""
+        now = time.time()
+        entry.expires_at = now + self.ttl_for(key)
+        with self._lock:
+            self._remember(key, entry)
+            self._stats['revalidated'] += 1
+            try:
+                conn = self._connect()
+                conn.execute("UPDATE feed_cache SET expires_at = ?, last_access = ? WHERE key = ?",
+                             (entry.expires_at, now, self._db_key(key)))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"更新feed缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """超出容量时按最近访问时间淘汰最旧的记录（调用方持有锁）"""
+        self._flush_access(conn)
+        count = conn.execute("SELECT COUNT(*) FROM feed_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM feed_cache WHERE key IN "
+                "(SELECT key FROM feed_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._stats['evictions'] += overflow
+
+    def clear(self) -> None:
+        """清空内存层和持久层"""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM feed_cache")
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"清空feed缓存失败: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存命中统计"""
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._memory))
+
+    def close(self) -> None:
+        """关闭SQLite连接"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._flush_access(self._conn)
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"写回feed缓存访问时间失败: {e}")
+                self._conn.close()
+                self._conn = None
+
+
+_default_cache: Optional[FeedCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_feed_cache() -> FeedCache:
+    """获取进程内共享的默认feed缓存（首次调用时创建）"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = FeedCache()
+    return _default_cache
@@ -0,0 +1,234 @@
+"""
+HTTP客户端类，负责ColorHunt请求的连接复用、连接池和失败重试
+"""
+import threading
+import logging
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.feed_cache import FeedCache, get_feed_cache
+from services.rate_limiter import RateLimiter, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# ColorHunt feed接口地址
+FEED_API_URL = "https://colorhunt.co/php/feed.php"
+
+# 需要自动重试的HTTP状态码
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 所有请求共用的基础请求头
+BASE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
+# feed.php 接口请求头
+FEED_HEADERS = {
+    'Accept': 'application/json, text/html, */*',
+    'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Referer': 'https://colorhunt.co/'
+}
+
+# 网页请求头
+PAGE_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Referer': 'https://colorhunt.co/'
+}
+
+
+class HttpClient:
+    """HTTP客户端类，基于共享的 requests.Session 提供长连接复用和带退避的重试"""
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 status_forcelist: tuple = RETRY_STATUS_CODES,
+                 timeout: float = 10, feed_cache: Optional[FeedCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            pool_connections: 缓存的连接池数量（按主机区分）
+            pool_maxsize: 每个主机连接池的最大连接数，应不小于并发请求数
+            max_retries: 连接错误和可重试状态码的最大重试次数
+            backoff_factor: 指数退避系数，第n次重试前等待 backoff_factor * 2^(n-1) 秒
+            status_forcelist: 需要重试的HTTP状态码
+            timeout: 默认超时时间（秒）
+            feed_cache: feed接口响应缓存，为None时不缓存
+            rate_limiter: 请求限流器，为None时不限流
+        """
+        self.timeout = timeout
+        self.feed_cache = feed_cache
+        self.rate_limiter = rate_limiter
+        self.pool_maxsize = pool_maxsize
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=frozenset({'GET', 'POST'}),  # feed.php 的POST请求是只读查询，可以安全重试
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers.update(BASE_HEADERS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        发送请求，配置了 rate_limiter 时先取得限流名额并把结果反馈给限流器
+
+        Args:
+            method: HTTP方法
+            url: 请求URL
+            timeout: 超时时间（秒），为None时使用默认值
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        if self.rate_limiter is None:
+            return self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+        with self.rate_limiter.slot() as slot:
+            response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            slot.status_code = response.status_code
+            slot.retry_after = response.headers.get('Retry-After')
+
+        # 连接池内部自动重试过的失败响应同样是服务器压力的信号
+        retries = getattr(response.raw, 'retries', None)
+        for attempt in getattr(retries, 'history', ()):
+            self.rate_limiter.record(status_code=attempt.status, error=attempt.error is not None)
+        return response
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None,
+            **kwargs) -> requests.Response:
+        """发送GET请求"""
+        return self.request('GET', url, headers=headers, timeout=timeout, **kwargs)
+
+    def post(self, url: str, data=None, headers: Optional[Dict] = None, timeout: Optional[float] = None,
+             **kwargs) -> requests.Response:
+        """发送POST请求"""
+        return self.request('POST', url, data=data, headers=headers, timeout=timeout, **kwargs)
+
+    def get_page(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        请求ColorHunt网页
+
+        Args:
+            url: 网页URL
+            timeout: 超时时间（秒），为None时使用默认值
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        return self.get(url, headers=PAGE_HEADERS, timeout=timeout, **kwargs)
+
+    def post_feed(self, post_data: Dict, referer: Optional[str] = None,
+                  timeout: Optional[float] = None) -> requests.Response:
+        """
+        请求ColorHunt的feed.php接口
+
+        配置了 feed_cache 时，有效期内的请求直接由缓存返回；过期记录在服务器提供
+        ETag/Last-Modified 时发起条件请求，收到304则沿用缓存内容。
+
+        Args:
+            post_data: POST参数（step、sort、tags、timeframe）
+            referer: 自定义Referer，为None时使用站点首页
+            timeout: 超时时间（秒），为None时使用默认值
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        headers = FEED_HEADERS
+        if referer:
+            headers = dict(FEED_HEADERS, Referer=referer)
+        if self.feed_cache is None:
+            return self.post(FEED_API_URL, data=post_data, headers=headers, timeout=timeout)
+
+        key = FeedCache.make_key(post_data)
+        entry = self.feed_cache.get(key)
+        if entry is not None and entry.is_fresh:
+            return self._cached_response(entry.body)
+
+        if entry is not None and entry.can_revalidate:
+            headers = dict(headers)
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        response = self.post(FEED_API_URL, data=post_data, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry is not None:
+            self.feed_cache.refresh(key, entry)
+            return self._cached_response(entry.body)
+        if response.status_code == 200:
+            self.feed_cache.put(key, response.text, response.headers.get('ETag'),
+                                response.headers.get('Last-Modified'))
+        return response
+
+    @staticmethod
+    def _cached_response(body: str) -> requests.Response:
+        """用缓存内容构造与真实请求一致的响应对象"""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = body.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = FEED_API_URL
+        response.headers['X-Feed-Cache'] = 'HIT'
+        return response
+
+    def close(self) -> None:
+        """关闭会话并释放连接池"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取进程内共享的默认HTTP客户端（首次调用时创建）"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = HttpClient(feed_cache=get_feed_cache(), rate_limiter=get_rate_limiter())
+    return _default_client
+
+
+_live_client: Optional[HttpClient] = None
+
+
+def get_live_http_client() -> HttpClient:
+    """
+    获取进程内共享的不缓存feed响应的HTTP客户端（首次调用时创建）
+
+    与默认客户端共用限流器，用于同步、调试等必须看到接口实时数据的场景。
+    """
+    global _live_client
+    if _live_client is None:
+        with _default_client_lock:
+            if _live_client is None:
+                _live_client = HttpClient(feed_cache=None, rate_limiter=get_rate_limiter())
+    return _live_client
+
+
+def set_http_client(client: Optional[HttpClient]) -> None:
+    """替换进程内共享的默认HTTP客户端，传入None时下次使用会重新创建"""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
@@ -0,0 +1,322 @@
+"""
+调色板页面提取器，单次扫描页面文本提取标题、点赞数、日期和标签
+"""
+import re
+import html as html_lib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    LXML_SUPPORT = True
+except ImportError:
+    LXML_SUPPORT = False
+
+logger = logging.getLogger(__name__)
+
+# ColorHunt的标准标签（基于HTML中的tagBank）
+COLORHUNT_PAGE_TAGS = {
+    # 颜色标签
+    'blue', 'teal', 'mint', 'green', 'sage', 'yellow', 'beige', 'brown',
+    'orange', 'peach', 'red', 'maroon', 'pink', 'purple', 'navy', 'black',
+    'grey', 'white',
+    # 风格标签
+    'pastel', 'vintage', 'retro', 'neon', 'gold', 'light', 'dark', 'warm',
+    'cold', 'summer', 'fall', 'winter', 'spring', 'happy', 'nature', 'earth',
+    'night', 'space', 'rainbow', 'gradient', 'sunset', 'sky', 'sea', 'kids',
+    'skin', 'food', 'cream', 'coffee', 'wedding', 'christmas', 'halloween'
+}
+
+# 各字段的匹配模式，按优先级排列：(模式, 相对锚点的起始偏移)
+# 偏移为 -1 的模式以引号开头，引号位于锚点关键字之前一个字符
+LIKES_PATTERNS = [
+    (r"'likes':\s*(\d+)", -1),
+    (r'"likes":\s*(\d+)', -1),
+    (r"likes['\"]:\s*(\d+)", 0),
+    (r"formatThousands\((\d+)\)", 0),
+    (r"\.text\((\d+)\)", 0),
+]
+DATE_PATTERNS = [
+    (r"'date':\s*['\"]([^'\"]+)['\"]", -1),
+    (r'"date":\s*"([^"]+)"', -1),
+    (r"date['\"]:\s*['\"]([^'\"]+)['\"]", 0),
+]
+TAG_PATTERNS = [
+    (r"tags['\"]:\s*['\"]([^'\"]+)['\"]", 0),
+    (r"'tags':\s*['\"]([^'\"]+)['\"]", -1),
+    (r'"tags":\s*"([^"]+)"', -1),
+]
+
+# 点赞数和日期的CSS选择器，在页面脚本中找不到时使用
+LIKE_SELECTORS = [
+    '.like span', '.button.like span', '.actions .like span',
+    '[data-likes]', '.likes-count', '.like-count'
+]
+DATE_SELECTORS = ['.date', '.time', '.timestamp', '.created']
+
+# 一次扫描需要定位的所有锚点：字段关键字，以及决定<title>是否可以直接截取的标签
+_ANCHOR_RE = re.compile(r"likes|date|tags|formatThousands\(|\.text\(|<(?i:title|script|style)\b|<!--")
+_TITLE_OPEN_RE = re.compile(r"<title\b[^>]*>", re.IGNORECASE)
+_TITLE_CLOSE_RE = re.compile(r"</title", re.IGNORECASE)
+
+
+def _compile(patterns: List[Tuple[str, int]]) -> List[Tuple[int, "re.Pattern", int]]:
+    return [(priority, re.compile(pattern), offset) for priority, (pattern, offset) in enumerate(patterns)]
+
+
+_LIKES = _compile(LIKES_PATTERNS)
+_DATES = _compile(DATE_PATTERNS)
+_TAGS = _compile(TAG_PATTERNS)
+
+# 锚点关键字 -> [(字段, 优先级, 模式, 偏移)]
+_ANCHOR_SPECS = {
+    'likes': [('likes',) + spec for spec in _LIKES[:3]],
+    'formatThousands(': [('likes',) + _LIKES[3]],
+    '.text(': [('likes',) + _LIKES[4]],
+    'date': [('date',) + spec for spec in _DATES],
+    'tags': [('tags',) + spec for spec in _TAGS],
+}
+
+
+def _class_test(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 与CSS选择器等价的XPath表达式（lxml未安装cssselect时使用）
+_LXML_SELECTORS = {
+    '.like span': f"//*[{_class_test('like')}]//span",
+    '.button.like span': f"//*[{_class_test('button')} and {_class_test('like')}]//span",
+    '.actions .like span': f"//*[{_class_test('actions')}]//*[{_class_test('like')}]//span",
+    '[data-likes]': "//*[@data-likes]",
+    '.likes-count': f"//*[{_class_test('likes-count')}]",
+    '.like-count': f"//*[{_class_test('like-count')}]",
+    '.date': f"//*[{_class_test('date')}]",
+    '.time': f"//*[{_class_test('time')}]",
+    '.timestamp': f"//*[{_class_test('timestamp')}]",
+    '.created': f"//*[{_class_test('created')}]",
+}
+if LXML_SUPPORT:
+    _LXML_XPATHS = {selector: etree.XPath(expr) for selector, expr in _LXML_SELECTORS.items()}
+
+
+class _LxmlDocument:
+    """基于lxml的页面DOM，提供与BeautifulSoup一致的查询结果"""
+
+    def __init__(self, html: str):
+        self._root = lxml_html.document_fromstring(html)
+
+    def title(self) -> Optional[str]:
+        elem = self._root.find('.//title')
+        if elem is None:
+            return None
+        text = elem.text_content()
+        if '<' in text:
+            # libxml2 把<title>当作纯文本，html.parser会解析其中的子标签
+            text = BeautifulSoup(text, 'html.parser').text
+        return text.strip()
+
+    def select_texts(self, selector: str) -> List[str]:
+        return [elem.text_content() for elem in _LXML_XPATHS[selector](self._root)]
+
+
+class _SoupDocument:
+    """基于BeautifulSoup html.parser的页面DOM"""
+
+    def __init__(self, html: str):
+        self._soup = BeautifulSoup(html, 'html.parser')
+
+    def title(self) -> Optional[str]:
+        elem = self._soup.find('title')
+        return elem.text.strip() if elem else None
+
+    def select_texts(self, selector: str) -> List[str]:
+        return [elem.text for elem in self._soup.select(selector)]
+
+
+class PaletteExtractor:
+    """调色板页面字段提取器"""
+
+    def __init__(self, engine: str = "auto"):
+        """
+        初始化提取器
+
+        Args:
+            engine: DOM解析引擎，"auto" 优先使用lxml，"lxml" 或 "html.parser" 指定引擎
+        """
+        if engine == "auto":
+            engine = "lxml" if LXML_SUPPORT else "html.parser"
+        if engine == "lxml" and not LXML_SUPPORT:
+            raise ValueError("未安装lxml，无法使用lxml解析引擎")
+        if engine not in ("lxml", "html.parser"):
+            raise ValueError(f"不支持的解析引擎: {engine}")
+        self.engine = engine
+
+    def _parse_dom(self, html: str):
+        """解析DOM，lxml无法解析的页面（如带编码声明的字符串）退回html.parser"""
+        if self.engine == "lxml":
+            try:
+                return _LxmlDocument(html)
+            except (ValueError, etree.ParserError) as e:
+                logger.debug(f"lxml解析失败，改用html.parser: {e}")
+        return _SoupDocument(html)
+
+    @staticmethod
+    def scan(html: str) -> Dict:
+        """
+        单次扫描页面文本，收集所有字段模式的匹配结果
+
+        每个锚点位置独立尝试该关键字对应的模式，因此互相重叠的匹配（如 'likes': 与
+        likes': 同时命中）和逐个 re.findall 的结果完全一致。
+
+        Args:
+            html: 页面HTML内容
+
+        Returns:
+            Dict: likes（各模式的全部匹配）、date/tags（各模式的首个匹配）、
+                  title（已确定的标题，None表示没有标题元素）和 title_resolved
+        """
+        likes: List[List[str]] = [[] for _ in _LIKES]
+        dates: List[Optional[str]] = [None] * len(_DATES)
+        tags: List[Optional[str]] = [None] * len(_TAGS)
+        title = None
+        title_resolved = None  # None: 尚未遇到<title>；True/False: 标题是否可直接截取
+        title_seen = False
+
+        for anchor in _ANCHOR_RE.finditer(html):
+            key = anchor.group()
+            if key[0] == '<':
+                tag = key[1:].lower()
+                if tag == 'title':
+                    title_seen = True
+                if title_resolved is None:
+                    if tag == 'title':
+                        title, title_resolved = PaletteExtractor._slice_title(html, anchor.start())
+                    else:
+                        # 脚本、样式或注释出现在<title>之前，交给DOM判断
+                        title_resolved = False
+                continue
+
+            pos = anchor.start()
+            for field, priority, pattern, offset in _ANCHOR_SPECS[key]:
+                start = pos + offset
+                if start < 0:
+                    continue
+                match = pattern.match(html, start)
+                if not match:
+                    continue
+                if field == 'likes':
+                    likes[priority].append(match.group(1))
+                elif field == 'date':
+                    if dates[priority] is None:
+                        dates[priority] = match.group(1)
+                elif tags[priority] is None:
+                    tags[priority] = match.group(1)
+
+        if not title_seen:
+            title, title_resolved = None, True
+        return {
+            'likes': likes,
+            'dates': dates,
+            'tags': tags,
+            'title': title,
+            'title_resolved': bool(title_resolved),
+        }
+
+    @staticmethod
+    def _slice_title(html: str, pos: int) -> Tuple[Optional[str], bool]:
+        """直接截取<title>的文本，标题中含有子标签或没有结束标签时返回未确定"""
+        open_match = _TITLE_OPEN_RE.match(html, pos)
+        if not open_match:
+            return None, False
+        close_match = _TITLE_CLOSE_RE.search(html, open_match.end())
+        if not close_match:
+            return None, False
+        raw = html[open_match.end():close_match.start()]
+        if '<' in raw:
+            return None, False
+        return html_lib.unescape(raw).strip(), True
+
+    @staticmethod
+    def _likes_from_matches(likes_matches: List[List[str]]) -> int:
+        """按优先级取第一个有正数匹配的模式，返回其中的最大值"""
+        for matches in likes_matches:
+            if matches:
+                potential_likes = [int(m) for m in matches if int(m) > 0]
+                if potential_likes:
+                    return max(potential_likes)
+        return 0
+
+    @staticmethod
+    def _likes_from_texts(texts: List[str]) -> int:
+        """从点赞元素的文本中解析点赞数，支持 1.2k 形式"""
+        for text in texts:
+            try:
+                like_text = text.strip()
+                if like_text and like_text.isdigit():
+                    return int(like_text)
+                elif like_text and 'k' in like_text.lower():
+                    number = float(like_text.lower().replace('k', ''))
+                    return int(number * 1000)
+            except (ValueError, AttributeError):
+                continue
+        return 0
+
+    def extract(self, html: str) -> Dict:
+        """
+        提取页面中的标题、点赞数、日期和标签
+
+        页面脚本中能找到的字段只需一次文本扫描；标题无法直接截取、点赞数或日期
+        需要通过CSS选择器查找时，才解析一次DOM。
+
+        Args:
+            html: 页面HTML内容
+
+        Returns:
+            Dict: title（标题文本，没有标题元素时为None）、likes、date（未找到时为空字符串）、
+                  tags（页面中的标准标签，首字母大写）
+        """
+        scanned = self.scan(html)
+
+        likes = self._likes_from_matches(scanned['likes'])
+        date = next((d for d in scanned['dates'] if d is not None), "")
+
+        tags = []
+        tag_text = next((t for t in scanned['tags'] if t is not None), None)
+        if tag_text is not None:
+            for tag in tag_text.split('-'):
+                tag = tag.strip().lower()
+                if tag in COLORHUNT_PAGE_TAGS:
+                    tags.append(tag.title())
+
+        title = scanned['title']
+        if not scanned['title_resolved'] or likes == 0 or not date:
+            dom = self._parse_dom(html)
+            if not scanned['title_resolved']:
+                title = dom.title()
+            if likes == 0:
+                for selector in LIKE_SELECTORS:
+                    likes = self._likes_from_texts(dom.select_texts(selector))
+                    if likes > 0:
+                        break
+            if not date:
+                for selector in DATE_SELECTORS:
+                    texts = dom.select_texts(selector)
+                    if texts and texts[0].strip():
+                        date = texts[0].strip()
+                        break
+
+        return {'title': title, 'likes': likes, 'date': date, 'tags': tags}
+
+
+_default_extractor: Optional[PaletteExtractor] = None
+
+
+def get_palette_extractor() -> PaletteExtractor:
+    """获取默认的页面提取器（优先使用lxml）"""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = PaletteExtractor()
+    return _default_extractor
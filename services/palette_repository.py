@@ -0,0 +1,457 @@
+"""
+本地配色方案库，以24位配色代码为主键保存在SQLite（WAL模式）中，按标签、点赞数和日期建立索引
+"""
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.config import Config
+from models.palette import Palette, PaletteBatch
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_SCHEMA_VERSION = 3
+
+# 查询排序方式
+ORDER_LIKES = "likes"      # 点赞数从高到低
+ORDER_DATE = "date"        # 发布时间从新到旧
+ORDER_BY = (ORDER_LIKES, ORDER_DATE)
+
+UPSERT_BATCH_SIZE = 10000  # 批量写入时每个事务的记录数
+CACHE_SIZE_KB = 65536      # SQLite页缓存大小，批量写入时减少索引页的换入换出
+
+# feed接口返回的相对时间单位（秒）
+_RELATIVE_UNITS = {
+    'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400,
+    'week': 7 * 86400, 'month': 30 * 86400, 'year': 365 * 86400,
+}
+_RELATIVE_DATE = re.compile(r'(\d+)\s*(second|minute|hour|day|week|month|year)s?', re.IGNORECASE)
+
+# 标签feed记录中附加在标签名后的来源说明，如 "Summer (API标签)"
+_TAG_SUFFIX = re.compile(r'\s*\(.*\)\s*$')
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS palettes (
+        code TEXT PRIMARY KEY,
+        likes INTEGER NOT NULL DEFAULT 0,
+        date TEXT NOT NULL DEFAULT '',
+        posted_at REAL,
+        first_seen REAL NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID
+    """,
+    # 点赞数和发布时间冗余保存在标签表中，按标签查询和排序只需扫描索引
+    """
+    CREATE TABLE IF NOT EXISTS palette_tags (
+        tag TEXT NOT NULL,
+        code TEXT NOT NULL,
+        likes INTEGER NOT NULL DEFAULT 0,
+        posted_at REAL,
+        PRIMARY KEY (tag, code)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_palettes_likes ON palettes(likes DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_palettes_posted ON palettes(posted_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_palette_tags_likes ON palette_tags(tag, likes DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_palette_tags_posted ON palette_tags(tag, posted_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_palette_tags_code ON palette_tags(code)",
+    # 增量同步的进度，tag 为空字符串时表示不限标签的最新列表
+    """
+    CREATE TABLE IF NOT EXISTS sync_state (
+        tag TEXT PRIMARY KEY,
+        head_code TEXT,
+        synced_at REAL NOT NULL,
+        runs INTEGER NOT NULL DEFAULT 0,
+        fetched INTEGER NOT NULL DEFAULT 0,
+        resume_step INTEGER,
+        backfill_until TEXT
+    )
+    """,
+)
+
+# 旧版本数据库需要补充的列：(表, 列, 定义)
+_MIGRATIONS = (
+    ('sync_state', 'resume_step', 'INTEGER'),
+    ('sync_state', 'backfill_until', 'TEXT'),
+)
+
+
+def parse_feed_date(date: str, now: Optional[float] = None) -> Optional[float]:
+    """
+    将feed接口的日期估算为时间戳
+
+    Args:
+        date: 相对时间（如 "3 days"、"1 week"）或 YYYY-MM-DD 格式的日期
+        now: 当前时间戳，为None时使用当前时间
+
+    Returns:
+        Optional[float]: 估算的发布时间戳，无法解析时为None
+    """
+    if not date:
+        return None
+    now = time.time() if now is None else now
+    match = _RELATIVE_DATE.search(date)
+    if match:
+        return now - int(match.group(1)) * _RELATIVE_UNITS[match.group(2).lower()]
+    try:
+        return datetime.strptime(date.strip()[:10], "%Y-%m-%d").timestamp()
+    except ValueError:
+        return None
+
+
+def normalize_tag(tag: str) -> str:
+    """标签统一为小写，去掉来源说明"""
+    return _TAG_SUFFIX.sub('', str(tag)).strip().lower()
+
+
+class PaletteRepository:
+    """
+    本地配色方案库
+
+    每个配色方案保存一行，重复写入时更新点赞数和日期并合并标签；发布时间根据首次
+    写入时的相对日期估算。多线程共享一个连接，读写都加锁。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化配色方案库
+
+        Args:
+            db_path: SQLite文件路径，为None时使用配置的缓存目录下的 palette_store.sqlite3
+        """
+        self.db_path = db_path or os.path.join(Config.get_cache_dir(), "palette_store.sqlite3")
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """延迟打开SQLite连接，首次使用时建表"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            for table, column, definition in _MIGRATIONS:
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.execute(f"PRAGMA user_version = {REPOSITORY_SCHEMA_VERSION}")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _record(palette: Union[Palette, Dict], tag: Optional[str]) -> Optional[Tuple[str, int, str, List[str]]]:
+        """将 Palette 对象或配色方案字典转换为 (代码, 点赞数, 日期, 标签列表)"""
+        if isinstance(palette, Palette):
+            code, likes, date = palette.code, palette.likes, palette.date
+            # 根据颜色推断的标签不写入标签索引
+            tags = [] if palette.tags_inferred else list(palette.tags)
+            if palette.tag:
+                tags.append(palette.tag)
+        else:
+            code = str(palette.get('palette_id') or palette.get('code') or '').lower()
+            if Palette.pack_code(code) is None:
+                return None
+            likes = palette.get('likes') or 0
+            likes = likes if isinstance(likes, int) else int(re.sub(r'\D', '', str(likes)) or 0)
+            date = str(palette.get('date') or '')
+            inferred = (palette.get('metadata') or {}).get('tags_inferred', False)
+            tags = [] if inferred else list(palette.get('tags') or [])
+        if tag:
+            tags.append(tag)
+        tags = sorted({normalize_tag(t) for t in tags} - {'', 'colorhunt'})
+        return code, likes, date, tags
+
+    def upsert(self, palettes: Iterable[Union[Palette, Dict]], tag: Optional[str] = None) -> int:
+        """
+        批量写入配色方案，已存在的配色方案更新点赞数和日期，标签与已有标签合并
+
+        Args:
+            palettes: Palette 对象、PaletteBatch 或配色方案字典（使用 palette_id、likes、date、tags 字段）
+            tag: 附加到所有配色方案的标签，通常为抓取时使用的分类
+
+        Returns:
+            int: 写入的配色方案数量（重复的配色代码只计一次，不含代码无效的记录）
+        """
+        written = 0
+        chunk = []
+        for palette in palettes:
+            record = self._record(palette, tag)
+            if record is None:
+                continue
+            chunk.append(record)
+            if len(chunk) >= UPSERT_BATCH_SIZE:
+                written += self._upsert_chunk(chunk)
+                chunk = []
+        if chunk:
+            written += self._upsert_chunk(chunk)
+        return written
+
+    def _upsert_chunk(self, records: List[Tuple[str, int, str, List[str]]]) -> int:
+        now = time.time()
+        # 同一批中重复的代码保留最后一条，标签合并
+        merged: Dict[str, Tuple[int, str, set]] = {}
+        for code, likes, date, tags in records:
+            previous = merged.get(code)
+            merged[code] = (likes, date, set(tags) | (previous[2] if previous else set()))
+
+        with self._lock:
+            conn = self._connect()
+            existing = self._existing_posted_at(conn, list(merged))
+            rows = []
+            for code, (likes, date, tags) in merged.items():
+                # 已保存的配色方案保留首次写入时估算的发布时间
+                posted_at = existing[code] if existing.get(code) is not None else parse_feed_date(date, now)
+                rows.append((code, likes, date, posted_at, tags))
+            with conn:
+                conn.executemany(
+                    "INSERT INTO palettes (code, likes, date, posted_at, first_seen, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(code) DO UPDATE SET likes = excluded.likes, date = excluded.date, "
+                    "posted_at = excluded.posted_at, updated_at = excluded.updated_at",
+                    [(code, likes, date, posted_at, now, now) for code, likes, date, posted_at, _ in rows]
+                )
+                conn.executemany(
+                    "INSERT INTO palette_tags (tag, code, likes, posted_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(tag, code) DO UPDATE SET likes = excluded.likes, posted_at = excluded.posted_at",
+                    [(t, code, likes, posted_at) for code, likes, _, posted_at, tags in rows for t in tags]
+                )
+                # 已保存的配色方案在本批之外的标签同样更新冗余字段
+                conn.executemany(
+                    "UPDATE palette_tags SET likes = ?, posted_at = ? WHERE code = ?",
+                    [(likes, posted_at, code) for code, likes, _, posted_at, _ in rows if code in existing]
+                )
+            self._writes += 1
+        return len(merged)
+
+    @staticmethod
+    def _existing_posted_at(conn: sqlite3.Connection, codes: List[str]) -> Dict[str, Optional[float]]:
+        """已保存的配色代码及其发布时间"""
+        found = {}
+        for start in range(0, len(codes), 500):
+            part = codes[start:start + 500]
+            found.update(conn.execute(
+                f"SELECT code, posted_at FROM palettes WHERE code IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return found
+
+    def _load_tags(self, conn: sqlite3.Connection, codes: List[str]) -> Dict[str, List[str]]:
+        tags: Dict[str, List[str]] = {code: [] for code in codes}
+        for start in range(0, len(codes), 500):
+            part = codes[start:start + 500]
+            rows = conn.execute(
+                f"SELECT code, tag FROM palette_tags WHERE code IN ({','.join('?' * len(part))}) ORDER BY tag",
+                part
+            )
+            for code, tag in rows:
+                tags[code].append(tag)
+        return tags
+
+    def _to_palettes(self, conn: sqlite3.Connection, rows: List[Tuple]) -> List[Palette]:
+        """将 (代码, 点赞数, 日期, 首次写入时间) 行转换为 Palette 对象"""
+        tags = self._load_tags(conn, [row[0] for row in rows])
+        return [
+            Palette(bytes.fromhex(code), likes=likes, date=date, tags=[t.title() for t in tags[code]], idx=i,
+                    kind=Palette.KIND_FEED, created=first_seen)
+            for i, (code, likes, date, first_seen) in enumerate(rows)
+        ]
+
+    def get(self, code: str) -> Optional[Palette]:
+        """按配色代码查询，不存在时返回None"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT code, likes, date, first_seen FROM palettes WHERE code = ?",
+                                (code.lower(),)).fetchall()
+            return self._to_palettes(conn, rows)[0] if rows else None
+
+    def contains(self, codes: Iterable[str], tag: Optional[str] = None) -> set:
+        """返回已保存的配色代码集合，指定标签时只包含该标签下的配色代码"""
+        codes = [code.lower() for code in codes]
+        if tag:
+            sql, prefix = "SELECT code FROM palette_tags WHERE tag = ? AND code IN ({})", (normalize_tag(tag),)
+        else:
+            sql, prefix = "SELECT code FROM palettes WHERE code IN ({})", ()
+        found = set()
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(codes), 500):
+                part = codes[start:start + 500]
+                rows = conn.execute(sql.format(','.join('?' * len(part))), prefix + tuple(part))
+                found.update(code for (code,) in rows)
+        return found
+
+    def query(self, tag: Optional[str] = None, order_by: str = ORDER_LIKES, limit: int = 20, offset: int = 0,
+              min_likes: int = 0) -> List[Palette]:
+        """
+        查询配色方案
+
+        Args:
+            tag: 标签，为None时查询所有配色方案
+            order_by: 排序方式，likes 按点赞数从高到低，date 按发布时间从新到旧
+            limit: 返回数量
+            offset: 跳过的数量
+            min_likes: 最少点赞数
+
+        Returns:
+            List[Palette]: 配色方案列表
+        """
+        if order_by not in ORDER_BY:
+            raise ValueError(f"不支持的排序方式: {order_by}，可选: {', '.join(ORDER_BY)}")
+
+        def order(alias: str) -> str:
+            if order_by == ORDER_LIKES:
+                return f"{alias}.likes DESC, {alias}.code"
+            # SQLite中NULL小于任何值，降序时没有发布时间的配色方案排在最后
+            return f"{alias}.posted_at DESC, {alias}.code"
+
+        with self._lock:
+            conn = self._connect()
+            if tag:
+                # 在标签表的 (tag, likes) / (tag, posted_at) 索引上完成过滤、排序和分页
+                # 没有点赞数条件时不加过滤，按日期排序才能使用 (tag, posted_at) 索引
+                likes_filter = " AND likes >= ?" if min_likes > 0 else ""
+                params = (normalize_tag(tag),) + ((min_likes,) if min_likes > 0 else ()) + (limit, offset)
+                rows = conn.execute(
+                    f"SELECT p.code, p.likes, p.date, p.first_seen FROM "
+                    f"(SELECT code, likes, posted_at FROM palette_tags AS t WHERE tag = ?{likes_filter} "
+                    f"ORDER BY {order('t')} LIMIT ? OFFSET ?) AS t "
+                    f"JOIN palettes AS p ON p.code = t.code ORDER BY {order('t')}",
+                    params
+                ).fetchall()
+            else:
+                likes_filter = " WHERE likes >= ?" if min_likes > 0 else ""
+                params = ((min_likes,) if min_likes > 0 else ()) + (limit, offset)
+                rows = conn.execute(
+                    f"SELECT code, likes, date, first_seen FROM palettes AS p{likes_filter} "
+                    f"ORDER BY {order('p')} LIMIT ? OFFSET ?",
+                    params
+                ).fetchall()
+            return self._to_palettes(conn, rows)
+
+    def count(self, tag: Optional[str] = None) -> int:
+        """配色方案数量，指定标签时为该标签下的数量"""
+        with self._lock:
+            conn = self._connect()
+            if tag:
+                return conn.execute("SELECT COUNT(*) FROM palette_tags WHERE tag = ?",
+                                    (normalize_tag(tag),)).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM palettes").fetchone()[0]
+
+    def tag_counts(self) -> List[Tuple[str, int]]:
+        """所有标签及其配色方案数量，按数量从多到少排列"""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT tag, COUNT(*) AS n FROM palette_tags GROUP BY tag ORDER BY n DESC, tag"
+            ).fetchall()
+
+    def revision(self) -> Tuple[int, int]:
+        """
+        数据版本，本连接或其他进程写入后改变，供内存中的索引判断是否需要重建
+
+        Returns:
+            Tuple[int, int]: (本实例的写入次数, SQLite的 data_version)
+        """
+        with self._lock:
+            return self._writes, self._connect().execute("PRAGMA data_version").fetchone()[0]
+
+    def tag_index_rows(self) -> Tuple[List[str], List[int], List[Tuple[str, str]]]:
+        """
+        建立标签索引所需的数据，两次查询在同一个读事务中执行，看到相同的快照
+
+        Returns:
+            Tuple[List[str], List[int], List[Tuple[str, str]]]: (按配色代码排列的配色代码, 对应的点赞数,
+            按标签和配色代码排列的 (标签, 配色代码) 对)
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                rows = conn.execute("SELECT code, likes FROM palettes ORDER BY code").fetchall()
+                pairs = conn.execute("SELECT tag, code FROM palette_tags ORDER BY tag, code").fetchall()
+            finally:
+                conn.commit()
+        return [code for code, _ in rows], [likes for _, likes in rows], pairs
+
+    def all_palettes(self) -> PaletteBatch:
+        """以 PaletteBatch 返回所有配色方案，供相似度和标签索引使用"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT code, likes, date, first_seen FROM palettes ORDER BY code").fetchall()
+            return PaletteBatch(self._to_palettes(conn, rows))
+
+    def sync_state(self, tag: Optional[str] = None) -> Optional[Dict]:
+        """
+        增量同步的进度
+
+        Args:
+            tag: 标签，为None时表示不限标签的最新列表
+
+        Returns:
+            Optional[Dict]: head_code（上次同步时最新的配色代码）、synced_at、runs、fetched、
+            resume_step（未完成的补抓从哪一页继续，没有时为None）和 backfill_until（补抓到哪个配色代码为止，
+            为None时补抓到feed末尾），未同步过时为None
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT head_code, synced_at, runs, fetched, resume_step, backfill_until FROM sync_state WHERE tag = ?",
+                (normalize_tag(tag or ''),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('head_code', 'synced_at', 'runs', 'fetched', 'resume_step', 'backfill_until'), row))
+
+    def save_sync_state(self, tag: Optional[str], head_code: Optional[str], fetched: int,
+                        resume_step: Optional[int] = None, backfill_until: Optional[str] = None) -> None:
+        """
+        记录一次增量同步
+
+        Args:
+            tag: 标签，为None时表示不限标签的最新列表
+            head_code: 本次同步看到的最新配色代码，为None时保留原值
+            fetched: 本次新写入的配色方案数量
+            resume_step: 未完成的补抓下次从哪一页继续，为None时表示没有需要补抓的配色方案
+            backfill_until: 补抓到哪个配色代码为止，为None时补抓到feed末尾
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO sync_state (tag, head_code, synced_at, runs, fetched, resume_step, backfill_until) "
+                    "VALUES (?, ?, ?, 1, ?, ?, ?) "
+                    "ON CONFLICT(tag) DO UPDATE SET head_code = COALESCE(excluded.head_code, head_code), "
+                    "synced_at = excluded.synced_at, runs = runs + 1, fetched = fetched + excluded.fetched, "
+                    "resume_step = excluded.resume_step, backfill_until = excluded.backfill_until",
+                    (normalize_tag(tag or ''), head_code and head_code.lower(), time.time(), fetched,
+                     resume_step, backfill_until and backfill_until.lower())
+                )
+
+    def close(self) -> None:
+        """关闭SQLite连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_repository: Optional[PaletteRepository] = None
+_default_repository_lock = threading.Lock()
+
+
+def get_palette_repository() -> PaletteRepository:
+    """获取进程内共享的默认配色方案库（首次调用时创建）"""
+    global _default_repository
+    if _default_repository is None:
+        with _default_repository_lock:
+            if _default_repository is None:
+                _default_repository = PaletteRepository()
+    return _default_repository
@@ -0,0 +1,271 @@
+"""
+配色方案相似度索引，在CIELAB空间中对本地配色方案库做批量最近邻搜索
+"""
+import os
+import sys
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.color_space import rgb_to_lab
+from services.color_tagger import parse_hex_colors
+from services.palette_repository import PaletteRepository, get_palette_repository
+from models.palette import Palette, PaletteBatch
+
+# 导入图片颜色提取
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools', 'generators'))
+try:
+    from color_palette_generator import PaletteImageGenerator
+    IMAGE_QUERY_SUPPORT = True
+except ImportError:
+    IMAGE_QUERY_SUPPORT = False
+
+logger = logging.getLogger(__name__)
+
+PALETTE_COLORS = 4                  # 每个配色方案的颜色数量
+
+# 相似度模式
+SIMILARITY_ORDERED = "ordered"      # 按颜色位置逐一比较，12维Lab向量的欧氏距离
+SIMILARITY_UNORDERED = "unordered"  # 与颜色顺序无关，取查询颜色所有排列中的最小距离
+SIMILARITY_MODES = (SIMILARITY_ORDERED, SIMILARITY_UNORDERED)
+
+SIMILARITY_CHUNK_ELEMENTS = 1 << 22  # 分块矩阵乘法每块结果的元素数量上限，限制临时数组的内存
+
+# 4种颜色的全部24种排列，每行为一种排列下各位置取查询颜色的序号
+_PERMUTATIONS = np.array([
+    (a, b, c, d)
+    for a in range(4) for b in range(4) for c in range(4) for d in range(4)
+    if len({a, b, c, d}) == 4
+])
+
+
+def palette_lab_vectors(rgb) -> np.ndarray:
+    """
+    将 (N, 4, 3) 的sRGB颜色数组转换为 (N, 12) 的float32 Lab向量
+
+    Args:
+        rgb: 最后两维为 (4, 3) 的颜色数组，取值0-255
+
+    Returns:
+        np.ndarray: Lab向量，每行依次为4种颜色的 (L, a, b)
+    """
+    rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, PALETTE_COLORS, 3)
+    return rgb_to_lab(rgb).reshape(len(rgb), PALETTE_COLORS * 3).astype(np.float32)
+
+
+def query_rgb(colors: Sequence[str]) -> np.ndarray:
+    """
+    将查询颜色转换为 (4, 3) 的颜色数组
+
+    Args:
+        colors: 颜色代码列表，如 ["#FF5733", "#33FF57"]，也可以是一个24位配色代码
+
+    Returns:
+        np.ndarray: 颜色数组，多于4种颜色时取前4种，少于4种时循环重复
+
+    Raises:
+        ValueError: 没有有效的颜色
+    """
+    if isinstance(colors, str):
+        rgb = Palette.pack_code(colors.strip().lstrip('#').lower())
+        if rgb is None:
+            raise ValueError(f"无效的配色代码: {colors}")
+        return np.frombuffer(rgb, dtype=np.uint8).reshape(PALETTE_COLORS, 3)
+    rgb = parse_hex_colors(colors)
+    if not len(rgb):
+        raise ValueError("没有有效的查询颜色")
+    return rgb[np.arange(PALETTE_COLORS) % len(rgb)]
+
+
+class PaletteSimilarityIndex:
+    """
+    配色方案相似度索引
+
+    每个配色方案保存为12维Lab向量，距离的平方展开为 |x|² - 2x·q + |q|²，
+    查询时分块计算一次矩阵乘法并用 argpartition 取前k个，不需要逐个比较。
+    与颜色顺序无关的模式将查询颜色的24种排列作为24个查询向量，取最大的内积。
+    """
+
+    def __init__(self, codes: List[str], rgb, likes=None):
+        """
+        初始化索引
+
+        Args:
+            codes: 配色代码列表
+            rgb: (N, 4, 3) 颜色数组
+            likes: 点赞数数组，距离相同时点赞数多的排在前面
+        """
+        self.codes = list(codes)
+        self._positions = {code: i for i, code in enumerate(self.codes)}
+        self.vectors = palette_lab_vectors(rgb)
+        self.norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self.likes = np.zeros(len(self.codes), dtype=np.int64) if likes is None else np.asarray(likes)
+
+    @classmethod
+    def from_batch(cls, batch: PaletteBatch) -> "PaletteSimilarityIndex":
+        """由 PaletteBatch 建立索引"""
+        return cls(batch.codes(), batch.rgb_array(), batch.likes_array())
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def position(self, code: str) -> Optional[int]:
+        """配色代码在索引中的序号，不存在时为None"""
+        return self._positions.get(code.lower())
+
+    def search_batch(self, queries, k: int = 10, mode: str = SIMILARITY_ORDERED) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量查询最相似的配色方案
+
+        Args:
+            queries: (M, 4, 3) 查询颜色数组
+            k: 每个查询返回的数量，小于0时按0处理
+            mode: 相似度模式，见 SIMILARITY_MODES
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (M, k) 的序号和 (M, k) 的距离（每种颜色的均方根ΔE），按距离从小到大排列
+        """
+        if mode not in SIMILARITY_MODES:
+            raise ValueError(f"不支持的相似度模式: {mode}，可选: {', '.join(SIMILARITY_MODES)}")
+        queries = palette_lab_vectors(queries)
+        k = max(0, min(k, len(self)))
+        if not k:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+        if mode == SIMILARITY_UNORDERED:
+            # (M, 24, 12)：每个查询的24种颜色排列
+            permuted = queries.reshape(-1, PALETTE_COLORS, 3)[:, _PERMUTATIONS].reshape(len(queries), -1, 12)
+        else:
+            permuted = queries[:, None, :]
+        variants = permuted.shape[1]
+        flat = permuted.reshape(-1, 12)
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+
+        best_index = np.empty((len(queries), 0), dtype=np.int64)
+        best_dist = np.empty((len(queries), 0), dtype=np.float32)
+        chunk_rows = max(1024, SIMILARITY_CHUNK_ELEMENTS // len(flat))
+        for start in range(0, len(self), chunk_rows):
+            vectors = self.vectors[start:start + chunk_rows]
+            # (M, rows)：各排列中最大的内积对应最小的距离
+            dots = (flat @ vectors.T).reshape(len(queries), variants, -1).max(axis=1)
+            dist = self.norms[start:start + len(vectors)] - 2 * dots + query_norms[:, None]
+            top = min(k, dist.shape[1])
+            part = np.argpartition(dist, top - 1, axis=1)[:, :top]
+            best_index = np.concatenate([best_index, part + start], axis=1)
+            best_dist = np.concatenate([best_dist, np.take_along_axis(dist, part, axis=1)], axis=1)
+            if best_index.shape[1] > k:
+                keep = np.argpartition(best_dist, k - 1, axis=1)[:, :k]
+                best_index = np.take_along_axis(best_index, keep, axis=1)
+                best_dist = np.take_along_axis(best_dist, keep, axis=1)
+
+        # 距离从小到大，相同时点赞数多的在前
+        order = np.lexsort((-self.likes[best_index], best_dist), axis=1)
+        best_index = np.take_along_axis(best_index, order, axis=1)
+        best_dist = np.take_along_axis(best_dist, order, axis=1)
+        return best_index, np.sqrt(np.maximum(best_dist, 0) / PALETTE_COLORS)
+
+    def search(self, colors, k: int = 10, mode: str = SIMILARITY_ORDERED,
+               exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        查询与一组颜色最相似的配色方案
+
+        Args:
+            colors: 颜色代码列表或24位配色代码，见 query_rgb
+            k: 返回的数量，小于0时按0处理
+            mode: 相似度模式，见 SIMILARITY_MODES
+            exclude: 不出现在结果中的配色代码，通常为查询的配色方案本身
+
+        Returns:
+            List[Tuple[str, float]]: (配色代码, 距离) 列表，按距离从小到大排列
+        """
+        k = max(0, k)
+        extra = 1 if exclude and self.position(exclude) is not None else 0
+        index, dist = self.search_batch(query_rgb(colors)[None], k + extra, mode)
+        results = [(self.codes[i], float(d)) for i, d in zip(index[0], dist[0]) if self.codes[i] != exclude]
+        return results[:k]
+
+
+_index_cache: Dict[str, Tuple[Tuple[int, int], PaletteSimilarityIndex]] = {}
+_index_lock = threading.Lock()
+
+
+def get_similarity_index(repository: Optional[PaletteRepository] = None) -> PaletteSimilarityIndex:
+    """
+    获取配色方案库的相似度索引，配色方案库写入后下次获取时重建
+
+    Args:
+        repository: 配色方案库，为None时使用进程内共享的默认库
+
+    Returns:
+        PaletteSimilarityIndex: 相似度索引
+    """
+    repository = repository or get_palette_repository()
+    with _index_lock:
+        revision = repository.revision()
+        cached = _index_cache.get(repository.db_path)
+        if cached is None or cached[0] != revision:
+            index = PaletteSimilarityIndex.from_batch(repository.all_palettes())
+            logger.info(f"已建立相似度索引，共 {len(index)} 个配色方案")
+            cached = _index_cache[repository.db_path] = (revision, index)
+        return cached[1]
+
+
+def find_similar_palettes(code: str = "", image_path: str = "", colors: Optional[List[str]] = None,
+                          k: int = 10, mode: str = SIMILARITY_UNORDERED,
+                          repository: Optional[PaletteRepository] = None
+                          ) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
+    """
+    在本地配色方案库中查找相似的配色方案
+
+    查询颜色依次取自 code、image_path、colors 中第一个非空的参数。
+
+    Args:
+        code: 24位配色代码
+        image_path: 图片路径，从图片中提取4种主要颜色
+        colors: 颜色代码列表
+        k: 返回的数量
+        mode: 相似度模式，见 SIMILARITY_MODES
+        repository: 配色方案库，为None时使用进程内共享的默认库
+
+    Returns:
+        Tuple[bool, Optional[str], Optional[List[Dict]]]: (是否成功, 错误信息, 配色方案数据列表)
+        配色方案数据中的 distance 为每种颜色的均方根ΔE
+    """
+    repository = repository or get_palette_repository()
+    try:
+        if code:
+            query = code.strip().lstrip('#').lower()
+        elif image_path:
+            if not IMAGE_QUERY_SUPPORT:
+                return False, "无法导入 PaletteImageGenerator，不能从图片提取颜色", None
+            if not os.path.exists(image_path):
+                return False, f"图片不存在: {image_path}", None
+            query = PaletteImageGenerator.extract_colors_from_image(image_path, PALETTE_COLORS)
+        elif colors:
+            query = colors
+        else:
+            return False, "需要提供配色代码、图片路径或颜色列表", None
+
+        index = get_similarity_index(repository)
+        if not len(index):
+            return False, "本地配色方案库为空，请先同步或保存配色方案", None
+        matches = index.search(query, k, mode, exclude=query if isinstance(query, str) else None)
+
+        results = []
+        for match_code, distance in matches:
+            palette = repository.get(match_code)
+            if palette is None:
+                continue
+            data = palette.to_dict()
+            data['distance'] = round(distance, 2)
+            results.append(data)
+        return True, None, results
+
+    except ValueError as e:
+        return False, str(e), None
+    except Exception as e:
+        error_msg = f"查找相似配色方案时出错: {str(e)}"
+        logger.exception(error_msg)
+        return False, error_msg, None
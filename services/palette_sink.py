@@ -0,0 +1,254 @@
+"""
+配色方案输出目标，将下载或提取的配色方案写入逐个JSON文件、JSONL、gzip压缩的JSONL或SQLite数据库
+"""
+import os
+import gzip
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 输出格式
+SINK_JSON = "json"               # 每个配色方案一个JSON文件（原有格式）
+SINK_JSONL = "jsonl"             # 所有配色方案追加到一个JSONL文件
+SINK_JSONL_GZ = "jsonl.gz"       # gzip压缩的JSONL文件
+SINK_SQLITE = "sqlite"           # 单个SQLite数据库文件
+SINK_TYPES = (SINK_JSON, SINK_JSONL, SINK_JSONL_GZ, SINK_SQLITE)
+
+# 合并输出格式的默认文件名，保存在输出目录中
+SINK_FILE_NAMES = {
+    SINK_JSONL: "palettes.jsonl",
+    SINK_JSONL_GZ: "palettes.jsonl.gz",
+    SINK_SQLITE: "palettes.sqlite3",
+}
+
+SINK_BUFFER_SIZE = 256           # 合并输出格式缓冲的记录数，达到后一次性写入
+
+
+def palette_key(palette: Dict) -> str:
+    """配色方案的唯一键：优先使用配色代码 palette_id，没有时使用 id"""
+    return str(palette.get('palette_id') or palette.get('id') or 'unknown')
+
+
+class PaletteSink(ABC):
+    """
+    配色方案输出目标基类
+
+    write 将记录放入缓冲区，缓冲的记录数达到 buffer_size 时由子类的 _write_batch
+    一次性写入。可以在多个线程中同时调用 write；用作上下文管理器时退出时自动关闭。
+    """
+
+    def __init__(self, path: str, buffer_size: int = SINK_BUFFER_SIZE):
+        """
+        初始化输出目标
+
+        Args:
+            path: 输出文件或目录路径
+            buffer_size: 缓冲的记录数，为1时每条记录立即写入
+        """
+        self.path = path
+        self.buffer_size = max(1, buffer_size)
+        self.count = 0
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, palette: Dict) -> None:
+        """写入一个配色方案"""
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"输出目标已关闭: {self.path}")
+            self._buffer.append(palette)
+            self.count += 1
+            if len(self._buffer) >= self.buffer_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """立即写入缓冲区中的记录"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        # 写入成功后才清空缓冲区，写入失败时记录保留，之后可以重试
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._buffer = []
+
+    @abstractmethod
+    def _write_batch(self, palettes: List[Dict]) -> None:
+        """一次性写入一批记录，调用时已持有锁"""
+        pass
+
+    def _release(self) -> None:
+        """关闭时释放文件或连接"""
+
+    def close(self) -> None:
+        """写入剩余的记录并关闭，重复调用无效"""
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self._closed = True
+                self._release()
+
+    def __enter__(self) -> "PaletteSink":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class JsonFileSink(PaletteSink):
+    """每个配色方案写入一个缩进格式的JSON文件"""
+
+    def __init__(self, output_dir: str, file_pattern: str = "palette_{key}.json", buffer_size: int = 1):
+        """
+        初始化输出目标
+
+        Args:
+            output_dir: 输出目录
+            file_pattern: 文件名模板，{key} 替换为 palette_key 的结果
+            buffer_size: 缓冲的记录数，默认每条记录立即写入
+        """
+        super().__init__(output_dir, buffer_size)
+        self.file_pattern = file_pattern
+        os.makedirs(output_dir, exist_ok=True)
+
+    def file_path(self, palette: Dict) -> str:
+        """配色方案对应的JSON文件路径"""
+        return os.path.join(self.path, self.file_pattern.format(key=palette_key(palette)))
+
+    def _write_batch(self, palettes: List[Dict]) -> None:
+        for palette in palettes:
+            with open(self.file_path(palette), 'w', encoding='utf-8') as f:
+                json.dump(palette, f, indent=2, ensure_ascii=False)
+
+
+class JsonlSink(PaletteSink):
+    """所有配色方案追加到一个JSONL文件，每批记录一次写入"""
+
+    def __init__(self, path: str, buffer_size: int = SINK_BUFFER_SIZE):
+        super().__init__(path, buffer_size)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = self._open()
+
+    def _open(self):
+        return open(self.path, 'a', encoding='utf-8')
+
+    def _write_batch(self, palettes: List[Dict]) -> None:
+        self._file.write("".join(json.dumps(palette, ensure_ascii=False) + "\n" for palette in palettes))
+        self._file.flush()
+
+    def _release(self) -> None:
+        self._file.close()
+
+
+class GzipJsonlSink(JsonlSink):
+    """gzip压缩的JSONL文件，追加写入时生成多段gzip数据，gzip.open 可以连续读取"""
+
+    def _open(self):
+        return gzip.open(self.path, 'at', encoding='utf-8')
+
+
+class SqliteSink(PaletteSink):
+    """所有配色方案写入一个SQLite数据库，相同键的记录被替换，每批记录一个事务"""
+
+    def __init__(self, path: str, buffer_size: int = SINK_BUFFER_SIZE):
+        super().__init__(path, buffer_size)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS palettes (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def _write_batch(self, palettes: List[Dict]) -> None:
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO palettes (key, data, saved_at) VALUES (?, ?, ?)",
+                [(palette_key(palette), json.dumps(palette, ensure_ascii=False), now) for palette in palettes]
+            )
+
+    def _release(self) -> None:
+        self._conn.close()
+
+
+def open_palette_sink(sink_type: str, output_dir: str, buffer_size: Optional[int] = None,
+                      file_pattern: str = "palette_{key}.json") -> PaletteSink:
+    """
+    创建输出目标
+
+    Args:
+        sink_type: 输出格式，见 SINK_TYPES
+        output_dir: 输出目录，合并输出格式的文件名见 SINK_FILE_NAMES
+        buffer_size: 缓冲的记录数，为None时使用各格式的默认值
+        file_pattern: 逐个JSON文件格式的文件名模板
+
+    Returns:
+        PaletteSink: 输出目标
+    """
+    kwargs = {} if buffer_size is None else {"buffer_size": buffer_size}
+    if sink_type == SINK_JSON:
+        return JsonFileSink(output_dir, file_pattern, **kwargs)
+    if sink_type not in SINK_FILE_NAMES:
+        raise ValueError(f"不支持的输出格式: {sink_type}，可选: {', '.join(SINK_TYPES)}")
+    path = os.path.join(output_dir, SINK_FILE_NAMES[sink_type])
+    if sink_type == SINK_JSONL:
+        return JsonlSink(path, **kwargs)
+    if sink_type == SINK_JSONL_GZ:
+        return GzipJsonlSink(path, **kwargs)
+    return SqliteSink(path, **kwargs)
+
+
+def read_palettes(path: str) -> Iterator[Dict]:
+    """
+    读取任意输出格式保存的配色方案
+
+    Args:
+        path: JSON文件目录、.jsonl / .jsonl.gz 文件或SQLite数据库文件
+
+    Yields:
+        Dict: 配色方案数据，JSONL中无法解析的行被跳过
+    """
+    if os.path.isdir(path):
+        for file_name in sorted(os.listdir(path)):
+            if file_name.endswith('.json'):
+                try:
+                    with open(os.path.join(path, file_name), 'r', encoding='utf-8') as f:
+                        yield json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取 {file_name} 失败: {e}")
+        return
+
+    if path.endswith(('.sqlite3', '.sqlite', '.db')):
+        conn = sqlite3.connect(path)
+        try:
+            for (data,) in conn.execute("SELECT data FROM palettes ORDER BY rowid"):
+                yield json.loads(data)
+        finally:
+            conn.close()
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"跳过无法解析的行: {line[:80]}")
@@ -0,0 +1,187 @@
+"""
+本地配色方案库的增量同步，按发布时间从新到旧翻页，遇到已保存的配色方案即停止
+"""
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from services.http_client import HttpClient, get_live_http_client
+from services.web_service import WebService, FeedRequestError
+from services.palette_repository import PaletteRepository, get_palette_repository
+from models.palette import PaletteBatch
+
+logger = logging.getLogger(__name__)
+
+SYNC_TIMEOUT = 15              # 单页请求的超时时间（秒）
+
+# 同步停止的原因
+SYNC_STOP_KNOWN = "known"          # 遇到已保存的配色方案，之后的都已同步过
+SYNC_STOP_END = "end"              # feed没有更多数据
+SYNC_STOP_MAX_PAGES = "max_pages"  # 达到页数上限
+
+
+def _walk_pages(tag: str, repository: PaletteRepository, batch: PaletteBatch, start_step: int,
+                max_pages: Optional[int], stop_at_known: bool, stop_code: Optional[str],
+                http_client: Optional[HttpClient], refresh: bool = False) -> Tuple[int, str, Optional[str]]:
+    """
+    从 start_step 开始翻页，新的配色方案追加到 batch
+
+    Args:
+        tag: 标签名称，空字符串表示不限标签的最新列表
+        repository: 配色方案库
+        batch: 收集新配色方案的 PaletteBatch
+        start_step: 起始页
+        max_pages: 最多请求的页数，为None时不限制
+        stop_at_known: 为True时遇到该标签下已保存的配色方案即停止，否则跳过已保存的配色方案
+        stop_code: 遇到该配色代码即停止
+        http_client: HTTP客户端
+        refresh: 为True时已保存的配色方案同样追加到 batch，用于刷新点赞数
+
+    Returns:
+        Tuple[int, str, Optional[str]]: (请求的页数, 停止原因, 看到的第一个配色代码)
+    """
+    post_data = {'step': start_step, 'sort': 'new', 'tags': tag.lower(), 'timeframe': ''}
+    referer = f'https://colorhunt.co/palettes/{tag.lower()}' if tag else None
+    pages = 0
+    first_code = None
+    previous_codes = set()
+    while True:
+        if max_pages is not None and pages >= max_pages:
+            return pages, SYNC_STOP_MAX_PAGES, first_code
+        page = WebService.fetch_feed_page(dict(post_data, step=start_step + pages), referer, SYNC_TIMEOUT,
+                                          http_client)
+        pages += 1
+
+        # 翻页期间有新配色发布会使分页整体后移，跳过与上一页重复的记录
+        items = [(str(item['code']).lower(), item) for item in page
+                 if item.get('code') and str(item['code']).lower() not in previous_codes]
+        if not items:
+            return pages, SYNC_STOP_END, first_code
+        first_code = first_code or items[0][0]
+
+        known = set() if refresh else repository.contains([code for code, _ in items], tag or None)
+        for code, item in items:
+            if code == stop_code or (stop_at_known and code in known):
+                return pages, SYNC_STOP_KNOWN, first_code
+            if code in known:
+                continue
+            palette = WebService.tag_item_to_palette(tag, item, len(batch))
+            if palette:
+                batch.append(palette)
+        previous_codes = {code for code, _ in items}
+
+
+def sync_tag(tag: Optional[str] = None, repository: Optional[PaletteRepository] = None,
+             max_pages: Optional[int] = None, full: bool = False,
+             http_client: Optional[HttpClient] = None) -> Dict:
+    """
+    增量同步一个标签的配色方案
+
+    从第0页开始按 sort=new 翻页，每页用一次查询判断哪些配色代码已保存在该标签下，
+    遇到第一个已保存的配色代码（或上次同步记录的最新代码）即停止，新配色方案在
+    最后一次性写入。已保存过的标签每次同步通常只需请求一页。
+
+    翻页被 max_pages 截断时，记录下一页的位置和需要补抓到的配色代码（上次同步的
+    最新代码，首次同步时为feed末尾）。之后的同步先抓取新发布的配色方案，剩余的页数
+    用于从记录的位置继续补抓，跳过已保存的配色方案，直到补齐为止。新发布的配色方案
+    只会使分页后移，从原来的页继续不会漏掉配色方案。
+
+    Args:
+        tag: 标签名称，为None或空字符串时同步不限标签的最新列表
+        repository: 配色方案库，为None时使用进程内共享的默认库
+        max_pages: 最多请求的页数，为None时不限制
+        full: 为True时不在已保存的配色方案处停止，遍历所有分页并刷新点赞数
+        http_client: HTTP客户端，为None时使用注入的 WebService.http_client 或不缓存feed响应的共享客户端
+
+    Returns:
+        Dict: tag、pages（请求的页数）、fetched（写入的配色方案数量）、stopped（停止原因）、
+        head（最新的配色代码）、pending（是否还有需要补抓的配色方案）
+
+    Raises:
+        FeedRequestError: 接口返回非200状态码
+        json.JSONDecodeError: 响应不是合法的JSON
+    """
+    repository = repository or get_palette_repository()
+    # feed缓存中的分页可能来自不同时刻，混用会使分页偏移的假设失效，同步始终请求实时数据
+    http_client = http_client or WebService.http_client or get_live_http_client()
+    tag = (tag or '').strip()
+    state = repository.sync_state(tag) or {}
+    last_head = state.get('head_code')
+    resume_step = state.get('resume_step')
+    backfill_until = state.get('backfill_until')
+
+    batch = PaletteBatch()
+    if full:
+        pages, stopped, head = _walk_pages(tag, repository, batch, 0, max_pages, False, None, http_client,
+                                           refresh=True)
+        # 遍历到末尾时之前截断留下的缺口也已补齐
+        if stopped == SYNC_STOP_END:
+            resume_step = backfill_until = None
+    else:
+        pages, stopped, head = _walk_pages(tag, repository, batch, 0, max_pages, True, last_head, http_client)
+        if stopped == SYNC_STOP_MAX_PAGES:
+            # 本次截断处与上次同步的最新配色方案之间留下缺口，已有缺口时从这里重新补抓到原来的终点
+            if resume_step is None:
+                backfill_until = last_head
+            resume_step = pages
+        elif resume_step is not None:
+            remaining = None if max_pages is None else max_pages - pages
+            if remaining is None or remaining > 0:
+                backfill_pages, backfill_stopped, _ = _walk_pages(
+                    tag, repository, batch, resume_step, remaining, False, backfill_until, http_client
+                )
+                pages += backfill_pages
+                if backfill_stopped == SYNC_STOP_MAX_PAGES:
+                    resume_step += backfill_pages
+                    stopped = SYNC_STOP_MAX_PAGES
+                else:
+                    resume_step = backfill_until = None
+
+    fetched = repository.upsert(batch, tag=tag or None) if len(batch) else 0
+    repository.save_sync_state(tag, head, fetched, resume_step, backfill_until)
+    logger.info(f"同步 {tag or '最新列表'}: 请求 {pages} 页，写入 {fetched} 个配色方案，停止原因: {stopped}")
+    return {'tag': tag, 'pages': pages, 'fetched': fetched, 'stopped': stopped, 'head': head or last_head,
+            'pending': resume_step is not None}
+
+
+def sync_tags(tags: Iterable[Optional[str]], repository: Optional[PaletteRepository] = None,
+              max_pages: Optional[int] = None,
+              full: bool = False) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
+    """
+    依次增量同步多个标签，单个标签失败不影响其他标签
+
+    Args:
+        tags: 标签列表，空字符串表示不限标签的最新列表
+        repository: 配色方案库，为None时使用进程内共享的默认库
+        max_pages: 每个标签最多请求的页数，为None时不限制
+        full: 为True时遍历所有分页，见 sync_tag
+
+    Returns:
+        Tuple[bool, Optional[str], Optional[List[Dict]]]: (是否成功, 错误信息, 每个标签的同步结果)
+        失败的标签结果中包含 error 字段；所有标签都失败时返回失败
+    """
+    repository = repository or get_palette_repository()
+    results = []
+    for tag in tags:
+        try:
+            results.append(sync_tag(tag, repository, max_pages, full))
+            continue
+        except FeedRequestError as e:
+            error = f"API请求失败，状态码: {e.status_code}"
+        except json.JSONDecodeError as e:
+            error = f"解析API响应失败: {e}"
+        except requests.RequestException as e:
+            error = f"网络错误: {e}"
+        except Exception as e:
+            logger.exception(f"同步 {tag or '最新列表'} 时出错")
+            error = f"同步时出错: {str(e)}"
+        logger.warning(f"同步 {tag or '最新列表'} 失败: {error}")
+        results.append({'tag': (tag or '').strip(), 'error': error})
+
+    if not results:
+        return False, "没有需要同步的标签", None
+    if all('error' in result for result in results):
+        return False, results[0]['error'], results
+    return True, None, results
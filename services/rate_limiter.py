@@ -0,0 +1,242 @@
+"""
+请求限流器，令牌桶限制请求速率，AIMD算法根据服务器响应自适应调整并发数
+"""
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 并发已满时的轮询间隔（秒），仅异步等待使用
+_POLL_INTERVAL = 0.05
+
+
+class RateSlot:
+    """一次请求占用的限流名额，由调用方填写响应结果"""
+
+    __slots__ = ('status_code', 'retry_after', 'error')
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[str] = None
+        self.error = False
+
+
+class RateLimiter:
+    """
+    令牌桶 + AIMD 自适应并发限流器
+
+    每个请求先取得一个令牌（平均速率 rate，允许 burst 个突发请求），再占用一个并发名额。
+    收到429、5xx或请求超时等错误时并发上限乘以 decrease_factor（每个 decrease_interval
+    最多下调一次）；连续一轮（当前上限个数）请求都成功且延迟不超过 latency_target 时
+    并发上限加1。
+    """
+
+    def __init__(self, rate: float = 8.0, burst: int = 8, initial_concurrency: int = 4,
+                 min_concurrency: int = 1, max_concurrency: int = 16, latency_target: float = 2.0,
+                 decrease_factor: float = 0.5, decrease_interval: float = 1.0):
+        """
+        初始化限流器
+
+        Args:
+            rate: 每秒允许发出的请求数
+            burst: 令牌桶容量，即允许的突发请求数
+            initial_concurrency: 初始并发上限
+            min_concurrency: 并发上限的下限
+            max_concurrency: 并发上限的上限
+            latency_target: 健康请求的最大延迟（秒），超过时不再提升并发
+            decrease_factor: 出错时并发上限的乘数
+            decrease_interval: 两次下调之间的最小间隔（秒），避免同一轮错误重复下调
+        """
+        self.rate = max(rate, 0.001)
+        self.burst = max(1, burst)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self._in_flight = 0
+        self._healthy_streak = 0
+        self._last_decrease = float('-inf')
+        self._blocked_until = 0.0
+        self._latency_ewma: Optional[float] = None
+        self._stats = {'requests': 0, 'errors': 0, 'throttled': 0,
+                       'increases': 0, 'decreases': 0, 'wait_time': 0.0}
+
+    @property
+    def concurrency_limit(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _try_acquire(self) -> Optional[float]:
+        """
+        尝试取得令牌和并发名额（调用方持有锁）
+
+        Returns:
+            Optional[float]: 成功时为0；令牌不足或处于429冷却期时为需要等待的秒数；
+                             并发已满时为None，需等待其他请求结束
+        """
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._in_flight >= int(self._limit):
+            return None
+        self._refill(now)
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        self._tokens -= 1
+        self._in_flight += 1
+        return 0
+
+    def acquire(self) -> None:
+        """阻塞直到取得令牌和并发名额"""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    break
+                self._cond.wait(wait)
+            self._stats['wait_time'] += time.monotonic() - start
+
+    async def acquire_async(self) -> None:
+        """异步等待直到取得令牌和并发名额，不阻塞事件循环"""
+        start = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._try_acquire()
+                if wait == 0:
+                    self._stats['wait_time'] += time.monotonic() - start
+                    return
+            await asyncio.sleep(_POLL_INTERVAL if wait is None else wait)
+
+    def release(self, slot: RateSlot, latency: float) -> None:
+        """归还并发名额并记录请求结果"""
+        with self._cond:
+            self._in_flight -= 1
+            self._record(slot.status_code, latency, slot.error, slot.retry_after)
+            self._cond.notify_all()
+
+    def record(self, status_code: Optional[int] = None, latency: Optional[float] = None,
+               error: bool = False, retry_after: Optional[str] = None) -> None:
+        """
+        记录一次不占用名额的请求结果，如底层自动重试过程中的失败响应
+
+        Args:
+            status_code: HTTP状态码
+            latency: 请求耗时（秒）
+            error: 是否为超时、连接错误等异常
+            retry_after: 响应的Retry-After头
+        """
+        with self._cond:
+            self._record(status_code, latency, error, retry_after)
+            self._cond.notify_all()
+
+    def _record(self, status_code: Optional[int], latency: Optional[float], error: bool,
+                retry_after: Optional[str]) -> None:
+        """根据请求结果调整并发上限（调用方持有锁）"""
+        now = time.monotonic()
+        self._stats['requests'] += 1
+        if latency is not None:
+            self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+
+        if status_code == 429:
+            self._stats['throttled'] += 1
+            try:
+                self._blocked_until = max(self._blocked_until, now + float(retry_after))
+            except (TypeError, ValueError):
+                pass
+
+        if error or status_code == 429 or (status_code is not None and status_code >= 500):
+            if status_code != 429:
+                self._stats['errors'] += 1
+            self._healthy_streak = 0
+            if now - self._last_decrease >= self.decrease_interval:
+                self._limit = max(self.min_concurrency, self._limit * self.decrease_factor)
+                self._last_decrease = now
+                self._stats['decreases'] += 1
+                logger.info(f"请求受限或出错 (状态码: {status_code})，并发上限降为 {int(self._limit)}")
+            return
+
+        if latency is not None and latency > self.latency_target:
+            self._healthy_streak = 0
+            return
+
+        self._healthy_streak += 1
+        if self._healthy_streak >= int(self._limit) and self._limit < self.max_concurrency:
+            self._limit = min(self.max_concurrency, self._limit + 1)
+            self._healthy_streak = 0
+            self._stats['increases'] += 1
+
+    @contextmanager
+    def slot(self):
+        """
+        占用一个请求名额，退出时根据调用方填写的结果调整并发
+
+        Yields:
+            RateSlot: 请求结果，调用方应设置 status_code 和 retry_after；抛出异常时自动记为错误
+        """
+        self.acquire()
+        slot = RateSlot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception:
+            slot.error = True
+            raise
+        finally:
+            self.release(slot, time.monotonic() - start)
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """slot 的异步版本"""
+        await self.acquire_async()
+        slot = RateSlot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception:
+            slot.error = True
+            raise
+        finally:
+            self.release(slot, time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        """获取限流器当前状态和累计统计"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return dict(
+                self._stats,
+                rate=self.rate,
+                tokens=round(self._tokens, 2),
+                concurrency_limit=int(self._limit),
+                in_flight=self._in_flight,
+                latency_ewma=self._latency_ewma,
+                blocked_for=max(0.0, self._blocked_until - time.monotonic()),
+            )
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的colorhunt.co限流器（首次调用时创建）"""
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_limiter_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter()
+    return _default_limiter
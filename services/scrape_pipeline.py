@@ -0,0 +1,358 @@
+"""
+调色板页面批量抓取流水线，网络请求和HTML解析分为两个阶段并行执行；
+以及GUI下载器使用的获取、保存两阶段下载流水线
+"""
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from services.http_client import HttpClient
+from services.web_service import WebService, TAG_FETCH_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# 阶段之间队列的默认容量
+PIPELINE_QUEUE_SIZE = 32
+
+# 下载流水线的默认并发数
+DOWNLOAD_FETCH_WORKERS = 8     # 获取配色方案数据的线程数，实际请求并发由HTTP客户端的限流器决定
+DOWNLOAD_SAVE_WORKERS = 4      # 写入JSON和生成图片的线程数
+DOWNLOAD_PENDING_PER_WORKER = 2
+
+# 解析进程的启动方式：调用方进程中已有HTTP连接池、限流器等线程，直接fork不安全，
+# 由干净的forkserver进程创建解析进程，不支持时使用spawn
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# 队列结束标记
+_DONE = object()
+
+_parse_context = None
+_parse_context_lock = threading.Lock()
+
+
+def _parse_page(url: str, content: bytes, encoding: Optional[str], idx: int, status_code: int) -> Optional[Dict]:
+    """在解析进程中解码页面并提取调色板数据"""
+    html = content.decode(encoding or 'utf-8', errors='replace')
+    return WebService.parse_palette_page(url, html, idx, status_code)
+
+
+def get_parse_context():
+    """获取创建解析进程的多进程上下文（首次调用时创建），forkserver预先导入本模块，解析进程无需重复导入"""
+    global _parse_context
+    if _parse_context is None:
+        with _parse_context_lock:
+            if _parse_context is None:
+                context = multiprocessing.get_context(PARSE_START_METHOD)
+                if PARSE_START_METHOD == "forkserver":
+                    context.set_forkserver_preload([__name__])
+                _parse_context = context
+    return _parse_context
+
+
+class ScrapePipeline:
+    """
+    两阶段抓取流水线
+
+    抓取阶段由线程池请求页面原始字节，放入有界队列；解析阶段由进程池执行
+    HTML提取，绕开GIL使用全部CPU核心。队列满时抓取线程阻塞等待，解析跟不上时
+    网络请求自动放缓，内存占用不随URL数量增长。
+    """
+
+    def __init__(self, fetch_workers: int = TAG_FETCH_WORKERS, parse_workers: Optional[int] = None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, timeout: float = 10,
+                 http_client: Optional[HttpClient] = None):
+        """
+        初始化流水线
+
+        Args:
+            fetch_workers: 抓取线程数
+            parse_workers: 解析进程数，为None时使用CPU核心数
+            queue_size: 抓取结果队列和待返回解析任务的最大数量
+            timeout: 单个页面请求的超时时间（秒）
+            http_client: HTTP客户端，为None时使用 WebService 的共享客户端
+        """
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size)
+        self.timeout = timeout
+        self.http_client = http_client
+        self._stats_lock = threading.Lock()
+        self._stats = {'fetched': 0, 'fetch_failed': 0, 'parsed': 0, 'parse_failed': 0}
+
+    def stats(self) -> Dict[str, int]:
+        """获取抓取和解析计数"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _fetch(self, url: str) -> Optional[Tuple[int, bytes, Optional[str]]]:
+        """请求页面原始字节，失败时返回None"""
+        client = self.http_client or WebService.get_http_client()
+        try:
+            response = client.get_page(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"请求 {url} 网络错误: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"请求 {url} 时出错: {e}")
+            return None
+        if response.status_code != 200:
+            logger.warning(f"请求 {url} 失败, 状态码: {response.status_code}")
+            return None
+        return response.status_code, response.content, response.encoding
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        """向有界队列放入数据，流水线停止时放弃并返回False"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self, urls: Iterable[str]) -> Iterator[Dict]:
+        """
+        抓取并解析页面，按解析完成顺序逐个产出调色板数据
+
+        调用方提前停止迭代时，流水线会停止抓取剩余的URL并释放线程和进程。
+
+        Args:
+            urls: 调色板URL序列，可以是惰性生成器
+
+        Yields:
+            Dict: 调色板数据，格式与 WebService.parse_palette_page 相同
+        """
+        url_iter = enumerate(urls)
+        url_lock = threading.Lock()
+        raw_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        result_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def fetch_loop():
+            while not stop.is_set():
+                with url_lock:
+                    item = next(url_iter, None)
+                if item is None:
+                    return
+                idx, url = item
+                page = self._fetch(url)
+                if page is None:
+                    self._count('fetch_failed')
+                    continue
+                self._count('fetched')
+                if not self._put(raw_queue, (url, page[1], page[2], idx, page[0]), stop):
+                    return
+
+        def close_fetch_stage(fetchers):
+            for fetcher in fetchers:
+                fetcher.join()
+            self._put(raw_queue, _DONE, stop)
+
+        def dispatch_loop(pool):
+            while not stop.is_set():
+                try:
+                    item = raw_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                if not self._put(result_queue, pool.submit(_parse_page, *item), stop):
+                    return
+            self._put(result_queue, _DONE, stop)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.parse_workers,
+                                                    mp_context=get_parse_context()) as pool:
+            fetchers = [threading.Thread(target=fetch_loop, name=f"pipeline-fetch-{i}", daemon=True)
+                        for i in range(self.fetch_workers)]
+            threads = fetchers + [
+                threading.Thread(target=close_fetch_stage, args=(fetchers,), name="pipeline-close", daemon=True),
+                threading.Thread(target=dispatch_loop, args=(pool,), name="pipeline-dispatch", daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+
+            try:
+                while True:
+                    future = result_queue.get()
+                    if future is _DONE:
+                        break
+                    try:
+                        palette = future.result()
+                    except Exception as e:
+                        logger.warning(f"解析进程出错: {e}")
+                        palette = None
+                    if palette:
+                        self._count('parsed')
+                        yield palette
+                    else:
+                        self._count('parse_failed')
+            finally:
+                stop.set()
+                while True:
+                    try:
+                        pending = result_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if pending is not _DONE:
+                        pending.cancel()
+                for thread in threads:
+                    thread.join()
+
+
+class DownloadPipeline:
+    """
+    获取、保存两阶段下载流水线
+
+    获取线程池并发获取配色方案数据，每个结果立即交给保存线程池写入文件和生成图片，
+    保存完成后按完成顺序产出。同时提交的任务数有上限，URL数量很大时内存占用不增长。
+    调用 stop 后不再提交新任务，尚未开始的任务被取消，已开始的保存任务执行完毕，
+    不会留下写了一半的文件。
+    """
+
+    def __init__(self, fetch: Callable[[str, int], Optional[Dict]],
+                 save: Optional[Callable[[Dict], Optional[Dict]]] = None,
+                 fetch_workers: int = DOWNLOAD_FETCH_WORKERS, save_workers: int = DOWNLOAD_SAVE_WORKERS,
+                 max_pending: Optional[int] = None):
+        """
+        初始化流水线
+
+        Args:
+            fetch: 获取函数，参数为 (url, 序号)，返回配色方案数据，失败时返回None
+            save: 保存函数，参数为配色方案数据，返回保存后的数据（可以附加图片路径等字段），
+                失败时返回None；为None时不保存，直接产出获取结果
+            fetch_workers: 获取线程数
+            save_workers: 保存线程数
+            max_pending: 同时提交的任务数上限，为None时为线程总数的 DOWNLOAD_PENDING_PER_WORKER 倍
+        """
+        self.fetch = fetch
+        self.save = save
+        self.fetch_workers = max(1, fetch_workers)
+        self.save_workers = max(1, save_workers)
+        self.max_pending = max(1, max_pending or (self.fetch_workers + self.save_workers) * DOWNLOAD_PENDING_PER_WORKER)
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {'fetched': 0, 'fetch_failed': 0, 'saved': 0, 'save_failed': 0, 'cancelled': 0}
+
+    def stop(self) -> None:
+        """请求停止下载，可以在任意线程中调用"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def stats(self) -> Dict[str, int]:
+        """获取获取和保存计数"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def run(self, urls: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+        """
+        获取并保存配色方案，按完成顺序逐个产出
+
+        调用方提前停止迭代或调用 stop 时，取消尚未开始的任务并等待进行中的任务结束。
+
+        Args:
+            urls: 配色方案URL序列，可以是惰性生成器
+
+        Yields:
+            Tuple[int, Dict]: (URL序号, 配色方案数据)
+        """
+        url_iter = enumerate(urls)
+        pending: Dict[concurrent.futures.Future, Tuple[str, int, str]] = {}
+        fetch_pool = concurrent.futures.ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="download-fetch")
+        save_pool = concurrent.futures.ThreadPoolExecutor(self.save_workers, thread_name_prefix="download-save")
+
+        def submit_fetches():
+            while not self.stopped and len(pending) < self.max_pending:
+                item = next(url_iter, None)
+                if item is None:
+                    return
+                idx, url = item
+                pending[fetch_pool.submit(self.fetch, url, idx)] = ('fetch', idx, url)
+
+        try:
+            submit_fetches()
+            while pending:
+                done, _ = concurrent.futures.wait(pending, timeout=0.1,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage, idx, url = pending.pop(future)
+                    if future.cancelled():
+                        self._count('cancelled')
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning(f"{'获取' if stage == 'fetch' else '保存'} {url} 时出错: {e}")
+                        result = None
+
+                    if stage == 'fetch':
+                        if not result:
+                            self._count('fetch_failed')
+                            continue
+                        self._count('fetched')
+                        if self.save is None:
+                            yield idx, result
+                        elif self.stopped:
+                            # 停止后已获取但未开始保存的数据直接丢弃
+                            self._count('cancelled')
+                        else:
+                            pending[save_pool.submit(self.save, result)] = ('save', idx, url)
+                    elif result:
+                        self._count('saved')
+                        yield idx, result
+                    else:
+                        self._count('save_failed')
+
+                if self.stopped:
+                    for future in pending:
+                        future.cancel()
+                else:
+                    submit_fetches()
+        finally:
+            for future in pending:
+                future.cancel()
+            fetch_pool.shutdown(wait=True)
+            save_pool.shutdown(wait=True)
+
+
+def scrape_palette_pages(urls: Iterable[str], fetch_workers: int = TAG_FETCH_WORKERS,
+                         parse_workers: Optional[int] = None) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
+    """
+    批量抓取并解析调色板页面
+
+    Args:
+        urls: 调色板URL序列
+        fetch_workers: 抓取线程数
+        parse_workers: 解析进程数，为None时使用CPU核心数
+
+    Returns:
+        Tuple[bool, Optional[str], Optional[List[Dict]]]: (是否成功, 错误信息, 配色方案列表)
+    """
+    try:
+        pipeline = ScrapePipeline(fetch_workers=fetch_workers, parse_workers=parse_workers)
+        palettes = list(pipeline.run(urls))
+        logger.info(f"流水线抓取完成: {pipeline.stats()}")
+        if not palettes:
+            return False, "未能提取到任何调色板数据", None
+        return True, None, palettes
+    except Exception as e:
+        error_msg = f"批量抓取调色板页面时出错: {str(e)}"
+        logger.exception(error_msg)
+        return False, error_msg, None
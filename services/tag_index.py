@@ -0,0 +1,274 @@
+"""
+配色方案标签倒排索引，支持 AND / OR / NOT 组合查询并按点赞数排序
+"""
+import re
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.palette_repository import PaletteRepository, get_palette_repository, normalize_tag
+from models.palette import PaletteBatch
+
+logger = logging.getLogger(__name__)
+
+# 查询语法中的运算符，不区分大小写；标签前的 - 等同于 NOT
+QUERY_AND = "and"
+QUERY_OR = "or"
+QUERY_NOT = "not"
+
+_TOKEN = re.compile(r'\(|\)|[^\s()]+')
+
+
+class TagQueryParser:
+    """
+    标签查询解析与求值
+
+    语法（优先级从高到低）：NOT / -标签 > AND（可省略） > OR，可以用括号分组。
+    例如 "warm vintage -dark"、"warm AND (vintage OR retro) NOT dark"。
+    求值时每个标签展开为长度等于配色方案数量的布尔位图，集合运算都是逐元素的位运算，
+    耗时与集合大小无关。
+    """
+
+    def __init__(self, index: "TagIndex", query: str):
+        self.index = index
+        self.tokens = _TOKEN.findall(query)
+        self.pos = 0
+
+    def parse(self) -> np.ndarray:
+        """解析并求值，返回布尔位图"""
+        if not self.tokens:
+            raise ValueError("查询为空")
+        result = self._or_expr()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"无法解析查询，位置 {self.pos + 1} 附近: {self.tokens[self.pos]}")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos].lower() if self.pos < len(self.tokens) else None
+
+    def _or_expr(self) -> np.ndarray:
+        result = self._and_expr()
+        while self._peek() == QUERY_OR:
+            self.pos += 1
+            result |= self._and_expr()
+        return result
+
+    def _and_expr(self) -> np.ndarray:
+        include: List[np.ndarray] = []
+        exclude: List[np.ndarray] = []
+        while True:
+            token = self._peek()
+            if token is None or token in (QUERY_OR, ')'):
+                break
+            if token == QUERY_AND:
+                if not include and not exclude:
+                    raise ValueError(f"AND 前缺少标签，位置 {self.pos + 1}")
+                self.pos += 1
+                if self._peek() in (None, QUERY_OR, QUERY_AND, ')'):
+                    raise ValueError(f"AND 后缺少标签，位置 {self.pos + 1}")
+                continue
+            negated = False
+            while self._peek() == QUERY_NOT:
+                self.pos += 1
+                negated = not negated
+            raw = self.tokens[self.pos] if self.pos < len(self.tokens) else ''
+            if len(raw) > 1 and raw.startswith('-'):
+                self.pos += 1
+                (include if negated else exclude).append(self.index.bitmap(raw[1:]))
+                continue
+            (exclude if negated else include).append(self._operand())
+        if not include and not exclude:
+            raise ValueError(f"查询中缺少标签，位置 {self.pos + 1}")
+
+        result = include[0] if include else np.ones(len(self.index), dtype=bool)
+        for mask in include[1:]:
+            result &= mask
+        for mask in exclude:
+            result &= ~mask
+        return result
+
+    def _operand(self) -> np.ndarray:
+        """括号表达式或单个标签"""
+        token = self._peek()
+        if token is None:
+            raise ValueError("查询在运算符后结束")
+        if token == ')':
+            raise ValueError("括号不匹配")
+        self.pos += 1
+        if token != '(':
+            return self.index.bitmap(token)
+        result = self._or_expr()
+        if self._peek() != ')':
+            raise ValueError("括号不匹配")
+        self.pos += 1
+        return result
+
+
+class TagIndex:
+    """
+    标签倒排索引
+
+    每个标签对应一个升序的 int32 配色方案序号数组，组合查询时展开为布尔位图求值，
+    结果按点赞数从高到低排序。
+    """
+
+    def __init__(self, codes: List[str], likes, tag_ids: Dict[str, np.ndarray]):
+        """
+        初始化索引
+
+        Args:
+            codes: 配色代码列表，序号即配色方案在索引中的编号
+            likes: 与 codes 对应的点赞数
+            tag_ids: 标签 -> 升序的配色方案序号数组
+        """
+        self.codes = list(codes)
+        self.likes = np.asarray(likes, dtype=np.int64)
+        self.tag_ids = tag_ids
+        self._empty = np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def from_repository(cls, repository: PaletteRepository) -> "TagIndex":
+        """由配色方案库的标签表建立索引"""
+        codes, likes, pairs = repository.tag_index_rows()
+        if not codes or not pairs:
+            return cls(codes, likes, {})
+        # 标签表按 (标签, 配色代码) 排列，配色代码映射为序号后每个标签内已是升序
+        code_array = np.array(codes)
+        pair_codes = np.array([code for _, code in pairs])
+        ids = np.searchsorted(code_array, pair_codes)
+        # 丢弃配色代码不在配色方案表中的标签记录
+        valid = ids < len(codes)
+        valid[valid] = code_array[ids[valid]] == pair_codes[valid]
+        ids = ids[valid].astype(np.int32)
+        tags = [tag for (tag, _), keep in zip(pairs, valid) if keep]
+        if not tags:
+            return cls(codes, likes, {})
+        starts = [0] + [i for i in range(1, len(tags)) if tags[i] != tags[i - 1]] + [len(tags)]
+        tag_ids = {tags[start]: ids[start:end] for start, end in zip(starts, starts[1:])}
+        return cls(codes, likes, tag_ids)
+
+    @classmethod
+    def from_batch(cls, batch: PaletteBatch) -> "TagIndex":
+        """由 PaletteBatch 建立索引，标签统一为小写"""
+        postings: Dict[str, List[int]] = {}
+        for i, palette in enumerate(batch):
+            tags = list(palette.tags) + ([palette.tag] if palette.tag else [])
+            for tag in {normalize_tag(t) for t in tags} - {''}:
+                postings.setdefault(tag, []).append(i)
+        tag_ids = {tag: np.array(ids, dtype=np.int32) for tag, ids in postings.items()}
+        return cls(batch.codes(), batch.likes_array(), tag_ids)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def postings(self, tag: str) -> np.ndarray:
+        """标签下的配色方案序号，标签不存在时为空数组"""
+        return self.tag_ids.get(normalize_tag(tag), self._empty)
+
+    def bitmap(self, tag: str) -> np.ndarray:
+        """标签的布尔位图，新建的数组可以直接原地修改"""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.postings(tag)] = True
+        return mask
+
+    def tags(self) -> List[Tuple[str, int]]:
+        """所有标签及其配色方案数量，按数量从多到少排列"""
+        return sorted(((tag, len(ids)) for tag, ids in self.tag_ids.items()), key=lambda item: (-item[1], item[0]))
+
+    def match(self, query: str) -> np.ndarray:
+        """
+        返回符合查询的配色方案序号
+
+        Args:
+            query: 标签查询，如 "warm AND vintage NOT dark"
+
+        Returns:
+            np.ndarray: 升序的配色方案序号
+
+        Raises:
+            ValueError: 查询语法错误
+        """
+        return np.flatnonzero(TagQueryParser(self, query).parse())
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[str, int]]]:
+        """
+        按查询筛选配色方案并按点赞数从高到低排序
+
+        Args:
+            query: 标签查询
+            limit: 返回数量，小于0时按0处理
+            offset: 跳过的数量，小于0时按0处理
+
+        Returns:
+            Tuple[int, List[Tuple[str, int]]]: (符合查询的总数, (配色代码, 点赞数) 列表)
+        """
+        ids = self.match(query)
+        offset = max(0, offset)
+        end = min(offset + max(0, limit), len(ids))
+        if end <= offset:
+            return len(ids), []
+        # 点赞数从高到低、相同时序号从小到大，合成为唯一的排序键
+        likes = self.likes[ids]
+        keys = (likes.max() - likes) * len(self) + ids
+        if end < len(ids):
+            # 只对前 end 个做完整排序
+            top = np.argpartition(keys, end - 1)[:end]
+            top = top[np.argsort(keys[top])]
+        else:
+            top = np.argsort(keys)
+        return len(ids), [(self.codes[i], int(self.likes[i])) for i in ids[top[offset:end]]]
+
+
+_index_cache: Dict[str, Tuple[Tuple[int, int], TagIndex]] = {}
+_index_lock = threading.Lock()
+
+
+def get_tag_index(repository: Optional[PaletteRepository] = None) -> TagIndex:
+    """
+    获取配色方案库的标签倒排索引，配色方案库写入后下次获取时重建
+
+    Args:
+        repository: 配色方案库，为None时使用进程内共享的默认库
+
+    Returns:
+        TagIndex: 标签倒排索引
+    """
+    repository = repository or get_palette_repository()
+    with _index_lock:
+        revision = repository.revision()
+        cached = _index_cache.get(repository.db_path)
+        if cached is None or cached[0] != revision:
+            index = TagIndex.from_repository(repository)
+            logger.info(f"已建立标签索引，共 {len(index)} 个配色方案，{len(index.tag_ids)} 个标签")
+            cached = _index_cache[repository.db_path] = (revision, index)
+        return cached[1]
+
+
+def query_palettes_by_tags(query: str, limit: int = 20, offset: int = 0,
+                           repository: Optional[PaletteRepository] = None
+                           ) -> Tuple[bool, Optional[str], Optional[Dict]]:
+    """
+    在本地配色方案库中按标签组合查询配色方案
+
+    Args:
+        query: 标签查询，如 "warm AND vintage NOT dark"，见 TagQueryParser
+        limit: 返回数量
+        offset: 跳过的数量
+        repository: 配色方案库，为None时使用进程内共享的默认库
+
+    Returns:
+        Tuple[bool, Optional[str], Optional[Dict]]: (是否成功, 错误信息, {'total': 符合查询的总数, 'palettes': 配色方案数据列表})
+    """
+    repository = repository or get_palette_repository()
+    try:
+        total, matches = get_tag_index(repository).search(query, limit, offset)
+        palettes = [palette.to_dict() for palette in map(repository.get, (code for code, _ in matches)) if palette]
+        return True, None, {'total': total, 'palettes': palettes}
+    except ValueError as e:
+        return False, f"查询语法错误: {e}", None
+    except Exception as e:
+        error_msg = f"按标签查询配色方案时出错: {str(e)}"
+        logger.exception(error_msg)
+        return False, error_msg, None
@@ -4,7 +4,7 @@
 import os
 import requests
 import logging
-from typing import Tuple, Optional, List, Dict
+from typing import Tuple, Optional, List, Dict, Iterator
 from bs4 import BeautifulSoup
 import json
 import time
@@ -16,6 +16,12 @@ import concurrent.futures
 # 添加项目根目录到 Python 路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from services.http_client import HttpClient, get_http_client
+from services.palette_extractor import get_palette_extractor
+from services.color_tagger import get_color_tagger, RULE_SET_BASIC
+from models.palette import Palette, PaletteBatch
+from services.palette_repository import PaletteRepository, get_palette_repository
+
 # 导入图片生成器
 try:
     from color_palette_generator import PaletteImageGenerator
@@ -31,92 +37,339 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ColorHunt支持的分类标签
+COLORHUNT_TAGS = [
+    "pastel", "vintage", "retro", "neon", "gold", "light", "dark", 
+    "warm", "cold", "summer", "fall", "winter", "spring", "happy", 
+    "nature", "earth", "night", "space", "rainbow", "gradient", "sunset",
+    "sky", "sea", "kids", "skin", "food", "cream", "coffee", "wedding", "christmas", "halloween"
+]
+
+# 分类并发抓取配置
+TAG_FETCH_WORKERS = 8          # 线程池大小
+PER_HOST_CONCURRENCY = 4       # 异步客户端同一主机的最大并发连接数
+DETAIL_FETCH_WORKERS = 16      # 配色页面请求线程数上限，实际并发由限流器决定
+
+
+class FeedRequestError(Exception):
+    """feed接口返回非200状态码"""
+    
+    def __init__(self, status_code: int):
+        super().__init__(f"feed接口请求失败，状态码: {status_code}")
+        self.status_code = status_code
+
+
 class WebService:
     """网络服务类，提供网站抓取和数据下载功能"""
     
+    # 可注入的HTTP客户端，为None时使用进程内共享的连接池客户端
+    http_client: Optional[HttpClient] = None
+    
     @staticmethod
-    def get_palette_urls() -> List[str]:
+    def get_http_client() -> HttpClient:
+        """获取当前使用的HTTP客户端"""
+        return WebService.http_client or get_http_client()
+    
+    @staticmethod
+    def get_rate_limit_stats() -> Optional[Dict]:
         """
-        获取调色板URL列表 - 通过API接口获取
+        获取当前HTTP客户端的限流器状态
         
         Returns:
-            List[str]: URL列表
+            Optional[Dict]: 令牌数、当前并发上限、进行中的请求数和累计统计，未启用限流时为None
         """
-        # 不同分类的标签
-        tag_categories = [
-            "pastel", "vintage", "retro", "neon", "gold", "light", "dark", 
-            "warm", "cold", "summer", "fall", "winter", "spring", "happy", 
-            "nature", "earth", "night", "space", "rainbow", "gradient","sunset",
-            "sky","sea","kids","skin","food","cream","coffee","wedding","christmas","halloween"
-        ]
+        rate_limiter = getattr(WebService.get_http_client(), 'rate_limiter', None)
+        return rate_limiter.stats() if rate_limiter else None
+    
+    @staticmethod
+    def _fetch_tag_items(tag: str) -> List[Dict]:
+        """
+        请求单个分类标签的feed数据，请求频率由HTTP客户端的共享限流器控制
         
-        # 收集调色板URL
-        palette_urls = []
+        Args:
+            tag: 分类标签
+            
+        Returns:
+            List[Dict]: feed接口返回的配色方案列表（code、likes、date），失败时返回空列表
+        """
+        try:
+            logger.info(f"请求分类: {tag}")
+            
+            # 构建POST数据
+            post_data = {
+                'step': 0,
+                'sort': 'new',
+                'tags': tag,
+                'timeframe': ''
+            }
+            
+            # 请求API
+            response = WebService.get_http_client().post_feed(post_data, timeout=10)
+            
+            if response.status_code != 200:
+                logger.warning(f"请求分类 {tag} 失败, 状态码: {response.status_code}")
+                return []
+            
+            # 解析JSON数据
+            try:
+                palette_data = json.loads(response.text)
+            except json.JSONDecodeError as e:
+                logger.warning(f"解析分类 {tag} 的JSON数据失败: {e}")
+                return []
+            
+            logger.info(f"分类 {tag} 获取到 {len(palette_data)} 个配色方案")
+            return [item for item in palette_data if 'code' in item]
+            
+        except Exception as e:
+            logger.warning(f"处理分类 {tag} 时出错: {e}")
+            return []
+    
+    @staticmethod
+    def get_palette_feed_items(max_workers: int = TAG_FETCH_WORKERS) -> List[Dict]:
+        """
+        并发获取所有分类的feed数据，合并为去重后的配色方案列表
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/html, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-            'X-Requested-With': 'XMLHttpRequest',
-            'Referer': 'https://colorhunt.co/'
-        }
+        各分类请求在线程池中并发执行，总耗时约等于最慢的单个分类；
+        结果按分类顺序合并，保证输出顺序稳定。
         
-        # 请求不同分类的配色数据
-        for tag in tag_categories:
-            try:
-                logger.info(f"请求分类: {tag}")
-                
-                # 构建POST数据
-                post_data = {
-                    'step': 0,
-                    'sort': 'new',
-                    'tags': tag,
-                    'timeframe': ''
-                }
-                
-                # 请求API
-                response = requests.post(
-                    'https://colorhunt.co/php/feed.php', 
-                    headers=headers, 
-                    data=post_data,
-                    timeout=10
-                )
-                
-                if response.status_code != 200:
-                    logger.warning(f"请求分类 {tag} 失败, 状态码: {response.status_code}")
-                    continue
-                
-                # 解析JSON数据
-                try:
-                    palette_data = json.loads(response.text)
-                    logger.info(f"分类 {tag} 获取到 {len(palette_data)} 个配色方案")
-                    
-                    # 提取配色代码并构建URL
-                    for item in palette_data:
-                        if 'code' in item:
-                            code = item['code']
-                            url = f"https://colorhunt.co/palette/{code}"
-                            if url not in palette_urls:
-                                palette_urls.append(url)
-                                logger.info(f"找到配色URL: {url}")
-                                
-                except json.JSONDecodeError as e:
-                    logger.warning(f"解析分类 {tag} 的JSON数据失败: {e}")
+        Args:
+            max_workers: 线程池大小，为1时退化为串行请求；实际请求并发由共享限流器决定
+            
+        Returns:
+            List[Dict]: 配色方案列表，每项包含 code、likes、date 以及出现过的分类 tags
+        """
+        workers = max(1, min(max_workers, len(COLORHUNT_TAGS)))
+        
+        # 并发请求不同分类的配色数据，map保证结果与分类顺序一致
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            tag_items = list(executor.map(WebService._fetch_tag_items, COLORHUNT_TAGS))
+        
+        return WebService.merge_feed_items(zip(COLORHUNT_TAGS, tag_items))
+    
+    @staticmethod
+    def merge_feed_items(tag_items) -> List[Dict]:
+        """
+        按分类顺序合并各分类的feed数据，同一配色只保留首次出现的记录并累积其分类
+        
+        Args:
+            tag_items: 与分类顺序一致的 (分类, feed数据列表) 序列
+            
+        Returns:
+            List[Dict]: 配色方案列表，每项包含 code、likes、date、tags
+        """
+        merged = {}
+        for tag, items in tag_items:
+            for item in items:
+                code = item.get('code')
+                if not code:
                     continue
-                    
-            except Exception as e:
-                logger.warning(f"处理分类 {tag} 时出错: {e}")
-                continue
+                if code not in merged:
+                    merged[code] = {
+                        'code': code,
+                        'likes': item.get('likes', 0),
+                        'date': item.get('date', ''),
+                        'tags': []
+                    }
+                if tag not in merged[code]['tags']:
+                    merged[code]['tags'].append(tag)
+        return list(merged.values())
+    
+    @staticmethod
+    def get_palette_urls(max_workers: int = TAG_FETCH_WORKERS) -> List[str]:
+        """
+        获取调色板URL列表 - 通过API接口并发获取所有分类
+        
+        Args:
+            max_workers: 线程池大小，为1时退化为串行请求
+            
+        Returns:
+            List[str]: URL列表
+        """
+        feed_items = WebService.get_palette_feed_items(max_workers)
+        return WebService.feed_items_to_urls(feed_items)
+    
+    @staticmethod
+    def feed_items_to_urls(feed_items: List[Dict]) -> List[str]:
+        """
+        将合并后的feed数据转换为调色板URL列表
+        
+        Args:
+            feed_items: merge_feed_items 返回的配色方案列表
+            
+        Returns:
+            List[str]: URL列表
+        """
+        palette_urls = [f"https://colorhunt.co/palette/{item['code']}" for item in feed_items]
         
         # 如果没有找到任何调色板URL，直接返回空列表，不再补充备用颜色
-        if not palette_urls or len(palette_urls) < 1:
+        if not palette_urls:
             logger.info("未能获取到任何调色板URL")
             return []
 
         logger.info(f"总共找到 {len(palette_urls)} 个调色板URL")
         return palette_urls
     
+    @staticmethod
+    def colors_from_code(code: str) -> List[str]:
+        """
+        从24位配色代码中解析4种颜色
+        
+        Args:
+            code: ColorHunt配色代码，每6个字符表示一种颜色
+            
+        Returns:
+            List[str]: #RRGGBB格式的颜色列表，代码格式不正确时返回空列表
+        """
+        if len(code) != 24 or not all(c in '0123456789abcdefABCDEF' for c in code):
+            return []
+        return [f"#{code[i*6:(i+1)*6].upper()}" for i in range(4)]
+    
+    @staticmethod
+    def infer_tags_from_colors(colors: List[str]) -> List[str]:
+        """
+        根据RGB值推断颜色标签
+        
+        Args:
+            colors: #RRGGBB格式的颜色列表
+            
+        Returns:
+            List[str]: 去重后的标签列表，每种颜色最多对应一个标签
+        """
+        return get_color_tagger(RULE_SET_BASIC).tag_colors(colors)
+    
+    @staticmethod
+    def _parse_likes(likes) -> int:
+        """将feed接口返回的点赞数（可能是字符串）转换为整数"""
+        if isinstance(likes, int):
+            return likes
+        match = re.search(r'\d+', str(likes or '').replace(',', ''))
+        return int(match.group()) if match else 0
+    
+    @staticmethod
+    def feed_item_to_palette(item: Dict, idx: int = 0, status_code: int = 200) -> Optional[Palette]:
+        """
+        将feed数据转换为紧凑的 Palette 对象，不请求配色页面
+        
+        颜色来自24位配色代码，点赞数和日期来自feed接口；feed数据中没有分类时根据颜色推断标签。
+        
+        Args:
+            item: merge_feed_items 返回的单个配色方案，或feed接口返回的原始数据
+            idx: 索引，用于生成ID
+            status_code: feed请求的HTTP状态码
+            
+        Returns:
+            Optional[Palette]: 配色方案，配色代码无效时返回None
+        """
+        code = item.get('code', '')
+        rgb = Palette.pack_code(code)
+        if rgb is None:
+            logger.warning(f"无效的配色方案代码: {code}")
+            return None
+        
+        # feed数据中的分类即为真实标签，没有分类时根据颜色推断
+        tags = [tag.title() for tag in item.get('tags', [])]
+        flags = 0
+        if not tags:
+            tags = WebService.infer_tags_from_colors(WebService.colors_from_code(code)) or ['Pastel']
+            flags = Palette.TAGS_INFERRED
+        
+        return Palette(
+            rgb,
+            likes=WebService._parse_likes(item.get('likes', 0)),
+            date=item.get('date') or "未知日期",
+            tags=tags[:8],
+            idx=idx,
+            kind=Palette.KIND_FEED,
+            status_code=status_code,
+            flags=flags,
+        )
+    
+    @staticmethod
+    def build_palette_from_feed_item(item: Dict, idx: int = 0, status_code: int = 200) -> Optional[Dict]:
+        """
+        仅使用feed数据构建完整的调色板记录，不请求配色页面
+        
+        页面标题等feed中没有的字段留空，需要时通过 fetch_palette_details 按需补充。
+        
+        Args:
+            item: merge_feed_items 返回的单个配色方案，或feed接口返回的原始数据
+            idx: 索引，用于生成ID
+            status_code: feed请求的HTTP状态码
+            
+        Returns:
+            Optional[Dict]: 调色板数据，配色代码无效时返回None
+        """
+        palette = WebService.feed_item_to_palette(item, idx, status_code)
+        return palette.to_dict() if palette else None
+    
+    @staticmethod
+    def merge_palette_details(palette: Dict, page_data: Dict) -> Dict:
+        """
+        将配色页面解析出的字段合并到feed构建的调色板记录中
+        
+        feed提供的点赞数、日期和分类标签更准确，只在feed缺失时使用页面数据。
+        
+        Args:
+            palette: build_palette_from_feed_item 构建的调色板数据
+            page_data: parse_palette_page 解析出的调色板数据
+            
+        Returns:
+            Dict: 合并后的调色板数据（原地修改并返回）
+        """
+        palette["name"] = page_data["name"]
+        if not palette["likes"]:
+            palette["likes"] = page_data["likes"]
+        if palette["date"] == "未知日期":
+            palette["date"] = page_data["date"]
+        if palette["metadata"].get("tags_inferred"):
+            palette["tags"] = page_data["tags"]
+            palette["metadata"]["tags_inferred"] = False
+        palette["metadata"]["page_title"] = page_data["metadata"]["page_title"]
+        palette["metadata"]["details_fetched"] = True
+        return palette
+    
+    @staticmethod
+    def fetch_palette_details(palette: Dict) -> Dict:
+        """
+        按需请求配色页面，补充feed数据中没有的字段（名称、页面标题等）
+        
+        Args:
+            palette: build_palette_from_feed_item 构建的调色板数据
+            
+        Returns:
+            Dict: 补充后的调色板数据，页面请求失败时原样返回
+        """
+        if palette.get("metadata", {}).get("details_fetched"):
+            return palette
+        
+        page_data = WebService.extract_palette_data_from_url(palette["source_url"])
+        if page_data:
+            WebService.merge_palette_details(palette, page_data)
+        return palette
+
+    @staticmethod
+    def fetch_palette_pages(urls: List[str], fetch_workers: int = DETAIL_FETCH_WORKERS) -> List[Optional[Dict]]:
+        """
+        批量请求并解析配色页面，请求在线程池中执行，HTML解析在进程池中执行
+
+        Args:
+            urls: 调色板URL列表
+            fetch_workers: 抓取线程数，实际请求并发由共享限流器根据服务器响应调整
+
+        Returns:
+            List[Optional[Dict]]: 与 urls 一一对应的调色板数据，请求或解析失败的为None
+        """
+        if not urls:
+            return []
+        # 流水线模块依赖本模块，在这里导入避免循环导入
+        from services.scrape_pipeline import ScrapePipeline
+
+        pipeline = ScrapePipeline(fetch_workers=fetch_workers,
+                                  parse_workers=min(os.cpu_count() or 1, len(urls)))
+        pages = {palette["source_url"]: palette for palette in pipeline.run(urls)}
+        logger.info(f"配色页面抓取完成: {pipeline.stats()}")
+        return [pages.get(url) for url in urls]
+
     @staticmethod
     def extract_palette_data_from_url(url: str, idx: int = 0) -> Optional[Dict]:
         """
@@ -132,22 +385,38 @@ class WebService:
         try:
             logger.info(f"请求调色板页面: {url}")
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Referer': 'https://colorhunt.co/',
-                'Cache-Control': 'no-cache'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
+            response = WebService.get_http_client().get_page(url, timeout=10)
             if response.status_code != 200:
                 logger.warning(f"请求 {url} 失败, 状态码: {response.status_code}")
                 return None
-                
-            # 解析HTML内容
-            soup = BeautifulSoup(response.text, 'html.parser')
-                
+            
+            return WebService.parse_palette_page(url, response.text, idx, response.status_code)
+            
+        except requests.Timeout:
+            logger.warning(f"请求 {url} 超时")
+            return None
+        except requests.RequestException as e:
+            logger.warning(f"请求 {url} 网络错误: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"处理URL {url} 时出错: {e}")
+            return None
+    
+    @staticmethod
+    def parse_palette_page(url: str, html: str, idx: int = 0, status_code: int = 200) -> Optional[Dict]:
+        """
+        从已下载的调色板页面HTML中提取调色板数据
+        
+        Args:
+            url: 调色板URL
+            html: 页面HTML内容
+            idx: 索引，用于生成ID
+            status_code: 页面请求的HTTP状态码
+            
+        Returns:
+            Optional[Dict]: 调色板数据，包含详细的元数据信息
+        """
+        try:
             # 从URL中提取颜色代码
             colors = []
             palette_id = url.split('/')[-1]
@@ -162,7 +431,7 @@ class WebService:
             # 如果URL格式不标准，尝试其他方法
             if not colors or len(colors) < 4:
                 # 查找页面中的颜色信息
-                color_matches = re.findall(r'#[0-9a-fA-F]{6}', response.text)
+                color_matches = re.findall(r'#[0-9a-fA-F]{6}', html)
                 for color in color_matches:
                     color_upper = color.upper()
                     if color_upper not in colors and color_upper != '#FFFFFF':
@@ -178,177 +447,24 @@ class WebService:
                     colors.append(random_color)
             colors = colors[:4]
             
+            # 一次扫描提取标题、点赞数、日期和标签，必要时才解析DOM
+            fields = get_palette_extractor().extract(html)
+            page_title = fields['title'] or ""
+            
             # 提取配色方案名称
             name = f"ColorHunt Palette {palette_id}"
-            title_elem = soup.find('title')
-            if title_elem:
-                title_text = title_elem.text.strip()
-                if title_text and 'Color Hunt' in title_text:
-                    name = title_text
-                    logger.info(f"提取到配色方案名称: {name}")
-            
-            # 提取点赞数 - 基于ColorHunt的实际结构
-            likes = 0
-            
-            # 方法1: 查找JavaScript中的likes数据
-            script_content = response.text
-            
-            # 查找feed.php返回的JSON数据模式
-            likes_patterns = [
-                rf"'likes':\s*(\d+)",
-                rf'"likes":\s*(\d+)',
-                rf"likes['\"]:\s*(\d+)",
-                rf"formatThousands\((\d+)\)",
-                rf"\.text\((\d+)\)"
-            ]
-            
-            for pattern in likes_patterns:
-                matches = re.findall(pattern, script_content)
-                if matches:
-                    try:
-                        # 取最大的数字作为点赞数（通常是最准确的）
-                        potential_likes = [int(m) for m in matches if int(m) > 0]
-                        if potential_likes:
-                            likes = max(potential_likes)
-                            logger.info(f"从JavaScript提取到点赞数: {likes}")
-                            break
-                    except ValueError:
-                        continue
+            if page_title and 'Color Hunt' in page_title:
+                name = page_title
+                logger.info(f"提取到配色方案名称: {name}")
             
-            # 方法2: 查找HTML中的点赞相关元素
-            if likes == 0:
-                like_selectors = [
-                    '.like span', '.button.like span', '.actions .like span',
-                    '[data-likes]', '.likes-count', '.like-count'
-                ]
-                
-                for selector in like_selectors:
-                    like_elems = soup.select(selector)
-                    for like_elem in like_elems:
-                        try:
-                            like_text = like_elem.text.strip()
-                            if like_text and like_text.isdigit():
-                                likes = int(like_text)
-                                logger.info(f"从HTML元素提取到点赞数: {likes}")
-                                break
-                            elif like_text and 'k' in like_text.lower():
-                                number = float(like_text.lower().replace('k', ''))
-                                likes = int(number * 1000)
-                                logger.info(f"从HTML元素提取到点赞数: {likes}")
-                                break
-                        except (ValueError, AttributeError):
-                            continue
-                    if likes > 0:
-                        break
-            
-            # 提取日期信息
-            date = ""
-            
-            # 方法1: 查找JavaScript中的date数据
-            date_patterns = [
-                rf"'date':\s*['\"]([^'\"]+)['\"]",
-                rf'"date":\s*"([^"]+)"',
-                rf"date['\"]:\s*['\"]([^'\"]+)['\"]"
-            ]
-            
-            for pattern in date_patterns:
-                matches = re.findall(pattern, script_content)
-                if matches:
-                    date = matches[0]
-                    logger.info(f"从JavaScript提取到日期: {date}")
-                    break
-            
-            # 方法2: 查找HTML中的日期元素
-            if not date:
-                date_selectors = ['.date', '.time', '.timestamp', '.created']
-                for selector in date_selectors:
-                    date_elem = soup.select_one(selector)
-                    if date_elem:
-                        date_text = date_elem.text.strip()
-                        if date_text:
-                            date = date_text
-                            logger.info(f"从HTML元素提取到日期: {date}")
-                            break
-            
-            # 如果没找到日期，设置默认值
-            if not date:
-                date = "未知日期"
-            
-            # 提取标签信息 - 基于ColorHunt的tagBank结构
-            tags = []
-            
-            # 定义ColorHunt的标准标签（基于HTML中的tagBank）
-            colorhunt_tags = {
-                # 颜色标签
-                'blue', 'teal', 'mint', 'green', 'sage', 'yellow', 'beige', 'brown', 
-                'orange', 'peach', 'red', 'maroon', 'pink', 'purple', 'navy', 'black', 
-                'grey', 'white',
-                # 风格标签
-                'pastel', 'vintage', 'retro', 'neon', 'gold', 'light', 'dark', 'warm', 
-                'cold', 'summer', 'fall', 'winter', 'spring', 'happy', 'nature', 'earth', 
-                'night', 'space', 'rainbow', 'gradient', 'sunset', 'sky', 'sea', 'kids', 
-                'skin', 'food', 'cream', 'coffee', 'wedding', 'christmas', 'halloween'
-            }
-            
-            # 从页面内容中查找标签
-            page_text_lower = response.text.lower()
-            
-            # 查找JavaScript中的tags数据
-            tag_patterns = [
-                rf"tags['\"]:\s*['\"]([^'\"]+)['\"]",
-                rf"'tags':\s*['\"]([^'\"]+)['\"]",
-                rf'"tags":\s*"([^"]+)"'
-            ]
-            
-            for pattern in tag_patterns:
-                matches = re.findall(pattern, script_content)
-                if matches:
-                    found_tags = matches[0].split('-')
-                    for tag in found_tags:
-                        tag = tag.strip().lower()
-                        if tag in colorhunt_tags:
-                            tags.append(tag.title())
-                    logger.info(f"从JavaScript提取到标签: {tags}")
-                    break
+            likes = fields['likes']
+            date = fields['date'] or "未知日期"
+            tags = fields['tags']
+            logger.info(f"提取到点赞数: {likes}, 日期: {date}, 标签: {tags}")
             
             # 如果没找到标签，根据颜色分析推断标签
             if not tags:
-                # 分析颜色特征来推断可能的标签
-                color_analysis_tags = []
-                
-                for color in colors:
-                    # 转换为RGB进行分析
-                    try:
-                        hex_color = color.replace('#', '')
-                        r = int(hex_color[0:2], 16)
-                        g = int(hex_color[2:4], 16)
-                        b = int(hex_color[4:6], 16)
-                        
-                        # 基于RGB值推断颜色标签
-                        if r > 200 and g > 200 and b > 200:
-                            color_analysis_tags.append('Light')
-                        elif r < 100 and g < 100 and b < 100:
-                            color_analysis_tags.append('Dark')
-                        elif r > g and r > b:
-                            if r > 200:
-                                color_analysis_tags.append('Red')
-                            else:
-                                color_analysis_tags.append('Maroon')
-                        elif g > r and g > b:
-                            color_analysis_tags.append('Green')
-                        elif b > r and b > g:
-                            color_analysis_tags.append('Blue')
-                        elif r > 150 and g > 150 and b < 100:
-                            color_analysis_tags.append('Yellow')
-                        elif r > 150 and g < 150 and b > 150:
-                            color_analysis_tags.append('Purple')
-                        elif r > 150 and g > 100 and b < 100:
-                            color_analysis_tags.append('Orange')
-                    except ValueError:
-                        continue
-                
-                # 去重并添加到标签列表
-                tags = list(set(color_analysis_tags))
+                tags = WebService.infer_tags_from_colors(colors)
                 logger.info(f"基于颜色分析推断的标签: {tags}")
             
             # 如果仍然没有标签，添加默认标签
@@ -378,8 +494,8 @@ class WebService:
                 "metadata": {
                     "colors_extracted_method": "URL解析" if len(palette_id) == 24 else "混合方法",
                     "has_detailed_info": bool(likes > 0 or date != "未知日期" or len(tags) > 1),
-                    "response_status": response.status_code,
-                    "page_title": soup.find('title').text.strip() if soup.find('title') else "",
+                    "response_status": status_code,
+                    "page_title": page_title,
                     "extraction_notes": f"点赞数: {likes}, 日期: {date}, 标签数: {len(tags)}"
                 }
             }
@@ -387,23 +503,21 @@ class WebService:
             logger.info(f"成功提取完整调色板数据: {palette_data['id']}, 点赞数: {likes}, 标签: {len(tags)}")
             return palette_data
             
-        except requests.Timeout:
-            logger.warning(f"请求 {url} 超时")
-            return None
-        except requests.RequestException as e:
-            logger.warning(f"请求 {url} 网络错误: {e}")
-            return None
         except Exception as e:
             logger.warning(f"处理URL {url} 时出错: {e}")
             return None
     
     @staticmethod
-    def scrape_colorhunt_palettes(limit: int = 5) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
+    def scrape_colorhunt_palettes(limit: int = 5, fetch_details: bool = False) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
         """
         抓取colorhunt.co网站的配色方案 - 快速版本，只返回数据
         
+        颜色、点赞数和日期直接取自feed数据，不再逐个请求配色页面；
+        只有 fetch_details 为True时才按需请求页面补充名称和页面标题。
+        
         Args:
             limit: 要抓取的配色方案数量限制
+            fetch_details: 是否请求配色页面补充feed中没有的字段
             
         Returns:
             Tuple[bool, Optional[str], Optional[List[Dict]]]: (是否成功, 错误信息, 配色方案列表)
@@ -411,27 +525,29 @@ class WebService:
         try:
             logger.info(f"开始抓取 {limit} 个配色方案")
             
-            # 获取调色板URL列表
-            palette_urls = WebService.get_palette_urls()
+            # 获取各分类合并后的feed数据
+            feed_items = WebService.get_palette_feed_items()
             
-            if not palette_urls:
+            if not feed_items:
                 return False, "未能获取到任何调色板URL", None
-                
-            # 限制URL数量并只处理前几个
-            palette_urls = palette_urls[:min(limit, 3)]  # 最多处理3个，避免超时
-            logger.info(f"将处理 {len(palette_urls)} 个URL")
             
-            # 简化处理，不使用多线程
+            feed_items = feed_items[:limit]
+            logger.info(f"将处理 {len(feed_items)} 个配色方案")
+            
             all_palettes = []
-            for idx, url in enumerate(palette_urls):
-                try:
-                    palette_data = WebService.extract_palette_data_from_url(url, idx)
-                    if palette_data:
-                        all_palettes.append(palette_data)
-                        logger.info(f"成功提取调色板数据: {palette_data['id']}")
-                except Exception as e:
-                    logger.warning(f"处理URL {url} 时出错: {e}")
-                    continue
+            for idx, item in enumerate(feed_items):
+                palette_data = WebService.build_palette_from_feed_item(item, idx)
+                if palette_data:
+                    all_palettes.append(palette_data)
+            
+            if fetch_details:
+                # 请求和解析分两个阶段并行，解析在进程池中执行不受GIL限制
+                pending = [palette for palette in all_palettes
+                           if not palette.get("metadata", {}).get("details_fetched")]
+                pages = WebService.fetch_palette_pages([palette["source_url"] for palette in pending])
+                for palette, page_data in zip(pending, pages):
+                    if page_data:
+                        WebService.merge_palette_details(palette, page_data)
             
             # 如果没有获取到任何调色板，返回错误
             if not all_palettes:
@@ -616,14 +732,15 @@ class WebService:
                 return False, "未能获取到任何调色板URL", None
                 
             # 限制URL数量
-            palette_urls = palette_urls[:min(limit, 5)]  # 最多处理5个
+            palette_urls = palette_urls[:limit]
             logger.info(f"将处理 {len(palette_urls)} 个URL")
             
-            # 处理每个URL
+            # 请求和解析分两个阶段并行，解析在进程池中执行不受GIL限制
+            results = WebService.fetch_palette_pages(palette_urls)
+            
             all_palettes = []
-            for idx, url in enumerate(palette_urls):
+            for url, palette_data in zip(palette_urls, results):
                 try:
-                    palette_data = WebService.extract_palette_data_from_url(url, idx)
                     if palette_data:
                         all_palettes.append(palette_data)
                         logger.info(f"成功提取增强配色板数据: {palette_data['id']}")
@@ -761,12 +878,7 @@ class WebService:
             logger.info(f"开始获取 {limit} 个 {theme} 主题的配色方案数据")
             
             # 支持的主题标签
-            available_themes = [
-                "pastel", "vintage", "retro", "neon", "gold", "light", "dark", 
-                "warm", "cold", "summer", "fall", "winter", "spring", "happy", 
-                "nature", "earth", "night", "space", "rainbow", "gradient", "sunset",
-                "sky", "sea", "kids", "skin", "food", "cream", "coffee", "wedding", "christmas", "halloween"
-            ]
+            available_themes = COLORHUNT_TAGS
             
             # 检查主题是否支持
             theme_lower = theme.lower()
@@ -993,6 +1105,202 @@ class WebService:
             logger.exception(error_msg)
             return False, error_msg, None
 
+    @staticmethod
+    def fetch_feed_page(post_data: Dict, referer: Optional[str] = None, timeout: float = 15,
+                        http_client: Optional[HttpClient] = None) -> List[Dict]:
+        """
+        请求feed接口的单页数据
+        
+        Args:
+            post_data: POST参数（step、sort、tags、timeframe）
+            referer: 自定义Referer
+            timeout: 超时时间（秒）
+            http_client: HTTP客户端，为None时使用 WebService 的共享客户端
+            
+        Returns:
+            List[Dict]: 当前页的配色方案列表，没有更多数据时为空列表
+            
+        Raises:
+            FeedRequestError: 接口返回非200状态码
+            json.JSONDecodeError: 响应不是合法的JSON
+        """
+        client = http_client or WebService.get_http_client()
+        response = client.post_feed(post_data, referer=referer, timeout=timeout)
+        if response.status_code != 200:
+            raise FeedRequestError(response.status_code)
+        return json.loads(response.text) or []
+    
+    @staticmethod
+    def iter_feed_items(post_data: Dict, limit: Optional[int] = None, referer: Optional[str] = None,
+                        timeout: float = 15, http_client: Optional[HttpClient] = None,
+                        max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """
+        按 step 逐页遍历feed接口，逐条产出配色方案
+        
+        调用方处理当前页时，下一页已在后台线程中请求；达到 limit、遇到空页或
+        整页都与上一页重复（服务器忽略了 step）时停止。任一时刻最多只持有两页数据，
+        因此大批量抓取的内存占用保持不变。
+        
+        Args:
+            post_data: POST参数，其中的 step 为起始页
+            limit: 最多产出的配色方案数量，为None时不限制
+            referer: 自定义Referer
+            timeout: 单页请求的超时时间（秒）
+            http_client: HTTP客户端，为None时使用 WebService 的共享客户端
+            max_pages: 最多请求的页数，为None时不限制
+            
+        Yields:
+            Dict: feed接口返回的单个配色方案（code、likes、date）
+            
+        Raises:
+            FeedRequestError: 接口返回非200状态码
+            json.JSONDecodeError: 响应不是合法的JSON
+        """
+        if limit is not None and limit <= 0:
+            return
+        
+        def fetch(step: int) -> List[Dict]:
+            return WebService.fetch_feed_page(dict(post_data, step=step), referer, timeout, http_client)
+        
+        step = int(post_data.get('step', 0))
+        pages = 1
+        yielded = 0
+        previous_codes = set()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(fetch, step)
+            while future is not None:
+                page = future.result()
+                if not page:
+                    return
+                
+                # 当前页未取完limit且未达到页数上限时，预取下一页
+                has_more = ((limit is None or yielded + len(page) < limit)
+                            and (max_pages is None or pages < max_pages))
+                future = executor.submit(fetch, step + 1) if has_more else None
+                step += 1
+                pages += 1
+                
+                # 新配色插入会使分页整体后移，跳过与上一页重复的记录
+                page_codes = set()
+                for item in page:
+                    code = item.get('code')
+                    if not code or code in previous_codes or code in page_codes:
+                        continue
+                    page_codes.add(code)
+                    yield item
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+                
+                if not page_codes:
+                    logger.info(f"第 {step} 页没有新的配色方案，停止翻页")
+                    return
+                previous_codes = page_codes
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def iter_tag_palettes(tag: str, limit: Optional[int] = None,
+                          max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """
+        按标签逐页产出配色方案数据，格式与 scrape_colorhunt_by_tag 相同
+        
+        Args:
+            tag: 标签名称 (如: summer, retro, vintage等)
+            limit: 最多产出的配色方案数量，为None时遍历所有分页
+            max_pages: 最多请求的页数，为None时不限制
+            
+        Yields:
+            Dict: 配色方案数据
+        """
+        post_data = {
+            'step': 0,
+            'sort': 'new',
+            'tags': tag.lower(),
+            'timeframe': ''
+        }
+        items = WebService.iter_feed_items(
+            post_data, limit=limit, referer=f'https://colorhunt.co/palettes/{tag.lower()}',
+            timeout=15, max_pages=max_pages
+        )
+        for i, item in enumerate(items):
+            palette_data = WebService.build_tag_palette(tag, item, i)
+            if palette_data:
+                yield palette_data
+    
+    @staticmethod
+    def collect_tag_palettes(tag: str, limit: Optional[int] = None,
+                             max_pages: Optional[int] = None) -> PaletteBatch:
+        """
+        按标签抓取配色方案并保存为列式的 PaletteBatch，适合大批量抓取
+        
+        与 iter_tag_palettes 不同，不为每个配色方案生成字典，需要时通过 PaletteBatch.to_dicts 转换。
+        
+        Args:
+            tag: 标签名称
+            limit: 最多抓取的配色方案数量，为None时遍历所有分页
+            max_pages: 最多请求的页数，为None时不限制
+            
+        Returns:
+            PaletteBatch: 配色方案集合
+        """
+        post_data = {
+            'step': 0,
+            'sort': 'new',
+            'tags': tag.lower(),
+            'timeframe': ''
+        }
+        items = WebService.iter_feed_items(
+            post_data, limit=limit, referer=f'https://colorhunt.co/palettes/{tag.lower()}',
+            timeout=15, max_pages=max_pages
+        )
+        batch = PaletteBatch()
+        for i, item in enumerate(items):
+            palette = WebService.tag_item_to_palette(tag, item, i)
+            if palette:
+                batch.append(palette)
+        return batch
+    
+    @staticmethod
+    def store_tag_palettes(tag: str, limit: Optional[int] = 100, max_pages: Optional[int] = None,
+                           repository: Optional[PaletteRepository] = None) -> Tuple[bool, Optional[str], Optional[int]]:
+        """
+        按标签抓取配色方案并批量写入本地配色方案库
+        
+        Args:
+            tag: 标签名称
+            limit: 最多抓取的配色方案数量，为None时遍历所有分页
+            max_pages: 最多请求的页数，为None时不限制
+            repository: 配色方案库，为None时使用进程内共享的默认库
+            
+        Returns:
+            Tuple[bool, Optional[str], Optional[int]]: (是否成功, 错误信息, 写入的配色方案数量)
+        """
+        try:
+            try:
+                batch = WebService.collect_tag_palettes(tag, limit, max_pages)
+            except FeedRequestError as e:
+                return False, f"API请求失败，状态码: {e.status_code}", None
+            except json.JSONDecodeError as e:
+                return False, f"解析API响应失败: {e}", None
+            
+            if not len(batch):
+                return False, f"API未返回任何 {tag} 标签的配色方案", None
+            
+            stored = (repository or get_palette_repository()).upsert(batch, tag=tag)
+            logger.info(f"已将 {stored} 个 {tag} 标签的配色方案写入本地配色方案库")
+            return True, None, stored
+            
+        except requests.RequestException as e:
+            error_msg = f"API请求 {tag} 标签网络错误: {e}"
+            logger.warning(error_msg)
+            return False, error_msg, None
+        except Exception as e:
+            error_msg = f"保存 {tag} 标签配色方案时出错: {str(e)}"
+            logger.exception(error_msg)
+            return False, error_msg, None
+    
     @staticmethod
     def scrape_colorhunt_by_tag(tag: str, limit: int = 5) -> Tuple[bool, Optional[str], Optional[List[Dict]]]:
         """
@@ -1009,105 +1317,18 @@ class WebService:
         try:
             logger.info(f"开始通过API抓取 {tag} 标签的配色方案")
             
-            # ColorHunt的API端点
-            api_url = "https://colorhunt.co/php/feed.php"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-                'Accept': 'application/json, text/html, */*',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Referer': f'https://colorhunt.co/palettes/{tag.lower()}'
-            }
-            
-            # API请求参数
-            post_data = {
-                'step': 0,
-                'sort': 'new',  # 可以是 'new', 'popular', 'random'
-                'tags': tag.lower(),
-                'timeframe': ''  # 用于popular排序的时间范围
-            }
-            
-            logger.info(f"请求API: {api_url} with tags={tag}")
-            response = requests.post(api_url, headers=headers, data=post_data, timeout=15)
-            
-            if response.status_code != 200:
-                logger.warning(f"API请求失败, 状态码: {response.status_code}")
-                return False, f"API请求失败，状态码: {response.status_code}", None
-            
-            # 解析JSON响应
+            # 逐页请求API，达到limit后停止翻页
             try:
-                palette_data_list = json.loads(response.text)
-                logger.info(f"API返回 {len(palette_data_list)} 个配色方案")
-                
-                if not palette_data_list:
-                    return False, f"API未返回任何 {tag} 标签的配色方案", None
-                
+                extracted_palettes = list(WebService.iter_tag_palettes(tag, limit))
+            except FeedRequestError as e:
+                logger.warning(f"API请求失败, 状态码: {e.status_code}")
+                return False, f"API请求失败，状态码: {e.status_code}", None
             except json.JSONDecodeError as e:
                 logger.warning(f"解析API响应JSON失败: {e}")
-                logger.warning(f"响应内容: {response.text[:200]}...")
                 return False, f"解析API响应失败: {e}", None
             
-            # 处理配色方案数据
-            extracted_palettes = []
-            
-            for i, item in enumerate(palette_data_list[:limit]):
-                try:
-                    # 提取基本信息
-                    code = item.get('code', '')
-                    likes = item.get('likes', 0)
-                    date = item.get('date', '')
-                    
-                    if not code or len(code) != 24:
-                        logger.warning(f"无效的配色方案代码: {code}")
-                        continue
-                    
-                    # 从代码中提取颜色
-                    colors = []
-                    for j in range(4):
-                        hex_color = f"#{code[j*6:(j+1)*6].upper()}"
-                        colors.append(hex_color)
-                    
-                    # 构建配色方案URL
-                    palette_url = f"https://colorhunt.co/palette/{code}"
-                    
-                    # 创建配色方案数据
-                    palette_data = {
-                        "id": f"{tag}-api-{i+1}-{code}",
-                        "name": f"{tag.title()} Palette {i+1}",
-                        "colors": colors,
-                        "source": "colorhunt.co",
-                        "source_url": palette_url,
-                        "palette_id": code,
-                        "likes": likes,
-                        "date": date,
-                        "tags": [f"{tag.title()} (API标签)", "ColorHunt"],
-                        "author": "ColorHunt用户",
-                        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "extraction_success": True,
-                        "metadata": {
-                            "colors_extracted_method": "API直接获取 (准确)",
-                            "has_detailed_info": True,
-                            "response_status": response.status_code,
-                            "page_title": f"{tag.title()} Color Palettes - Color Hunt",
-                            "extraction_notes": f"通过API获取，点赞数: {likes}, 日期: {date}",
-                            "tag_source": f"从 {tag} 标签API提取",
-                            "tag_page_url": f"https://colorhunt.co/palettes/{tag.lower()}",
-                            "api_endpoint": api_url,
-                            "api_response": "JSON格式"
-                        }
-                    }
-                    
-                    extracted_palettes.append(palette_data)
-                    logger.info(f"成功处理配色方案: {code}, 点赞数: {likes}")
-                    
-                except Exception as e:
-                    logger.warning(f"处理配色方案数据时出错: {e}")
-                    continue
-            
             if not extracted_palettes:
-                return False, f"未能处理任何 {tag} 标签的配色方案数据", None
+                return False, f"API未返回任何 {tag} 标签的配色方案", None
             
             logger.info(f"成功通过API提取到 {len(extracted_palettes)} 个 {tag} 标签的配色方案")
             return True, None, extracted_palettes
@@ -1123,4 +1344,59 @@ class WebService:
         except Exception as e:
             error_msg = f"抓取 {tag} 标签配色方案时出错: {str(e)}"
             logger.exception(error_msg)
-            return False, error_msg, None 
\ No newline at end of file
+            return False, error_msg, None
+    
+    @staticmethod
+    def tag_item_to_palette(tag: str, item: Dict, i: int, status_code: int = 200) -> Optional[Palette]:
+        """
+        将标签feed接口返回的单个配色方案转换为紧凑的 Palette 对象
+        
+        Args:
+            tag: 标签名称
+            item: feed接口返回的单个配色方案
+            i: 在标签结果中的序号，用于生成ID和名称
+            status_code: feed请求的HTTP状态码
+            
+        Returns:
+            Optional[Palette]: 配色方案，配色代码无效时返回None
+        """
+        code = item.get('code', '')
+        rgb = Palette.pack_code(code)
+        if rgb is None:
+            logger.warning(f"无效的配色方案代码: {code}")
+            return None
+        return Palette(
+            rgb,
+            likes=WebService._parse_likes(item.get('likes', 0)),
+            date=item.get('date') or '',
+            idx=i,
+            kind=Palette.KIND_TAG,
+            tag=tag,
+            status_code=status_code,
+        )
+    
+    @staticmethod
+    def build_tag_palette(tag: str, item: Dict, i: int, status_code: int = 200) -> Optional[Dict]:
+        """
+        将标签feed接口返回的单个配色方案转换为配色方案数据
+        
+        Args:
+            tag: 标签名称
+            item: feed接口返回的单个配色方案
+            i: 在标签结果中的序号，用于生成ID和名称
+            status_code: feed请求的HTTP状态码
+            
+        Returns:
+            Optional[Dict]: 配色方案数据，配色代码无效时返回None
+        """
+        try:
+            palette = WebService.tag_item_to_palette(tag, item, i, status_code)
+            if palette is None:
+                return None
+            
+            logger.info(f"成功处理配色方案: {palette.code}, 点赞数: {palette.likes}")
+            return palette.to_dict()
+            
+        except Exception as e:
+            logger.warning(f"处理配色方案数据时出错: {e}")
+            return None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+目录批量提取配色方案测试
+"""
+import os
+import sys
+import json
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'tools', 'generators'))
+
+from color_palette_generator import batch_extract_images, iter_image_files
+
+
+def make_library(root):
+    """创建包含子目录、重复图片和损坏图片的图片目录"""
+    os.makedirs(os.path.join(root, 'sub'))
+    colors = [(200, 30, 30), (30, 200, 30), (30, 30, 200)]
+    for i, color in enumerate(colors):
+        pixels = np.concatenate([np.full((20, 40, 3), color, np.uint8), np.full((10, 40, 3), (120, 90, 60), np.uint8)])
+        Image.fromarray(pixels).save(os.path.join(root, f'image_{i}.png'))
+    Image.fromarray(np.full((20, 20, 3), (200, 30, 30), np.uint8)).save(os.path.join(root, 'sub', 'photo.jpg'))
+    # 与 image_0.png 内容相同
+    with open(os.path.join(root, 'image_0.png'), 'rb') as src, open(os.path.join(root, 'sub', 'copy.png'), 'wb') as dst:
+        dst.write(src.read())
+    with open(os.path.join(root, 'sub', 'broken.png'), 'wb') as f:
+        f.write(b'not an image')
+    with open(os.path.join(root, 'notes.txt'), 'w') as f:
+        f.write('skip me')
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_batch_extract_and_skip_known(tmp_path):
+    """首次运行提取所有图片，重复内容和已有结果在之后的运行中被跳过"""
+    root = str(tmp_path / 'images')
+    make_library(root)
+    assert len(list(iter_image_files(root))) == 6
+
+    jsonl_path = str(tmp_path / 'out' / 'palettes.jsonl')
+    stats = batch_extract_images(root, jsonl_path, num_colors=2, max_workers=2)
+    assert (stats['processed'], stats['skipped'], stats['failed']) == (4, 1, 1)
+
+    records = read_jsonl(jsonl_path)
+    assert len(records) == 4
+    by_name = {os.path.basename(r['source_image']): r for r in records}
+    assert by_name.get('image_0.png', by_name.get('copy.png'))['colors'] == ['#c81e1e', '#785a3c']
+    for record in records:
+        assert record['id'] == f"image-{record['content_hash'][:8]}"
+        assert record['extract_options'] == {'mode': 'frequency', 'num_colors': 2, 'quantize_bits': 8}
+
+    # 再次运行时全部跳过
+    stats = batch_extract_images(root, jsonl_path, num_colors=2, max_workers=2)
+    assert (stats['processed'], stats['skipped'], stats['failed']) == (0, 5, 1)
+
+    # 提取参数不同时重新提取
+    stats = batch_extract_images(root, jsonl_path, num_colors=3, max_workers=1)
+    assert stats['processed'] == 4
+    assert len(read_jsonl(jsonl_path)) == 8
+
+
+def test_batch_extract_recovers_truncated_file(tmp_path):
+    """结果文件最后一行不完整时忽略该行并继续追加"""
+    root = str(tmp_path / 'images')
+    make_library(root)
+    jsonl_path = str(tmp_path / 'palettes.jsonl')
+    batch_extract_images(root, jsonl_path, num_colors=2, max_workers=1)
+
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(jsonl_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+        f.write(lines[-1][:20])
+
+    stats = batch_extract_images(root, jsonl_path, num_colors=2, max_workers=1)
+    assert stats['processed'] == 1
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    assert len(lines) == 5
+    assert json.loads(lines[-1])['colors']
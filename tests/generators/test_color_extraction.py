@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+图片主要颜色提取测试，对比向量化实现与逐像素统计实现
+"""
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'tools', 'generators'))
+
+from color_palette_generator import PaletteImageGenerator, DEFAULT_PALETTE_COLORS
+
+
+def photo_like(seed, size=(300, 240)):
+    """带噪声的渐变图片，颜色种类多，频率接近"""
+    rng = np.random.default_rng(seed)
+    h, w = size[1], size[0]
+    y, x = np.mgrid[0:h, 0:w]
+    img = np.stack([x * 255 // w, y * 255 // h, (x + y) * 255 // (w + h)], axis=-1).astype(np.int16)
+    img += rng.integers(-25, 25, img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def banded(colors, band=10):
+    """由若干纯色条组成的图片，用于检查频率相同的颜色的顺序"""
+    return np.concatenate([np.full((band, 50, 3), color, dtype=np.uint8) for color in colors])
+
+
+def test_numpy_selection_matches_python():
+    """精确统计时向量化选择结果与逐像素实现相同"""
+    images = [photo_like(seed) for seed in range(5)]
+    images.append(banded([(200, 30, 30), (30, 200, 30), (250, 250, 250), (5, 5, 5), (205, 35, 35), (30, 30, 200)]))
+    images.append(banded([(120, 60, 20)] * 3 + [(20, 60, 120)] * 3 + [(60, 120, 20)]))
+    for pixels in images:
+        for num_colors in (1, 4, 6):
+            expected = PaletteImageGenerator._select_colors_python([tuple(p) for p in pixels.reshape(-1, 3).tolist()],
+                                                                   num_colors)
+            assert PaletteImageGenerator._select_colors_numpy(pixels, num_colors) == expected
+
+
+def test_extract_from_files(tmp_path):
+    """从文件提取颜色，支持调色板和透明通道模式，颜色不足时补充默认颜色"""
+    pixels = banded([(200, 30, 30), (30, 200, 30)])
+    rgb_path = str(tmp_path / 'bands.png')
+    Image.fromarray(pixels).save(rgb_path)
+    rgba_path = str(tmp_path / 'bands_rgba.png')
+    Image.fromarray(pixels).convert('RGBA').save(rgba_path)
+    p_path = str(tmp_path / 'bands_p.png')
+    Image.fromarray(pixels).convert('P', palette=Image.Palette.ADAPTIVE).save(p_path)
+
+    expected = ['#c81e1e', '#1ec81e'] + DEFAULT_PALETTE_COLORS[:2]
+    for path in (rgb_path, rgba_path, p_path):
+        assert PaletteImageGenerator.extract_colors_from_image(path, 4) == expected
+
+    # 默认颜色用完后不再循环
+    assert len(PaletteImageGenerator.extract_colors_from_image(rgb_path, 8)) == 6
+
+
+def test_quantized_counting_merges_near_shades():
+    """量化统计将相近色合并，以合并像素的平均色作为结果"""
+    rng = np.random.default_rng(0)
+    # 大量略有差异的红色像素和少量完全相同的蓝色像素
+    reds = np.clip(np.array([200, 40, 40]) + rng.integers(-3, 4, (900, 3)), 0, 255)
+    blues = np.tile([40, 40, 200], (100, 1))
+    pixels = np.concatenate([blues, reds]).astype(np.uint8).reshape(-1, 10, 3)
+
+    assert PaletteImageGenerator._select_colors_numpy(pixels, 1)[0] == '#2828c8'
+    red = PaletteImageGenerator._select_colors_numpy(pixels, 1, quantize_bits=4)[0]
+    r, g, b = PaletteImageGenerator.hex_to_rgb(red)
+    assert abs(r - 200) <= 3 and abs(g - 40) <= 3 and abs(b - 40) <= 3
+
+
+def noisy_regions(centres, size=60, noise=12, seed=0):
+    """由若干带噪声的色块组成的图片，色块面积依次递减"""
+    rng = np.random.default_rng(seed)
+    blocks = []
+    for i, centre in enumerate(centres):
+        rows = size - i * 10
+        block = np.array(centre) + rng.integers(-noise, noise + 1, (rows, size, 3))
+        blocks.append(np.clip(block, 0, 255))
+    return np.concatenate(blocks).astype(np.uint8)
+
+
+def test_lab_clustering_recovers_region_colours():
+    """k-means按面积返回接近各色块中心的颜色"""
+    centres = [(200, 60, 60), (60, 160, 90), (70, 80, 200)]
+    pixels = noisy_regions(centres)
+
+    colors = PaletteImageGenerator._cluster_colors_lab(pixels, 3, 'kmeans')
+    assert len(colors) == 3
+    for color, centre in zip(colors, centres):
+        rgb = PaletteImageGenerator.hex_to_rgb(color)
+        assert max(abs(a - b) for a, b in zip(rgb, centre)) <= 3, (color, centre)
+
+    assert len(set(PaletteImageGenerator._cluster_colors_lab(pixels, 3, 'median-cut'))) == 3
+
+
+def test_lab_clustering_handles_few_colours():
+    """不同颜色少于请求数量时不返回重复颜色"""
+    pixels = banded([(200, 30, 30), (200, 30, 30), (30, 200, 30)])
+    assert PaletteImageGenerator._cluster_colors_lab(pixels, 4, 'kmeans') == ['#c81e1e', '#1ec81e']
+    assert PaletteImageGenerator._cluster_colors_lab(banded([(255, 255, 255)]), 4, 'kmeans') == []
+
+
+def test_extract_mode_option(tmp_path):
+    """extract_colors_from_image 通过 mode 选择聚类模式，未知模式报错"""
+    path = str(tmp_path / 'regions.png')
+    Image.fromarray(noisy_regions([(200, 60, 60), (60, 160, 90)])).save(path)
+    colors = PaletteImageGenerator.extract_colors_from_image(path, 2, mode='kmeans')
+    assert len(colors) == 2 and colors[0] != colors[1]
+    try:
+        PaletteImageGenerator.extract_colors_from_image(path, 2, mode='unknown')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("未知模式应抛出ValueError")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+配色方案拼图及索引测试
+"""
+import os
+import sys
+import json
+
+from PIL import Image, ImageChops
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'tools', 'generators'))
+
+from color_palette_generator import (PaletteImageGenerator, get_palette_renderer, render_json_atlas,
+                                     load_atlas_tile)
+
+
+def make_palettes(count):
+    return [{"id": f"p{i}", "colors": ["#503a65", "#574f7d", "#95b8d1", f"#{i * 4099:06x}"]} for i in range(count)]
+
+
+def test_atlas_index_and_tiles(tmp_path):
+    """拼图按布局分为多张，索引中的矩形区域与单独绘制的配色方案相同"""
+    palettes = make_palettes(11)
+    palettes.append({"id": "p0", "colors": ["#000000"]})      # 重复ID保留第一个
+    palettes.append({"id": "empty", "colors": []})
+
+    index_path = PaletteImageGenerator.create_palette_atlas(palettes, str(tmp_path), tile_width=200,
+                                                            tile_height=100, columns=3, max_tiles=6)
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    assert [sheet["file"] for sheet in index["sheets"]] == ["palette_atlas_1.png", "palette_atlas_2.png"]
+    assert (index["sheets"][0]["width"], index["sheets"][0]["height"]) == (600, 200)
+    assert (index["sheets"][1]["width"], index["sheets"][1]["height"]) == (600, 200)
+    assert sorted(index["palettes"]) == sorted(p["id"] for p in palettes[:11])
+    assert index["palettes"]["p7"] == {"sheet": 1, "x": 200, "y": 0, "w": 200, "h": 100,
+                                       "colors": palettes[7]["colors"]}
+
+    renderer = get_palette_renderer(200, 100)
+    for palette in palettes[:11]:
+        tile = load_atlas_tile(index_path, palette["id"])
+        assert ImageChops.difference(tile, renderer.render(palette["colors"])).getbbox() is None
+    assert load_atlas_tile(index_path, "missing") is None
+
+    # 最后一张拼图未填满的位置为白色
+    with Image.open(os.path.join(str(tmp_path), "palette_atlas_2.png")) as sheet:
+        assert sheet.getpixel((599, 199)) == (255, 255, 255)
+
+
+def test_atlas_from_json_directory(tmp_path):
+    """从JSON目录生成拼图，无法读取的文件被跳过，没有ID的文件使用文件名"""
+    for palette in make_palettes(3):
+        with open(os.path.join(str(tmp_path), f"colorhunt_{palette['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(palette, f)
+    with open(os.path.join(str(tmp_path), "colorhunt_noid.json"), 'w', encoding='utf-8') as f:
+        json.dump({"colors": ["#FFFFFF"]}, f)
+    with open(os.path.join(str(tmp_path), "colorhunt_bad.json"), 'w', encoding='utf-8') as f:
+        f.write('{broken')
+
+    index_path = render_json_atlas(str(tmp_path), str(tmp_path / 'atlas'))
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    assert sorted(index["palettes"]) == ["colorhunt_noid", "p0", "p1", "p2"]
+    assert len(index["sheets"]) == 1
+
+    assert PaletteImageGenerator.create_palette_atlas([], str(tmp_path / 'empty')) is None
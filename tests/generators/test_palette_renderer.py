@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+配色方案图片绘制器测试，与原来逐块绘制的结果逐像素对比
+"""
+import io
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont, ImageChops, features
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'tools', 'generators'))
+
+from color_palette_generator import PaletteImageGenerator, PaletteRenderer, get_palette_renderer
+
+
+def reference_render(colors, width=800, height=400):
+    """原 create_palette_image 的绘制过程"""
+    img = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(img)
+    color_height = height // len(colors)
+    for i, color in enumerate(colors):
+        try:
+            if not color.startswith('#'):
+                color = f"#{color}"
+            if len(color) != 7:
+                continue
+            y0 = i * color_height
+            y1 = (i + 1) * color_height
+            draw.rectangle([(0, y0), (width, y1)], fill=color)
+            try:
+                r, g, b = PaletteImageGenerator.hex_to_rgb(color)
+                text_color = "white" if (r + g + b) < 382 else "black"
+                font_size = 24
+                try:
+                    font = ImageFont.truetype("Arial", font_size)
+                except IOError:
+                    font = ImageFont.load_default()
+                text_pos = (20, y0 + (color_height - font_size) // 2)
+                draw.text(text_pos, color, fill=text_color, font=font)
+            except Exception:
+                pass
+        except Exception:
+            pass
+    return img
+
+
+CASES = [
+    (["#503a65", "#574f7d", "#95b8d1", "#b8e0d4"], 800, 400),
+    (["#FFFFFF", "#000000", "#F0BB78"], 800, 400),          # 高度不能整除
+    (["503a65", "#abc", "#95b8d1", "#GGGGGG", "#b8e0d4"], 800, 400),   # 无#前缀和无效颜色
+    (["#503a65", "#574f7d"], 300, 41),
+    (["#%02x%02x%02x" % (i * 8, 255 - i * 8, 128) for i in range(30)], 800, 400),   # 颜色块比文字矮
+    (["#503a65"], 64, 16),
+]
+
+
+def test_renderer_is_pixel_identical():
+    """相同输入的绘制结果与原实现逐像素相同，重复绘制（命中缓存）结果不变"""
+    for colors, width, height in CASES:
+        renderer = PaletteRenderer(width, height)
+        expected = reference_render(colors, width, height)
+        for _ in range(2):
+            image = renderer.render(colors)
+            assert ImageChops.difference(image, expected).getbbox() is None, (colors, width, height)
+
+
+def test_font_loaded_once(monkeypatch):
+    """绘制多张图片只加载一次字体"""
+    calls = []
+    original = ImageFont.truetype
+
+    def counting_truetype(font=None, *args, **kwargs):
+        # 新版本Pillow的 load_default 内部同样调用 truetype，只统计按名称加载字体的次数
+        if font == "Arial":
+            calls.append(font)
+        return original(font, *args, **kwargs)
+
+    monkeypatch.setattr(ImageFont, 'truetype', counting_truetype)
+    renderer = PaletteRenderer()
+    for i in range(10):
+        renderer.render(["#503a65", "#574f7d", "#95b8d1", "#%06x" % i])
+    assert len(calls) == 1
+
+
+def test_create_palette_image_uses_shared_renderer(tmp_path):
+    """create_palette_image 保存的图片与原实现相同"""
+    colors = ["#503a65", "#574f7d", "#95b8d1", "#b8e0d4"]
+    path = PaletteImageGenerator.create_palette_image(colors, "same", str(tmp_path))
+    with Image.open(path) as saved:
+        assert ImageChops.difference(saved.convert('RGB'), reference_render(colors)).getbbox() is None
+    assert get_palette_renderer() is get_palette_renderer(800, 400)
+
+
+def test_palette_mode_keeps_band_colors():
+    """调色板模式只包含颜色块、白色和黑色，颜色块与RGB模式相同"""
+    colors = ["#503a65", "#574f7d", "#95b8d1", "#b8e0d4"]
+    renderer = PaletteRenderer()
+    image = renderer.render(colors, palette_mode=True)
+    assert image.mode == 'P'
+    assert len(image.getcolors()) <= len(colors) + 2
+
+    rgb = image.convert('RGB')
+    for i, color in enumerate(colors):
+        assert rgb.getpixel((700, i * 100 + 50)) == PaletteImageGenerator.hex_to_rgb(color)
+    assert ImageChops.difference(rgb.crop((200, 0, 800, 400)), renderer.render(colors).crop((200, 0, 800, 400))).getbbox() is None
+
+
+def test_encoded_formats_decode_to_render():
+    """PNG和无损WebP解码后与绘制结果相同，P模式PNG更小"""
+    colors = ["#503a65", "#574f7d", "#95b8d1", "#b8e0d4"]
+    renderer = PaletteRenderer()
+    expected = renderer.render(colors)
+
+    png = renderer.encode(colors)
+    with Image.open(io.BytesIO(png)) as decoded:
+        assert decoded.format == 'PNG'
+        assert ImageChops.difference(decoded.convert('RGB'), expected).getbbox() is None
+    assert len(renderer.encode(colors, palette_mode=True)) < len(png)
+
+    if features.check('webp'):
+        with Image.open(io.BytesIO(renderer.encode(colors, 'webp'))) as decoded:
+            assert decoded.format == 'WEBP'
+            assert ImageChops.difference(decoded.convert('RGB'), expected).getbbox() is None
+
+    with pytest.raises(ValueError):
+        renderer.encode(colors, 'gif')
+
+
+def test_svg_output():
+    """SVG输出与图片布局相同，无效颜色被跳过"""
+    renderer = PaletteRenderer(800, 300)
+    root = ET.fromstring(renderer.render_svg(["503a65", "#abc", "#GGGGGG"]))
+    ns = '{http://www.w3.org/2000/svg}'
+    rects = root.findall(f'{ns}rect')
+    texts = root.findall(f'{ns}text')
+
+    assert (root.get('width'), root.get('height')) == ('800', '300')
+    assert [(r.get('y'), r.get('height'), r.get('fill')) for r in rects[1:]] == [('0', '100', '#503a65')]
+    assert [(t.text, t.get('fill'), t.get('x')) for t in texts] == [('#503a65', 'white', '20')]
+
+
+def test_create_palette_image_formats(tmp_path):
+    """输出格式决定文件扩展名"""
+    colors = ["#503a65", "#574f7d"]
+    svg_path = PaletteImageGenerator.create_palette_image(colors, "v", str(tmp_path), image_format='svg')
+    assert svg_path.endswith('colorhunt_v.svg')
+    with open(svg_path, 'r', encoding='utf-8') as f:
+        assert f.read().startswith('<svg')
+
+    png_path = PaletteImageGenerator.create_palette_image(colors, "p", str(tmp_path), palette_mode=True,
+                                                          compress_level=9)
+    with Image.open(png_path) as saved:
+        assert saved.mode == 'P'
+    assert PaletteImageGenerator.create_palette_image(colors, "x", str(tmp_path), image_format='gif') is None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+JSON配色方案批量生成图片测试（并行与增量模式）
+"""
+import os
+import sys
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(ROOT, 'tools', 'generators'))
+
+import color_palette_generator
+from color_palette_generator import render_json_directory, process_all_json_files, RENDER_MANIFEST_FILE
+
+
+def write_palettes(json_dir, count, start=0):
+    os.makedirs(json_dir, exist_ok=True)
+    for i in range(start, start + count):
+        data = {"id": f"p{i}", "colors": ["#503a65", "#574f7d", "#95b8d1", f"#{i:06x}"]}
+        with open(os.path.join(json_dir, f"colorhunt_{i}.json"), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+
+def test_incremental_render(tmp_path):
+    """第二次运行跳过未变化的文件，只重新生成内容变化或图片缺失的文件"""
+    json_dir = str(tmp_path / 'json')
+    out_dir = str(tmp_path / 'images')
+    write_palettes(json_dir, 5)
+
+    stats = render_json_directory(json_dir, out_dir, max_workers=1)
+    assert (stats['total'], stats['rendered'], stats['unchanged'], stats['failed']) == (5, 5, 0, 0)
+    assert os.path.exists(os.path.join(out_dir, RENDER_MANIFEST_FILE))
+    assert sorted(os.listdir(out_dir)) == sorted([RENDER_MANIFEST_FILE] + [f"colorhunt_p{i}.png" for i in range(5)])
+
+    stats = render_json_directory(json_dir, out_dir, max_workers=1)
+    assert (stats['rendered'], stats['unchanged']) == (0, 5)
+
+    # 修改内容、仅更新修改时间、删除图片、新增文件
+    with open(os.path.join(json_dir, 'colorhunt_0.json'), 'w', encoding='utf-8') as f:
+        json.dump({"id": "p0", "colors": ["#000000"]}, f)
+    os.utime(os.path.join(json_dir, 'colorhunt_1.json'), ns=(1, 1))
+    os.remove(os.path.join(out_dir, 'colorhunt_p2.png'))
+    write_palettes(json_dir, 1, start=5)
+
+    stats = render_json_directory(json_dir, out_dir, max_workers=1)
+    assert (stats['total'], stats['rendered'], stats['unchanged']) == (6, 3, 3)
+
+    # 非增量模式全部重新生成
+    stats = render_json_directory(json_dir, out_dir, incremental=False, max_workers=1)
+    assert stats['rendered'] == 6
+
+
+def test_parallel_render_matches_serial(tmp_path, monkeypatch):
+    """进程池渲染与串行渲染生成相同的图片"""
+    monkeypatch.setattr(color_palette_generator, 'RENDER_CHUNK_SIZE', 4)
+    json_dir = str(tmp_path / 'json')
+    write_palettes(json_dir, 12)
+    with open(os.path.join(json_dir, 'colorhunt_bad.json'), 'w') as f:
+        f.write('{broken')
+
+    serial = render_json_directory(json_dir, str(tmp_path / 'serial'), max_workers=1)
+    parallel = render_json_directory(json_dir, str(tmp_path / 'parallel'), max_workers=2)
+    assert (parallel['rendered'], parallel['failed']) == (serial['rendered'], serial['failed']) == (12, 1)
+
+    for i in range(12):
+        name = f"colorhunt_p{i}.png"
+        with open(tmp_path / 'serial' / name, 'rb') as a, open(tmp_path / 'parallel' / name, 'rb') as b:
+            assert a.read() == b.read()
+
+    assert process_all_json_files(json_dir, str(tmp_path / 'parallel'), max_workers=2) == 12
+
+
+def test_output_options_change_rerenders(tmp_path):
+    """输出参数变化时重新生成，旧清单条目视为默认参数生成"""
+    json_dir = str(tmp_path / 'json')
+    out_dir = str(tmp_path / 'images')
+    write_palettes(json_dir, 3)
+
+    render_json_directory(json_dir, out_dir, max_workers=1)
+    manifest_path = os.path.join(out_dir, RENDER_MANIFEST_FILE)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for entry in manifest["files"].values():
+        del entry["options"]
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    assert render_json_directory(json_dir, out_dir, max_workers=1)['unchanged'] == 3
+
+    stats = render_json_directory(json_dir, out_dir, max_workers=1, image_format='svg')
+    assert stats['rendered'] == 3
+    assert os.path.exists(os.path.join(out_dir, 'colorhunt_p0.svg'))
+    assert render_json_directory(json_dir, out_dir, max_workers=1, image_format='svg')['unchanged'] == 3
+
+    assert render_json_directory(json_dir, out_dir, max_workers=1, palette_mode=True)['rendered'] == 3
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+AsyncWebService 异步抓取测试
+替换底层请求方法，不访问真实网络
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.async_web_service import AsyncWebService
+from services.feed_cache import FeedCache
+from services.web_service import WebService, COLORHUNT_TAGS
+
+SAMPLE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           'palette_page.html')
+
+
+def make_fake_request(delay: float = 0.0):
+    """构造伪造的 _request 协程：feed接口按标签返回代码，网页返回保存的页面"""
+    with open(SAMPLE_PAGE, 'r', encoding='utf-8') as f:
+        page_html = f.read()
+
+    async def fake_request(method, url, headers, data=None, timeout=None):
+        await asyncio.sleep(delay)
+        if method == 'POST':
+            idx = COLORHUNT_TAGS.index(data['tags'])
+            return 200, json.dumps([{'code': f"{idx:024x}", 'likes': str(idx), 'date': '1 hour'}]), {}
+        return 200, page_html, {}
+
+    return fake_request
+
+
+def test_get_palette_urls_runs_concurrently():
+    """所有分类并发请求，结果按分类顺序排列"""
+    service = AsyncWebService(use_feed_cache=False)
+    service._request = make_fake_request(delay=0.05)
+
+    start = time.perf_counter()
+    urls = asyncio.run(service.get_palette_urls())
+    elapsed = time.perf_counter() - start
+
+    assert urls == [f"https://colorhunt.co/palette/{i:024x}" for i in range(len(COLORHUNT_TAGS))]
+    assert elapsed < 0.05 * len(COLORHUNT_TAGS) / 4
+
+
+def test_scrape_by_tag_matches_sync_format():
+    """异步标签抓取与同步版本生成相同结构的数据"""
+    service = AsyncWebService(use_feed_cache=False)
+    service._request = make_fake_request()
+
+    success, error, palettes = asyncio.run(service.scrape_colorhunt_by_tag('summer', 1))
+
+    assert success and error is None
+    idx = COLORHUNT_TAGS.index('summer')
+    expected = WebService.build_tag_palette('summer', {'code': f"{idx:024x}", 'likes': str(idx), 'date': '1 hour'}, 0)
+    assert len(palettes) == 1
+    palettes[0].pop('timestamp')
+    expected.pop('timestamp')
+    assert palettes[0] == expected
+
+
+def test_extract_palette_matches_sync_parser():
+    """异步页面提取结果与 WebService.parse_palette_page 一致"""
+    service = AsyncWebService(use_feed_cache=False)
+    service._request = make_fake_request()
+    url = "https://colorhunt.co/palette/626f47a4b465f5ecd5f0bb78"
+
+    palette = asyncio.run(service.extract_palette_data_from_url(url, 0))
+    with open(SAMPLE_PAGE, 'r', encoding='utf-8') as f:
+        expected = WebService.parse_palette_page(url, f.read(), 0, 200)
+
+    palette.pop('timestamp')
+    expected.pop('timestamp')
+    assert palette == expected
+
+
+def test_failed_feed_returns_error_tuple():
+    """feed接口失败时返回错误信息而不是抛出异常"""
+    service = AsyncWebService(use_feed_cache=False)
+
+    async def failing_request(method, url, headers, data=None, timeout=None):
+        return 503, '', {}
+
+    service._request = failing_request
+    success, error, palettes = asyncio.run(service.scrape_colorhunt_by_tag('summer', 3))
+    assert not success and palettes is None
+    assert '503' in error
+
+
+def test_feed_cache_runs_off_event_loop(tmp_path):
+    """feed缓存的读写在线程中执行，第二次请求命中缓存"""
+    cache = FeedCache(str(tmp_path / 'cache.db'))
+    service = AsyncWebService(feed_cache=cache)
+    fake_request = make_fake_request()
+    requests = []
+    cache_threads = []
+
+    async def counting_request(method, url, headers, data=None, timeout=None):
+        requests.append(data['tags'])
+        return await fake_request(method, url, headers, data, timeout)
+
+    for name in ('get', 'put'):
+        original = getattr(cache, name)
+
+        def recorded(*args, _original=original):
+            cache_threads.append(threading.get_ident())
+            return _original(*args)
+
+        setattr(cache, name, recorded)
+    service._request = counting_request
+
+    async def run():
+        post_data = {'step': 0, 'sort': 'new', 'tags': 'summer', 'timeframe': ''}
+        first = await service.post_feed(post_data)
+        second = await service.post_feed(post_data)
+        return threading.get_ident(), first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    cache.close()
+
+    assert first == second and first[0] == 200
+    assert requests == ['summer']
+    assert len(cache_threads) == 3 and loop_thread not in cache_threads
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+向量化颜色标签推断测试，与原有的逐颜色判断实现对比
+"""
+import os
+import sys
+import itertools
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import services.color_tagger as color_tagger
+from services.color_tagger import ColorTagger, ColorTagLUT, RULE_SET_BASIC, RULE_SET_DETAILED, parse_hex_colors
+from services.web_service import WebService
+from models.palette import Palette, PaletteBatch
+
+# 覆盖所有规则阈值两侧的通道取值
+EDGE_VALUES = [0, 59, 60, 61, 79, 80, 81, 89, 90, 91, 99, 100, 101, 119, 120, 121, 129, 130, 131,
+               149, 150, 151, 179, 180, 181, 199, 200, 201, 229, 230, 231, 239, 240, 241, 254, 255]
+
+REFERENCE_RULES = {
+    'green': lambda r, g, b: g > r and g > b and g > 100,
+    'sage': lambda r, g, b: 90 <= r <= 120 and 100 <= g <= 130 and 60 <= b <= 80,
+    'beige': lambda r, g, b: r > 200 and g > 200 and b > 180 and abs(r-g) < 30,
+    'earth': lambda r, g, b: (r > g > b) or (r > 100 and g > 80 and b < 100),
+    'nature': lambda r, g, b: g > r or g > b,
+    'warm': lambda r, g, b: r > 150 or (r > g and r > b),
+    'light': lambda r, g, b: r > 200 and g > 200 and b > 200,
+    'pastel': lambda r, g, b: min(r, g, b) > 150 and max(r, g, b) < 255,
+    'vintage': lambda r, g, b: max(r, g, b) - min(r, g, b) < 100 and max(r, g, b) < 200,
+    'dark': lambda r, g, b: max(r, g, b) < 100,
+    'bright': lambda r, g, b: max(r, g, b) > 200 and (max(r, g, b) - min(r, g, b)) > 100,
+    'muted': lambda r, g, b: (max(r, g, b) - min(r, g, b)) < 50,
+    'blue': lambda r, g, b: b > r and b > g and b > 100,
+    'red': lambda r, g, b: r > g and r > b and r > 150,
+    'yellow': lambda r, g, b: r > 200 and g > 200 and b < 150,
+    'orange': lambda r, g, b: r > 200 and g > 150 and b < 100,
+    'purple': lambda r, g, b: r > 100 and b > 100 and g < min(r, b),
+    'pink': lambda r, g, b: r > 200 and b > 150 and g < r,
+    'brown': lambda r, g, b: r > g > b and r < 150 and g < 120,
+    'gray': lambda r, g, b: abs(r-g) < 20 and abs(g-b) < 20 and abs(r-b) < 20,
+    'cream': lambda r, g, b: r > 240 and g > 230 and b > 200,
+    'gold': lambda r, g, b: r > 200 and g > 180 and b < 100,
+    'sky': lambda r, g, b: b > r and b > g and b > 150 and r < 200,
+    'ocean': lambda r, g, b: b > g > r and b > 100,
+    'forest': lambda r, g, b: g > r and g > b and g < 150,
+    'sunset': lambda r, g, b: r > 200 and g > 100 and b < 150,
+    'summer': lambda r, g, b: (r > 200 or g > 200) and b < 200,
+    'winter': lambda r, g, b: max(r, g, b) < 150 or (r > 200 and g > 200 and b > 200),
+    'spring': lambda r, g, b: g > 150 and (r > 150 or b > 150),
+    'fall': lambda r, g, b: r > 150 and g > 100 and b < 150
+}
+
+
+def reference_detailed(colors):
+    """原 ColorHuntScraper.analyze_colors_for_tags 的实现"""
+    all_tags = set()
+    for color in colors:
+        hex_color = color.lstrip('#')
+        try:
+            r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+            for tag, rule in REFERENCE_RULES.items():
+                if rule(r, g, b):
+                    all_tags.add(tag.title())
+        except ValueError:
+            continue
+    return sorted(list(all_tags))[:8]
+
+
+def reference_basic(colors):
+    """原 WebService.infer_tags_from_colors 的实现"""
+    tags = []
+    for color in colors:
+        try:
+            hex_color = color.replace('#', '')
+            r, g, b = int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+            if r > 200 and g > 200 and b > 200:
+                tags.append('Light')
+            elif r < 100 and g < 100 and b < 100:
+                tags.append('Dark')
+            elif r > g and r > b:
+                tags.append('Red' if r > 200 else 'Maroon')
+            elif g > r and g > b:
+                tags.append('Green')
+            elif b > r and b > g:
+                tags.append('Blue')
+            elif r > 150 and g > 150 and b < 100:
+                tags.append('Yellow')
+            elif r > 150 and g < 150 and b > 150:
+                tags.append('Purple')
+            elif r > 150 and g > 100 and b < 100:
+                tags.append('Orange')
+        except ValueError:
+            continue
+    return list(set(tags))
+
+
+def edge_colors():
+    return np.array(list(itertools.product(EDGE_VALUES, repeat=3)), dtype=np.uint8)
+
+
+def to_hex(rgb):
+    return '#' + bytes(rgb.tolist()).hex().upper()
+
+
+def test_detailed_rules_match_reference_per_color():
+    """细分规则集对每种阈值边界颜色的结果与原实现相同"""
+    tagger = ColorTagger(RULE_SET_DETAILED)
+    colors = edge_colors()
+    bits = tagger.color_bits(colors)
+    for rgb, value in zip(colors, bits):
+        expected = {name.title() for name, rule in REFERENCE_RULES.items() if rule(*map(int, rgb))}
+        actual = {tag for i, tag in enumerate(tagger.tags) if int(value) >> i & 1}
+        assert actual == expected, rgb
+
+
+def test_basic_rules_match_reference_per_color():
+    """单标签规则链对每种阈值边界颜色的结果与原实现相同"""
+    tagger = ColorTagger(RULE_SET_BASIC)
+    colors = edge_colors()
+    for rgb, value in zip(colors, tagger.color_bits(colors)):
+        assert tagger.bits_to_tags(value) == reference_basic([to_hex(rgb)]), rgb
+
+
+def test_palette_batch_matches_reference():
+    """批量推断结果与逐个配色方案调用原实现相同"""
+    rng = np.random.default_rng(0)
+    palettes = rng.integers(0, 256, size=(2000, 4, 3), dtype=np.uint8)
+    hex_palettes = [[to_hex(rgb) for rgb in palette] for palette in palettes]
+
+    detailed = ColorTagger(RULE_SET_DETAILED).tag_palettes(palettes)
+    basic = ColorTagger(RULE_SET_BASIC).tag_palettes(palettes)
+
+    for colors, tags_detailed, tags_basic in zip(hex_palettes, detailed, basic):
+        assert tags_detailed == reference_detailed(colors)
+        assert sorted(tags_basic) == sorted(reference_basic(colors))
+
+
+def test_invalid_colors_are_skipped():
+    """格式不正确的颜色被忽略，与原实现一致"""
+    colors = ['#626F47', 'zzzzzz', '#abc', '#F0BB78']
+    assert parse_hex_colors(colors).tolist() == [[0x62, 0x6f, 0x47], [0xf0, 0xbb, 0x78]]
+    assert ColorTagger().tag_colors(colors) == reference_detailed(colors)
+    assert sorted(WebService.infer_tags_from_colors(colors)) == sorted(reference_basic(colors))
+    assert ColorTagger().tag_colors([]) == []
+
+
+def test_tag_palette_batch_columns():
+    """可直接对 PaletteBatch 的颜色数组推断标签"""
+    batch = PaletteBatch([Palette.from_code('ffffff' * 4), Palette.from_code('000000' * 4)])
+    assert ColorTagger(RULE_SET_BASIC).tag_palettes(batch.rgb_array()) == [['Light'], ['Dark']]
+
+
+def test_full_lut_is_exact_and_memory_mapped(tmp_path):
+    """完整查找表与逐规则计算结果相同，生成一次后以内存映射方式复用"""
+    tagger = ColorTagger(RULE_SET_DETAILED)
+    lut = ColorTagLUT(tagger, cache_dir=str(tmp_path))
+    colors = np.concatenate([edge_colors(), np.random.default_rng(1).integers(0, 256, (5000, 3), dtype=np.uint8)])
+
+    assert (lut.lookup(colors) == tagger.compute_bits(colors)).all()
+    assert os.path.exists(lut.path)
+    assert isinstance(lut.load(), np.memmap)
+
+    # 新实例直接打开已生成的文件
+    mtime = os.path.getmtime(lut.path)
+    reloaded = ColorTagLUT(tagger, cache_dir=str(tmp_path))
+    assert (reloaded.lookup(colors) == tagger.compute_bits(colors)).all()
+    assert os.path.getmtime(lut.path) == mtime
+
+    tagger.use_lut(lut)
+    assert tagger.tag_colors(['#626F47', '#F0BB78']) == reference_detailed(['#626F47', '#F0BB78'])
+
+
+def test_quantized_lut_uses_cell_centres(tmp_path):
+    """量化查找表在内存中生成，每个颜色格取格中心颜色的标签"""
+    tagger = ColorTagger(RULE_SET_BASIC)
+    lut = ColorTagLUT(tagger, bits=5, cache_dir=str(tmp_path))
+    colors = edge_colors()
+    centres = (colors & 0xF8) | 0x04
+
+    assert (lut.lookup(colors) == tagger.compute_bits(centres)).all()
+    assert lut.load().nbytes == 32 ** 3 * 4
+    assert not os.listdir(tmp_path)
+
+
+def test_lut_enabled_from_environment(monkeypatch, tmp_path):
+    """环境变量 JONNYMCP_COLOR_LUT 为共享引擎启用查找表"""
+    monkeypatch.setattr(color_tagger, '_taggers', {})
+    monkeypatch.setenv('JONNYMCP_COLOR_LUT', 'quantized')
+    tagger = color_tagger.get_color_tagger()
+    assert tagger.lut is not None and tagger.lut.bits == 5
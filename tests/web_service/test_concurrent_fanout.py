@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+WebService.get_palette_urls 并发抓取测试
+使用伪造的feed响应，不访问真实网络
+"""
+import os
+import sys
+import json
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.web_service import WebService, COLORHUNT_TAGS
+
+
+class FakeClient:
+    """模拟 HttpClient，只实现 post_feed"""
+
+    def __init__(self, post):
+        self._post = post
+
+    def post_feed(self, post_data, referer=None, timeout=None):
+        return self._post(post_data)
+
+
+class FakeResponse:
+    """模拟 requests 响应对象"""
+
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+
+def make_fake_post(delay: float):
+    """构造按标签返回固定配色代码的伪造POST函数"""
+
+    def fake_post(data):
+        time.sleep(delay)
+        idx = COLORHUNT_TAGS.index(data['tags'])
+        # 每个标签返回自己的代码，外加一个所有标签共享的代码用于检验去重
+        return FakeResponse([
+            {'code': f"{idx:024x}", 'likes': '1', 'date': '1 hour'},
+            {'code': 'ab' * 12, 'likes': '2', 'date': '2 hours'},
+        ])
+
+    return fake_post
+
+
+def use_fake_client(monkeypatch, post):
+    """向 WebService 注入伪造的HTTP客户端"""
+    monkeypatch.setattr(WebService, 'http_client', FakeClient(post))
+
+
+def test_stable_order_and_dedup(monkeypatch):
+    """并发结果应按标签顺序合并并去重"""
+    use_fake_client(monkeypatch, make_fake_post(0.01))
+
+    urls = WebService.get_palette_urls(max_workers=8)
+
+    expected = [f"https://colorhunt.co/palette/{0:024x}", f"https://colorhunt.co/palette/{'ab' * 12}"]
+    expected += [f"https://colorhunt.co/palette/{i:024x}" for i in range(1, len(COLORHUNT_TAGS))]
+    assert urls == expected
+
+
+def test_serial_and_concurrent_results_match(monkeypatch):
+    """max_workers=1 的串行模式与并发模式结果一致"""
+    use_fake_client(monkeypatch, make_fake_post(0))
+
+    serial = WebService.get_palette_urls(max_workers=1)
+    concurrent = WebService.get_palette_urls(max_workers=16)
+    assert serial == concurrent
+
+
+def test_concurrent_wall_time(monkeypatch):
+    """并发模式耗时应远小于逐个请求的总和"""
+    delay = 0.05
+    use_fake_client(monkeypatch, make_fake_post(delay))
+
+    start = time.perf_counter()
+    WebService.get_palette_urls(max_workers=len(COLORHUNT_TAGS))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < delay * len(COLORHUNT_TAGS) / 4
+
+
+def test_max_workers_limit(monkeypatch):
+    """同时进行的请求数不应超过 max_workers"""
+    import threading
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+    base_post = make_fake_post(0.02)
+
+    def counting_post(*args, **kwargs):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        try:
+            return base_post(*args, **kwargs)
+        finally:
+            with lock:
+                state['active'] -= 1
+
+    use_fake_client(monkeypatch, counting_post)
+    WebService.get_palette_urls(max_workers=3)
+    assert state['peak'] <= 3
+
+
+def test_failed_tag_is_skipped(monkeypatch):
+    """单个标签失败不影响其他标签"""
+    fake_post = make_fake_post(0)
+
+    def flaky_post(data):
+        if data['tags'] == 'summer':
+            return FakeResponse([], status_code=500)
+        return fake_post(data)
+
+    use_fake_client(monkeypatch, flaky_post)
+    urls = WebService.get_palette_urls()
+
+    summer_idx = COLORHUNT_TAGS.index('summer')
+    assert f"https://colorhunt.co/palette/{summer_idx:024x}" not in urls
+    assert len(urls) == len(COLORHUNT_TAGS)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+FeedCache 及 HttpClient.post_feed 缓存策略测试
+"""
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.feed_cache import FeedCache
+from services.http_client import HttpClient
+
+
+def make_response(status_code, body='', headers=None):
+    """构造 requests 响应对象"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body.encode('utf-8')
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+
+class RecordingPost:
+    """按顺序返回预设响应，并记录每次请求的请求头"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def __call__(self, url, data=None, headers=None, timeout=None, **kwargs):
+        self.calls.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def test_ttl_by_sort_mode(tmp_path):
+    """new 短期缓存，popular-alltime 长期缓存，random 不缓存"""
+    cache = FeedCache(str(tmp_path / 'cache.db'))
+    new_ttl = cache.ttl_for(FeedCache.make_key({'sort': 'new', 'tags': 'summer', 'timeframe': '', 'step': 0}))
+    alltime_ttl = cache.ttl_for(FeedCache.make_key({'sort': 'popular', 'tags': '', 'timeframe': '9999', 'step': 0}))
+    random_ttl = cache.ttl_for(FeedCache.make_key({'sort': 'random', 'tags': '', 'timeframe': '', 'step': 0}))
+    assert 0 < new_ttl < alltime_ttl
+    assert random_ttl == 0
+
+
+def test_persisted_across_instances(tmp_path):
+    """缓存写入磁盘后，新实例可以直接读取"""
+    db_path = str(tmp_path / 'cache.db')
+    key = FeedCache.make_key({'sort': 'new', 'tags': 'summer', 'timeframe': '', 'step': 0})
+    cache = FeedCache(db_path)
+    cache.put(key, '[{"code": "x"}]', etag='"abc"')
+    cache.close()
+
+    entry = FeedCache(db_path).get(key)
+    assert entry is not None and entry.is_fresh
+    assert entry.body == '[{"code": "x"}]'
+    assert entry.etag == '"abc"'
+
+
+def test_extra_fields_are_part_of_key(tmp_path):
+    """标准参数之外的POST字段不同的请求不共用缓存记录"""
+    client = HttpClient(feed_cache=FeedCache(str(tmp_path / 'cache.db')))
+    client.post = RecordingPost([make_response(200, '[1]'), make_response(200, '[2]'), make_response(200, '[3]')])
+
+    assert client.post_feed({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''}).text == '[1]'
+    assert client.post_feed({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': '', 'code': 'abc'}).text == '[2]'
+    assert client.post_feed({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': '', 'code': 'def'}).text == '[3]'
+    assert client.post_feed({'code': 'abc', 'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''}).text == '[2]'
+    assert len(client.post.calls) == 3
+
+
+def test_lru_eviction(tmp_path):
+    """超出容量时淘汰最久未访问的记录"""
+    cache = FeedCache(str(tmp_path / 'cache.db'), max_entries=2, memory_entries=0)
+    keys = [FeedCache.make_key({'sort': 'new', 'tags': tag, 'timeframe': '', 'step': 0})
+            for tag in ('a', 'b', 'c')]
+    cache.put(keys[0], 'a')
+    time.sleep(0.01)
+    cache.put(keys[1], 'b')
+    time.sleep(0.01)
+    cache.get(keys[0])  # 访问a，使b成为最久未访问
+    time.sleep(0.01)
+    cache.put(keys[2], 'c')
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).body == 'a'
+    assert cache.get(keys[2]).body == 'c'
+
+
+def test_memory_hits_keep_entries_on_disk(tmp_path):
+    """内存层命中同样更新持久层的访问时间，常用记录不会先被淘汰"""
+    db_path = str(tmp_path / 'cache.db')
+    cache = FeedCache(db_path, max_entries=2, memory_entries=2)
+    keys = [FeedCache.make_key({'sort': 'new', 'tags': tag, 'timeframe': '', 'step': 0})
+            for tag in ('a', 'b', 'c')]
+    cache.put(keys[0], 'a')
+    time.sleep(0.01)
+    cache.put(keys[1], 'b')
+    time.sleep(0.01)
+    cache.get(keys[0])  # 只在内存层命中a，使b成为最久未访问
+    time.sleep(0.01)
+    cache.put(keys[2], 'c')
+    cache.close()
+
+    reopened = FeedCache(db_path, memory_entries=0)
+    assert reopened.get(keys[1]) is None
+    assert reopened.get(keys[0]).body == 'a'
+    assert reopened.get(keys[2]).body == 'c'
+
+
+def test_fresh_entry_served_without_network(tmp_path):
+    """有效期内的请求不发起网络请求"""
+    client = HttpClient(feed_cache=FeedCache(str(tmp_path / 'cache.db')))
+    client.post = RecordingPost([make_response(200, '[{"code": "1"}]')])
+    post_data = {'step': 0, 'sort': 'popular', 'tags': '', 'timeframe': '9999'}
+
+    first = client.post_feed(post_data)
+    second = client.post_feed(post_data)
+
+    assert len(client.post.calls) == 1
+    assert first.text == second.text == '[{"code": "1"}]'
+    assert second.status_code == 200
+    assert second.headers['X-Feed-Cache'] == 'HIT'
+
+
+def test_stale_entry_revalidated_with_etag(tmp_path):
+    """过期记录携带 If-None-Match 重新校验，304 时沿用缓存内容"""
+    cache = FeedCache(str(tmp_path / 'cache.db'), ttls={('new', ''): 60})
+    client = HttpClient(feed_cache=cache)
+    client.post = RecordingPost([
+        make_response(200, '[{"code": "1"}]', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}),
+        make_response(304),
+    ])
+    post_data = {'step': 0, 'sort': 'new', 'tags': 'summer', 'timeframe': ''}
+
+    client.post_feed(post_data)
+    cache.get(FeedCache.make_key(post_data)).expires_at = 0  # 强制过期
+    response = client.post_feed(post_data)
+
+    assert client.post.calls[1]['If-None-Match'] == '"v1"'
+    assert client.post.calls[1]['If-Modified-Since'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+    assert response.status_code == 200
+    assert response.text == '[{"code": "1"}]'
+    assert cache.get(FeedCache.make_key(post_data)).is_fresh
+    assert cache.stats()['revalidated'] == 1
+
+
+def test_random_sort_is_never_cached(tmp_path):
+    """random 排序每次都重新请求"""
+    client = HttpClient(feed_cache=FeedCache(str(tmp_path / 'cache.db')))
+    client.post = RecordingPost([make_response(200, '[1]'), make_response(200, '[2]')])
+    post_data = {'step': 0, 'sort': 'random', 'tags': '', 'timeframe': ''}
+
+    assert client.post_feed(post_data).text == '[1]'
+    assert client.post_feed(post_data).text == '[2]'
+
+
+def test_error_responses_are_not_cached(tmp_path):
+    """非200响应不写入缓存"""
+    client = HttpClient(feed_cache=FeedCache(str(tmp_path / 'cache.db')))
+    client.post = RecordingPost([make_response(500), make_response(200, '[]')])
+    post_data = {'step': 0, 'sort': 'new', 'tags': 'summer', 'timeframe': ''}
+
+    assert client.post_feed(post_data).status_code == 500
+    assert client.post_feed(post_data).status_code == 200
+    assert len(client.post.calls) == 2
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+仅使用feed数据构建配色记录的测试
+使用伪造的HTTP客户端，不访问真实网络
+"""
+import os
+import sys
+import json
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.async_web_service import AsyncWebService
+from services.web_service import WebService, COLORHUNT_TAGS
+
+SAMPLE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           'palette_page.html')
+SAMPLE_CODE = '626f47a4b465f5ecd5f0bb78'
+
+
+class FakeResponse:
+    """模拟 requests 响应对象"""
+
+    def __init__(self, text, status_code=200):
+        self.status_code = status_code
+        self.text = text
+
+
+class CountingClient:
+    """模拟 HttpClient，记录页面请求次数"""
+
+    def __init__(self):
+        self.page_requests = []
+
+    def post_feed(self, post_data, referer=None, timeout=None):
+        items = [{'code': SAMPLE_CODE, 'likes': '1,234', 'date': '2 days'}]
+        if post_data['tags'] == 'sea':
+            items.append({'code': 'ab' * 12, 'likes': '7', 'date': '1 hour'})
+        return FakeResponse(json.dumps(items))
+
+    def get_page(self, url, timeout=None):
+        self.page_requests.append(url)
+        with open(SAMPLE_PAGE, 'r', encoding='utf-8') as f:
+            return FakeResponse(f.read())
+
+
+def test_scrape_without_page_requests(monkeypatch):
+    """默认路径只请求feed接口，不请求配色页面"""
+    client = CountingClient()
+    monkeypatch.setattr(WebService, 'http_client', client)
+
+    success, error, palettes = WebService.scrape_colorhunt_palettes(limit=5)
+
+    assert success and error is None
+    assert client.page_requests == []
+    assert [p['palette_id'] for p in palettes] == [SAMPLE_CODE, 'ab' * 12]
+    assert palettes[0]['colors'] == ['#626F47', '#A4B465', '#F5ECD5', '#F0BB78']
+    assert palettes[0]['likes'] == 1234
+    assert palettes[0]['date'] == '2 days'
+    assert palettes[0]['tags'] == [tag.title() for tag in COLORHUNT_TAGS][:8]
+    assert palettes[1]['tags'] == ['Sea']
+    assert palettes[0]['metadata']['details_fetched'] is False
+
+
+def test_feed_record_matches_page_parser_schema():
+    """feed构建的记录与页面解析结果字段一致，颜色相同"""
+    with open(SAMPLE_PAGE, 'r', encoding='utf-8') as f:
+        page_data = WebService.parse_palette_page(f"https://colorhunt.co/palette/{SAMPLE_CODE}", f.read())
+    feed_data = WebService.build_palette_from_feed_item({'code': SAMPLE_CODE, 'likes': '3', 'date': ''})
+
+    assert set(feed_data) == set(page_data)
+    assert set(page_data['metadata']) <= set(feed_data['metadata'])
+    assert feed_data['id'] == page_data['id']
+    assert feed_data['colors'] == page_data['colors']
+    assert feed_data['date'] == '未知日期'
+    assert feed_data['metadata']['tags_inferred'] is True
+
+
+def test_invalid_code_is_skipped():
+    """无效的配色代码不生成记录"""
+    assert WebService.build_palette_from_feed_item({'code': 'xyz'}) is None
+
+
+def test_fetch_details_requests_page_once(monkeypatch):
+    """按需补充详情时只请求一次页面，并保留feed中的点赞数"""
+    client = CountingClient()
+    monkeypatch.setattr(WebService, 'http_client', client)
+
+    palette = WebService.build_palette_from_feed_item({'code': SAMPLE_CODE, 'likes': '9', 'date': '1 day'})
+    WebService.fetch_palette_details(palette)
+    WebService.fetch_palette_details(palette)
+
+    assert len(client.page_requests) == 1
+    assert palette['metadata']['details_fetched'] is True
+    assert palette['metadata']['tags_inferred'] is False
+    assert palette['likes'] == 9
+
+
+def test_async_scrape_without_page_requests():
+    """异步版本同样只请求feed接口"""
+    service = AsyncWebService(use_feed_cache=False)
+    methods = []
+
+    async def fake_request(method, url, headers, data=None, timeout=None):
+        methods.append(method)
+        return 200, json.dumps([{'code': SAMPLE_CODE, 'likes': '5', 'date': '1 day'}]), {}
+
+    service._request = fake_request
+    success, error, palettes = asyncio.run(service.scrape_colorhunt_palettes(limit=10))
+
+    assert success and error is None
+    assert set(methods) == {'POST'}
+    assert len(palettes) == 1 and palettes[0]['likes'] == 5
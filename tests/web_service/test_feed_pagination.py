@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+feed接口分页遍历测试
+使用伪造的分页feed响应，不访问真实网络
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.async_web_service import AsyncWebService
+from services.web_service import WebService
+
+PAGE_SIZE = 40
+
+
+def make_page(step: int, pages: int):
+    """第 step 页的伪造数据，超出 pages 页后返回空列表"""
+    if step >= pages:
+        return []
+    return [{'code': f"{step * PAGE_SIZE + i:024x}", 'likes': str(i), 'date': '1 hour'} for i in range(PAGE_SIZE)]
+
+
+class FakeResponse:
+    """模拟 requests 响应对象"""
+
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+
+class PagedClient:
+    """模拟 HttpClient，按 step 返回分页数据并记录请求的页码"""
+
+    def __init__(self, pages: int = 100, delay: float = 0.0, page_factory=None):
+        self.pages = pages
+        self.delay = delay
+        self.page_factory = page_factory or make_page
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def post_feed(self, post_data, referer=None, timeout=None):
+        with self._lock:
+            self.steps.append(post_data['step'])
+        time.sleep(self.delay)
+        return FakeResponse(self.page_factory(post_data['step'], self.pages))
+
+
+def test_walks_pages_until_limit(monkeypatch):
+    """跨越多页产出数据，达到limit后不再请求后续页"""
+    client = PagedClient()
+    monkeypatch.setattr(WebService, 'http_client', client)
+
+    items = list(WebService.iter_feed_items({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''}, limit=100))
+
+    assert [item['code'] for item in items] == [f"{i:024x}" for i in range(100)]
+    assert sorted(client.steps) == [0, 1, 2]
+
+
+def test_stops_on_empty_page(monkeypatch):
+    """没有更多数据时停止翻页"""
+    client = PagedClient(pages=3)
+    monkeypatch.setattr(WebService, 'http_client', client)
+
+    items = list(WebService.iter_feed_items({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''}))
+
+    assert len(items) == 3 * PAGE_SIZE
+    assert sorted(client.steps) == [0, 1, 2, 3]
+
+
+def test_prefetches_next_page(monkeypatch):
+    """处理当前页时下一页已在后台请求，总耗时接近请求时间与处理时间中的较大者"""
+    client = PagedClient(pages=4, delay=0.1)
+    monkeypatch.setattr(WebService, 'http_client', client)
+
+    start = time.perf_counter()
+    for item in WebService.iter_feed_items({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''}):
+        if item['likes'] == '0':
+            time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    # 串行执行需要 5 次请求 + 4 次处理 = 0.9 秒
+    assert elapsed < 0.75
+
+
+def test_skips_items_shifted_from_previous_page(monkeypatch):
+    """新配色插入导致分页后移时，跳过与上一页重复的记录"""
+
+    def shifted_page(step, pages):
+        page = make_page(step, pages)
+        if step > 0 and page:
+            page = make_page(step - 1, pages)[-2:] + page[:-2]
+        return page
+
+    monkeypatch.setattr(WebService, 'http_client', PagedClient(pages=2, page_factory=shifted_page))
+
+    codes = [item['code'] for item in WebService.iter_feed_items({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''})]
+
+    assert len(codes) == len(set(codes)) == 2 * PAGE_SIZE - 2
+
+
+def test_stops_when_server_ignores_step(monkeypatch):
+    """服务器对所有 step 返回同一页时不会无限翻页"""
+    client = PagedClient(page_factory=lambda step, pages: make_page(0, pages))
+    monkeypatch.setattr(WebService, 'http_client', client)
+
+    items = list(WebService.iter_feed_items({'step': 0, 'sort': 'new', 'tags': '', 'timeframe': ''}))
+
+    assert len(items) == PAGE_SIZE
+    assert len(client.steps) == 2
+
+
+def test_scrape_by_tag_returns_more_than_one_page(monkeypatch):
+    """按标签抓取的数量不再受第一页限制"""
+    monkeypatch.setattr(WebService, 'http_client', PagedClient())
+
+    success, error, palettes = WebService.scrape_colorhunt_by_tag('summer', 90)
+
+    assert success and error is None
+    assert len(palettes) == 90
+    assert palettes[-1]['id'] == f"summer-api-90-{89:024x}"
+
+
+def test_scrape_by_tag_reports_status_error(monkeypatch):
+    """feed接口失败时返回带状态码的错误信息"""
+
+    class FailingClient:
+        def post_feed(self, post_data, referer=None, timeout=None):
+            return FakeResponse([], status_code=429)
+
+    monkeypatch.setattr(WebService, 'http_client', FailingClient())
+
+    success, error, palettes = WebService.scrape_colorhunt_by_tag('summer', 5)
+
+    assert not success and palettes is None
+    assert '429' in error
+
+
+def test_async_iterator_walks_pages():
+    """异步迭代器同样按页遍历并在达到limit后停止"""
+    service = AsyncWebService(use_feed_cache=False)
+    steps = []
+
+    async def fake_request(method, url, headers, data=None, timeout=None):
+        steps.append(data['step'])
+        await asyncio.sleep(0.01)
+        return 200, json.dumps(make_page(data['step'], 100)), {}
+
+    service._request = fake_request
+
+    async def collect():
+        return [palette async for palette in service.iter_tag_palettes('summer', limit=50)]
+
+    palettes = asyncio.run(collect())
+
+    assert [p['palette_id'] for p in palettes] == [f"{i:024x}" for i in range(50)]
+    assert sorted(steps) == [0, 1]
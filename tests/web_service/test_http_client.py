@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+HttpClient 连接池与重试测试
+使用本地HTTP服务器，不访问真实网络
+"""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.http_client import HttpClient, FEED_HEADERS, get_http_client, set_http_client
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """前 fail_times 次请求返回503，之后返回200，并记录请求头"""
+    protocol_version = 'HTTP/1.1'
+    fail_times = 2
+    calls = 0
+    seen_headers = []
+    lock = threading.Lock()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        with FlakyHandler.lock:
+            FlakyHandler.calls += 1
+            calls = FlakyHandler.calls
+            FlakyHandler.seen_headers.append(dict(self.headers))
+        status = 503 if calls <= FlakyHandler.fail_times else 200
+        body = b'[]'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    FlakyHandler.calls = 0
+    FlakyHandler.seen_headers = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def test_retry_with_backoff():
+    """503响应应被自动重试直到成功"""
+    server, url = start_server()
+    try:
+        with HttpClient(max_retries=3, backoff_factor=0) as client:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert FlakyHandler.calls == 3
+    finally:
+        server.shutdown()
+
+
+def test_retry_exhausted_returns_last_response():
+    """重试次数耗尽后返回最后一次响应而不是抛出异常"""
+    server, url = start_server()
+    try:
+        with HttpClient(max_retries=1, backoff_factor=0) as client:
+            response = client.post(url, data={'step': 0})
+        assert response.status_code == 503
+        assert FlakyHandler.calls == 2
+    finally:
+        server.shutdown()
+
+
+def test_shared_headers_are_merged():
+    """基础请求头与接口请求头合并发送"""
+    server, url = start_server()
+    FlakyHandler.fail_times = 0
+    try:
+        with HttpClient() as client:
+            client.post(url, data={'step': 0}, headers=dict(FEED_HEADERS, Referer='https://colorhunt.co/palettes/summer'))
+        headers = FlakyHandler.seen_headers[-1]
+        assert 'Mozilla' in headers['User-Agent']
+        assert headers['X-Requested-With'] == 'XMLHttpRequest'
+        assert headers['Referer'] == 'https://colorhunt.co/palettes/summer'
+    finally:
+        FlakyHandler.fail_times = 2
+        server.shutdown()
+
+
+def test_default_client_is_shared():
+    """默认客户端在进程内共享，可被替换"""
+    set_http_client(None)
+    assert get_http_client() is get_http_client()
+    custom = HttpClient()
+    set_http_client(custom)
+    try:
+        assert get_http_client() is custom
+    finally:
+        set_http_client(None)
+        custom.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+PaletteExtractor 与原有逐个正则 + BeautifulSoup 提取逻辑的一致性测试
+"""
+import os
+import re
+import sys
+import glob
+
+import pytest
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from services.palette_extractor import PaletteExtractor, COLORHUNT_PAGE_TAGS, LXML_SUPPORT
+
+SAMPLE_PAGES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'debug_files', '*.html'))) + \
+    sorted(glob.glob(os.path.join(ROOT, 'palette_*.html')))
+
+SYNTHETIC_PAGES = [
+    # 脚本中的点赞数、日期和标签，'likes': 同时命中前三个模式
+    """<html><head><title>Summer &amp; Sea - Color Hunt</title></head><body>
+    <script>var p = {'likes': 0, "likes": 12, 'date': '3 days', 'tags': 'summer-sea-unknown'};
+    $('.likes').text(99); formatThousands(1500);</script></body></html>""",
+    # 第一个模式全为0时使用下一个模式
+    """<script>x = {'likes': 0}; y = {likes": 7}</script><title>Late Title</title>""",
+    # 只能通过CSS选择器找到的点赞数和日期
+    """<html><head><title> Palette - Color Hunt </title></head><body>
+    <div class="actions flex"><div class="button like"><span>Like</span><span>1.2k</span></div></div>
+    <span class="date"> </span><span class="time">2 weeks</span></body></html>""",
+    """<div data-likes="5">0</div><p class="likes-count">34</p><em class="created">May 1</em>""",
+    # 标题中包含子标签、没有标题、空页面
+    """<title>A <b>bold</b> Color Hunt</title><div class="like"><span>8</span></div>""",
+    """<div class="like-count">42</div>""",
+    "",
+    # 标签模式有匹配但没有标准标签时不再尝试其他模式
+    """<script>a = {tags': 'foo-bar'}; b = {"tags": "blue"}</script>""",
+]
+
+
+def reference_fields(html: str):
+    """原 parse_palette_page 中的字段提取逻辑"""
+    soup = BeautifulSoup(html, 'html.parser')
+    title_elem = soup.find('title')
+    title = title_elem.text.strip() if title_elem else None
+
+    likes = 0
+    for pattern in [r"'likes':\s*(\d+)", r'"likes":\s*(\d+)', r"likes['\"]:\s*(\d+)",
+                    r"formatThousands\((\d+)\)", r"\.text\((\d+)\)"]:
+        matches = re.findall(pattern, html)
+        if matches:
+            potential_likes = [int(m) for m in matches if int(m) > 0]
+            if potential_likes:
+                likes = max(potential_likes)
+                break
+    if likes == 0:
+        for selector in ['.like span', '.button.like span', '.actions .like span',
+                         '[data-likes]', '.likes-count', '.like-count']:
+            for like_elem in soup.select(selector):
+                try:
+                    like_text = like_elem.text.strip()
+                    if like_text and like_text.isdigit():
+                        likes = int(like_text)
+                        break
+                    elif like_text and 'k' in like_text.lower():
+                        likes = int(float(like_text.lower().replace('k', '')) * 1000)
+                        break
+                except (ValueError, AttributeError):
+                    continue
+            if likes > 0:
+                break
+
+    date = ""
+    for pattern in [r"'date':\s*['\"]([^'\"]+)['\"]", r'"date":\s*"([^"]+)"', r"date['\"]:\s*['\"]([^'\"]+)['\"]"]:
+        matches = re.findall(pattern, html)
+        if matches:
+            date = matches[0]
+            break
+    if not date:
+        for selector in ['.date', '.time', '.timestamp', '.created']:
+            date_elem = soup.select_one(selector)
+            if date_elem and date_elem.text.strip():
+                date = date_elem.text.strip()
+                break
+
+    tags = []
+    for pattern in [r"tags['\"]:\s*['\"]([^'\"]+)['\"]", r"'tags':\s*['\"]([^'\"]+)['\"]", r'"tags":\s*"([^"]+)"']:
+        matches = re.findall(pattern, html)
+        if matches:
+            for tag in matches[0].split('-'):
+                tag = tag.strip().lower()
+                if tag in COLORHUNT_PAGE_TAGS:
+                    tags.append(tag.title())
+            break
+
+    return {'title': title, 'likes': likes, 'date': date, 'tags': tags}
+
+
+def read_page(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+ENGINES = ['html.parser'] + (['lxml'] if LXML_SUPPORT else [])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('path', SAMPLE_PAGES, ids=os.path.basename)
+def test_saved_pages_match_reference(engine, path):
+    html = read_page(path)
+    assert PaletteExtractor(engine).extract(html) == reference_fields(html)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('html', SYNTHETIC_PAGES)
+def test_synthetic_pages_match_reference(engine, html):
+    assert PaletteExtractor(engine).extract(html) == reference_fields(html)
+
+
+def test_scan_skips_dom_when_script_has_all_fields(monkeypatch):
+    """脚本中已有全部字段时不解析DOM"""
+    extractor = PaletteExtractor()
+    monkeypatch.setattr(extractor, '_parse_dom', lambda html: pytest.fail("不应解析DOM"))
+
+    fields = extractor.extract(SYNTHETIC_PAGES[0])
+
+    assert fields == {'title': 'Summer & Sea - Color Hunt', 'likes': 12, 'date': '3 days', 'tags': ['Summer', 'Sea']}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+紧凑配色方案模型 Palette / PaletteBatch 测试
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models.palette import Palette, PaletteBatch, NUMPY_SUPPORT
+from services.web_service import WebService
+
+SAMPLE_CODE = '626f47a4b465f5ecd5f0bb78'
+
+
+def test_pack_code_validates_input():
+    """只接受24位十六进制代码"""
+    assert Palette.pack_code(SAMPLE_CODE) == bytes.fromhex(SAMPLE_CODE)
+    assert Palette.pack_code('zz' * 12) is None
+    assert Palette.pack_code('abc') is None
+    assert Palette.pack_code('') is None
+
+
+def test_feed_dict_matches_previous_format():
+    """feed记录的字段与原有构建结果一致"""
+    item = {'code': SAMPLE_CODE, 'likes': '1,234', 'date': '2 days', 'tags': ['sea', 'blue']}
+    palette = WebService.build_palette_from_feed_item(item, idx=2)
+
+    assert palette['id'] == f'colorhunt-3-{SAMPLE_CODE}'
+    assert palette['name'] == f'ColorHunt Palette {SAMPLE_CODE}'
+    assert palette['colors'] == ['#626F47', '#A4B465', '#F5ECD5', '#F0BB78']
+    assert palette['source_url'] == f'https://colorhunt.co/palette/{SAMPLE_CODE}'
+    assert palette['likes'] == 1234
+    assert palette['tags'] == ['Sea', 'Blue']
+    assert palette['author'] == 'ColorHunt用户'
+    assert palette['metadata'] == {
+        "colors_extracted_method": "URL解析",
+        "has_detailed_info": True,
+        "response_status": 200,
+        "page_title": "",
+        "extraction_notes": "点赞数: 1234, 日期: 2 days, 标签数: 2",
+        "tags_inferred": False,
+        "details_fetched": False
+    }
+
+    inferred = WebService.build_palette_from_feed_item({'code': SAMPLE_CODE})
+    assert inferred['date'] == '未知日期'
+    assert inferred['metadata']['tags_inferred'] is True
+    assert sorted(inferred['tags']) == sorted(WebService.infer_tags_from_colors(inferred['colors']))
+
+
+def test_tag_dict_matches_previous_format():
+    """标签记录的字段与原有构建结果一致"""
+    palette = WebService.build_tag_palette('summer', {'code': SAMPLE_CODE, 'likes': '56', 'date': '3 weeks'}, 0)
+
+    assert palette['id'] == f'summer-api-1-{SAMPLE_CODE}'
+    assert palette['name'] == 'Summer Palette 1'
+    assert palette['tags'] == ['Summer (API标签)', 'ColorHunt']
+    assert palette['likes'] == 56
+    assert palette['metadata']['page_title'] == 'Summer Color Palettes - Color Hunt'
+    assert palette['metadata']['tag_page_url'] == 'https://colorhunt.co/palettes/summer'
+    assert palette['metadata']['extraction_notes'] == '通过API获取，点赞数: 56, 日期: 3 weeks'
+    assert WebService.build_tag_palette('summer', {'code': 'xyz'}, 0) is None
+
+
+def test_gui_dict_names():
+    """GUI记录根据标签生成名称，没有author和metadata字段"""
+    palette = Palette.from_code(SAMPLE_CODE, likes=3, date='1 day', tags=['Popular'],
+                                kind=Palette.KIND_GUI, tag='popular-month').to_dict()
+    assert palette['name'] == 'ColorHunt Popular (Month) Palette'
+    assert palette['id'] == f'colorhunt-api-1-{SAMPLE_CODE}'
+    assert palette['api_source'] is True
+    assert 'metadata' not in palette and 'author' not in palette
+
+
+def test_tags_are_shared():
+    """相同标签组合的配色方案共用同一个元组"""
+    a = Palette.from_code(SAMPLE_CODE, tags=['Sea', 'Blue'])
+    b = Palette.from_code('ab' * 12, tags=['Sea', 'Blue'])
+    assert a.tags is b.tags
+
+
+def test_batch_round_trip():
+    """PaletteBatch 按下标还原的配色方案与原对象相同"""
+    created = time.time()
+    palettes = [
+        Palette.from_code(SAMPLE_CODE, likes=10, date='2 days', tags=['Sea'], idx=0, created=created),
+        Palette.from_code('ab' * 12, likes=3, date='1 hour', idx=1, kind=Palette.KIND_TAG, tag='retro',
+                          created=created),
+        Palette.from_code('0a' * 12, idx=2, flags=Palette.TAGS_INFERRED, tags=['Dark'], created=created),
+    ]
+    batch = PaletteBatch(palettes)
+
+    assert len(batch) == 3
+    assert list(batch) == palettes
+    assert batch[-1] == palettes[2]
+    assert batch.codes() == [SAMPLE_CODE, 'ab' * 12, '0a' * 12]
+    assert list(batch.to_dicts()) == [p.to_dict() for p in palettes]
+
+    if NUMPY_SUPPORT:
+        rgb = batch.rgb_array()
+        assert rgb.shape == (3, 4, 3)
+        assert rgb[0, 0].tolist() == [0x62, 0x6f, 0x47]
+        assert not rgb.flags.writeable
+        # 与批次共享内存，不复制颜色数据
+        batch._rgb[0] = 0
+        assert rgb[0, 0, 0] == 0
+        assert batch.likes_array().tolist() == [10, 3, 0]
+
+        # 点赞数数组是副本，持有时批次仍然可以追加
+        likes = batch.likes_array()
+        del rgb
+        batch.append(Palette.from_code('0b' * 12, likes=7))
+        assert likes.tolist() == [10, 3, 0] and batch.likes_array().tolist() == [10, 3, 0, 7]
+
+
+def test_batch_memory_is_compact():
+    """10000个配色方案的批次内存远小于字典列表"""
+    items = [{'code': f'{i:06x}' * 4, 'likes': str(i), 'date': f'{i % 30} days', 'tags': ['sea', 'summer']}
+             for i in range(10000)]
+
+    tracemalloc.start()
+    dicts = [WebService.build_palette_from_feed_item(item, i) for i, item in enumerate(items)]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dicts
+
+    tracemalloc.start()
+    batch = PaletteBatch(WebService.feed_item_to_palette(item, i) for i, item in enumerate(items))
+    batch_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(batch) == 10000
+    assert batch_bytes * 10 < dict_bytes
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+本地配色方案库测试，使用临时目录中的SQLite文件，不访问真实网络
+"""
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.palette_repository import PaletteRepository, parse_feed_date, normalize_tag
+from services.web_service import WebService
+from models.palette import Palette
+
+NOW = 1_700_000_000.0
+
+
+def feed_palette(n, likes, date='1 day', tags=None, tag=None):
+    palette = Palette.from_code(f"{n:024x}", likes=likes, date=date, tags=tags or [])
+    palette.tag = tag
+    return palette
+
+
+def test_parse_feed_date():
+    """相对时间和 YYYY-MM-DD 日期都能估算发布时间"""
+    assert parse_feed_date('3 days', NOW) == NOW - 3 * 86400
+    assert parse_feed_date('1 week', NOW) == NOW - 7 * 86400
+    assert parse_feed_date('2024-05-01', NOW) is not None
+    assert parse_feed_date('', NOW) is None
+    assert parse_feed_date('sometime', NOW) is None
+    assert normalize_tag('Summer (API标签)') == 'summer'
+
+
+def test_upsert_merges_tags_and_updates_likes(tmp_path):
+    """重复写入更新点赞数，标签与已有标签合并，发布时间保持首次估算的值"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    assert repo.upsert([feed_palette(1, 10, '2 days')], tag='Summer') == 1
+    posted = repo._connect().execute("SELECT posted_at FROM palettes").fetchone()[0]
+
+    repo.upsert([feed_palette(1, 25, '3 days')], tag='Pastel')
+
+    palette = repo.get(f"{1:024x}")
+    assert palette.likes == 25
+    assert palette.tags == ('Pastel', 'Summer')
+    assert repo._connect().execute("SELECT posted_at FROM palettes").fetchone()[0] == posted
+    # 其他标签下的冗余点赞数同样更新
+    assert [p.likes for p in repo.query('summer')] == [25]
+    assert repo.count() == 1 and repo.count('pastel') == 1
+    repo.close()
+
+
+
+def test_upsert_counts_duplicate_codes_once(tmp_path):
+    """同一次写入中重复的配色代码只计一次，保留最后一条的点赞数"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    written = repo.upsert([feed_palette(1, 5, tags=['Warm']), feed_palette(2, 3), feed_palette(1, 8, tags=['Retro'])])
+
+    assert written == 2 == repo.count()
+    assert repo.get(f"{1:024x}").likes == 8
+    assert repo.get(f"{1:024x}").tags == ('Retro', 'Warm')
+    repo.close()
+
+def test_query_orders_by_likes_and_date(tmp_path):
+    """按标签查询，按点赞数或发布时间排序并分页"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    repo.upsert([feed_palette(i, likes=i * 10, date=f"{i} days") for i in range(1, 6)], tag='blue')
+    repo.upsert([feed_palette(100, likes=1000)], tag='red')
+
+    assert [p.likes for p in repo.query('Blue')] == [50, 40, 30, 20, 10]
+    assert [p.likes for p in repo.query('blue', order_by='date')] == [10, 20, 30, 40, 50]
+    assert [p.likes for p in repo.query('blue', limit=2, offset=1)] == [40, 30]
+    assert [p.likes for p in repo.query('blue', min_likes=30)] == [50, 40, 30]
+    assert [p.likes for p in repo.query(limit=2)] == [1000, 50]
+    assert repo.query('green') == []
+    assert repo.tag_counts() == [('blue', 5), ('red', 1)]
+    assert len(repo.all_palettes()) == 6
+    repo.close()
+
+
+def test_upsert_dicts_and_skips_invalid(tmp_path):
+    """可写入配色方案字典，代码无效的记录和推断的标签被忽略"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    written = repo.upsert([
+        {'palette_id': 'AABBCCDDEEFF001122334455', 'likes': '1,234', 'date': '1 hour', 'tags': ['Warm', 'colorhunt']},
+        {'palette_id': 'aabbcc', 'likes': 1},
+        {'palette_id': '112233445566778899aabbcc', 'likes': 3, 'tags': ['Dark'],
+         'metadata': {'tags_inferred': True}},
+    ])
+    assert written == 2
+    assert repo.get('aabbccddeeff001122334455').likes == 1234
+    assert repo.get('aabbccddeeff001122334455').tags == ('Warm',)
+    assert repo.get('112233445566778899aabbcc').tags == ()
+    assert repo.contains(['AABBCCDDEEFF001122334455', 'ffffffffffffffffffffffff']) == {'aabbccddeeff001122334455'}
+    repo.close()
+
+
+class FakeResponse:
+    """模拟 requests 响应对象"""
+
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+
+class TagClient:
+    """模拟 HttpClient，只返回一页标签数据"""
+
+    def post_feed(self, post_data, referer=None, timeout=None):
+        if post_data['step'] > 0:
+            return FakeResponse([])
+        return FakeResponse([{'code': f"{i:024x}", 'likes': str(i), 'date': '1 day'} for i in range(1, 11)])
+
+
+def test_store_tag_palettes(monkeypatch, tmp_path):
+    """按标签抓取的配色方案写入配色方案库，可按标签查询"""
+    monkeypatch.setattr(WebService, 'http_client', TagClient())
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+
+    success, error, stored = WebService.store_tag_palettes('Summer', limit=100, repository=repo)
+
+    assert success and error is None and stored == 10
+    assert [p.likes for p in repo.query('summer', limit=3)] == [10, 9, 8]
+    repo.close()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+配色方案相似度索引测试，与逐个配色方案计算距离的实现对比
+"""
+import os
+import sys
+import itertools
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import services.palette_similarity as palette_similarity
+from services.palette_similarity import (PaletteSimilarityIndex, SIMILARITY_ORDERED, SIMILARITY_UNORDERED,
+                                         find_similar_palettes, get_similarity_index, query_rgb)
+from services.palette_repository import PaletteRepository
+from utils.color_space import rgb_to_lab
+from models.palette import Palette
+
+
+def random_palettes(n, seed=0):
+    rgb = np.random.default_rng(seed).integers(0, 256, size=(n, 4, 3), dtype=np.uint8)
+    return [palette.tobytes().hex() for palette in rgb], rgb
+
+
+def reference_distances(rgb, query, mode):
+    """逐个配色方案计算每种颜色的均方根ΔE"""
+    lab = rgb_to_lab(rgb)
+    query_lab = rgb_to_lab(query)
+    orders = itertools.permutations(range(4)) if mode == SIMILARITY_UNORDERED else [range(4)]
+    squared = np.min([((lab - query_lab[list(order)]) ** 2).sum(axis=(1, 2)) for order in orders], axis=0)
+    return np.sqrt(squared / 4)
+
+
+def test_search_matches_brute_force(monkeypatch):
+    """分块查询的结果与逐个计算的最近邻相同"""
+    monkeypatch.setattr(palette_similarity, 'SIMILARITY_CHUNK_ELEMENTS', 1000)
+    codes, rgb = random_palettes(5000)
+    index = PaletteSimilarityIndex(codes, rgb)
+    queries = np.random.default_rng(1).integers(0, 256, size=(8, 4, 3), dtype=np.uint8)
+
+    for mode in (SIMILARITY_ORDERED, SIMILARITY_UNORDERED):
+        found, dist = index.search_batch(queries, k=10, mode=mode)
+        for query, indices, distances in zip(queries, found, dist):
+            expected = reference_distances(rgb, query, mode)
+            assert np.allclose(np.sort(expected)[:10], distances, atol=1e-2)
+            assert np.allclose(expected[indices], distances, atol=1e-2)
+
+
+def test_unordered_ignores_colour_order():
+    """颜色顺序不同的同一配色方案在无序模式下距离为0"""
+    codes, rgb = random_palettes(500)
+    index = PaletteSimilarityIndex(codes, rgb)
+    shuffled = rgb[42][[2, 0, 3, 1]]
+
+    code, distance = index.search(shuffled.tobytes().hex(), k=1, mode=SIMILARITY_UNORDERED)[0]
+    assert code == codes[42] and distance < 0.1
+    assert index.search(shuffled.tobytes().hex(), k=1, mode=SIMILARITY_ORDERED)[0][0] != codes[42]
+
+
+def test_exclude_and_query_colours():
+    """查询的配色方案本身可以排除，颜色列表不足4种时循环重复"""
+    codes, rgb = random_palettes(100)
+    index = PaletteSimilarityIndex(codes, rgb)
+    results = index.search(codes[0], k=5, exclude=codes[0])
+    assert len(results) == 5 and codes[0] not in [code for code, _ in results]
+
+    assert query_rgb(['#FF0000', '#00FF00']).tolist() == [[255, 0, 0], [0, 255, 0], [255, 0, 0], [0, 255, 0]]
+    assert index.search_batch(rgb[:2], k=500)[0].shape == (2, 100)
+
+
+def test_negative_k_returns_nothing():
+    """返回数量小于0时按0处理，不会返回大部分配色方案"""
+    codes, rgb = random_palettes(50)
+    index = PaletteSimilarityIndex(codes, rgb)
+
+    assert index.search(codes[0], k=-3) == []
+    assert index.search(codes[0], k=-1, exclude=codes[0]) == []
+    assert index.search_batch(rgb[:2], k=-3)[0].shape == (2, 0)
+
+
+def test_find_similar_palettes_from_repository(tmp_path):
+    """从配色代码或图片查询本地配色方案库，写入后索引重建"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    codes, rgb = random_palettes(200)
+    repo.upsert([Palette.from_code(code, likes=i) for i, code in enumerate(codes)])
+
+    success, error, palettes = find_similar_palettes(code=codes[7], k=3, repository=repo)
+    assert success and error is None
+    assert len(palettes) == 3 and codes[7] not in [p['palette_id'] for p in palettes]
+    assert palettes[0]['distance'] <= palettes[-1]['distance']
+
+    # 纯色色块图片提取的颜色应能找到对应的配色方案
+    image = Image.new('RGB', (400, 100))
+    for i, color in enumerate(rgb[11]):
+        image.paste(tuple(int(c) for c in color), (i * 100, 0, (i + 1) * 100, 100))
+    image_path = str(tmp_path / 'query.png')
+    image.save(image_path)
+    if palette_similarity.IMAGE_QUERY_SUPPORT:
+        success, _, palettes = find_similar_palettes(image_path=image_path, k=1, repository=repo)
+        assert success and palettes[0]['palette_id'] == codes[11]
+
+    index = get_similarity_index(repo)
+    repo.upsert([Palette.from_code('ff0000' * 4, likes=1)])
+    assert len(get_similarity_index(repo)) == len(index) + 1
+
+    assert not find_similar_palettes(repository=repo)[0]
+    assert not find_similar_palettes(code='xyz', repository=repo)[0]
+    repo.close()
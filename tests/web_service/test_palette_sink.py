@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+配色方案输出目标测试：逐个JSON文件、JSONL、gzip JSONL和SQLite
+"""
+import os
+import sys
+import json
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.palette_sink import (PaletteSink, open_palette_sink, read_palettes, palette_key, JsonFileSink, SINK_JSON,
+                                   SINK_JSONL, SINK_JSONL_GZ, SINK_SQLITE, SINK_TYPES, SINK_FILE_NAMES)
+
+
+def make_palettes(count, start=0):
+    return [{"id": f"colorhunt-api-{i + 1}-{i:024x}", "palette_id": f"{i:024x}", "name": "测试配色",
+             "colors": ["#626F47", "#A4B465", "#F5ECD5", f"#{i:06X}"], "likes": i} for i in range(start, start + count)]
+
+
+@pytest.mark.parametrize("sink_type", SINK_TYPES)
+def test_round_trip(tmp_path, sink_type):
+    """每种格式写入的配色方案都能完整读回"""
+    palettes = make_palettes(10)
+    with open_palette_sink(sink_type, str(tmp_path), buffer_size=4) as sink:
+        for palette in palettes:
+            sink.write(palette)
+    assert sink.count == 10
+
+    path = str(tmp_path) if sink_type == SINK_JSON else os.path.join(str(tmp_path), SINK_FILE_NAMES[sink_type])
+    assert sorted(read_palettes(path), key=palette_key) == palettes
+
+
+def test_json_files_keep_previous_format(tmp_path):
+    """逐个JSON文件格式与原来的 palette_{palette_id}.json 相同"""
+    palette = make_palettes(1)[0]
+    with open_palette_sink(SINK_JSON, str(tmp_path)) as sink:
+        sink.write(palette)
+        assert isinstance(sink, JsonFileSink)
+        assert os.path.exists(sink.file_path(palette))
+
+    with open(os.path.join(str(tmp_path), f"palette_{palette['palette_id']}.json"), 'r', encoding='utf-8') as f:
+        assert f.read() == json.dumps(palette, indent=2, ensure_ascii=False)
+
+    # 没有 palette_id 的记录使用 id
+    with open_palette_sink(SINK_JSON, str(tmp_path), file_pattern="image_palette_{key}.json") as sink:
+        sink.write({"id": "image-1234abcd", "colors": ["#000000"]})
+    assert os.path.exists(os.path.join(str(tmp_path), "image_palette_image-1234abcd.json"))
+
+
+def test_buffered_writes(tmp_path):
+    """合并格式在缓冲区满或关闭时才写入"""
+    sink = open_palette_sink(SINK_JSONL, str(tmp_path), buffer_size=3)
+    palettes = make_palettes(4)
+    for palette in palettes[:2]:
+        sink.write(palette)
+    assert list(read_palettes(sink.path)) == []
+    sink.write(palettes[2])
+    assert list(read_palettes(sink.path)) == palettes[:3]
+    sink.write(palettes[3])
+    sink.close()
+    sink.close()
+    assert list(read_palettes(sink.path)) == palettes
+
+    with pytest.raises(ValueError):
+        sink.write(palettes[0])
+
+
+@pytest.mark.parametrize("sink_type", [SINK_JSONL, SINK_JSONL_GZ])
+def test_jsonl_appends_across_runs(tmp_path, sink_type):
+    """多次下载追加到同一个文件"""
+    for start in (0, 5):
+        with open_palette_sink(sink_type, str(tmp_path)) as sink:
+            for palette in make_palettes(5, start):
+                sink.write(palette)
+    assert len(list(read_palettes(sink.path))) == 10
+
+
+def test_sqlite_replaces_same_key(tmp_path):
+    """SQLite格式中相同配色代码的记录被替换"""
+    with open_palette_sink(SINK_SQLITE, str(tmp_path)) as sink:
+        for palette in make_palettes(3):
+            sink.write(palette)
+        sink.write(dict(make_palettes(1)[0], likes=99))
+    palettes = list(read_palettes(sink.path))
+    assert len(palettes) == 3
+    assert [p["likes"] for p in palettes if p["palette_id"] == f"{0:024x}"] == [99]
+
+
+@pytest.mark.parametrize("sink_type", SINK_TYPES)
+def test_concurrent_writers(tmp_path, sink_type):
+    """多个保存线程同时写入时记录不丢失、不交错"""
+    palettes = make_palettes(400)
+    with open_palette_sink(sink_type, str(tmp_path), buffer_size=16) as sink:
+        threads = [threading.Thread(target=lambda chunk: [sink.write(p) for p in chunk], args=(palettes[i::4],))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    path = str(tmp_path) if sink_type == SINK_JSON else sink.path
+    assert sorted(read_palettes(path), key=palette_key) == palettes
+
+
+def test_unknown_sink_type(tmp_path):
+    with pytest.raises(ValueError):
+        open_palette_sink("xml", str(tmp_path))
+
+
+def test_base_sink_is_abstract(tmp_path):
+    """基类没有实现 _write_batch，不能直接实例化"""
+    with pytest.raises(TypeError):
+        PaletteSink(str(tmp_path))
+
+
+def test_failed_write_keeps_buffer(tmp_path):
+    """写入失败时缓冲的记录保留，之后重试可以全部写入"""
+
+    class FlakySink(PaletteSink):
+        def __init__(self, path):
+            super().__init__(path, buffer_size=3)
+            self.failures = 1
+            self.written = []
+
+        def _write_batch(self, palettes):
+            if self.failures:
+                self.failures -= 1
+                raise OSError("No space left on device")
+            self.written.extend(palettes)
+
+    sink = FlakySink(str(tmp_path))
+    palettes = make_palettes(3)
+    sink.write(palettes[0])
+    sink.write(palettes[1])
+    with pytest.raises(OSError):
+        sink.write(palettes[2])
+
+    sink.close()
+    assert sink.written == palettes
+    assert sink.count == 3
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+本地配色方案库增量同步测试，使用伪造的最新列表，不访问真实网络
+"""
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.palette_repository import PaletteRepository
+from services.palette_sync import sync_tag, sync_tags, SYNC_STOP_KNOWN, SYNC_STOP_END, SYNC_STOP_MAX_PAGES
+from services.web_service import WebService
+
+PAGE_SIZE = 40
+
+
+class FakeResponse:
+    """模拟 requests 响应对象"""
+
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+
+class NewestFeed:
+    """模拟按发布时间从新到旧排列的feed接口，publish 在列表开头插入新配色方案"""
+
+    def __init__(self, count: int, status_code: int = 200):
+        self.items = []
+        self.next_id = 0
+        self.status_code = status_code
+        self.requests = []
+        self.publish(count)
+
+    def publish(self, count: int):
+        new_items = [{'code': f"{self.next_id + i:024x}", 'likes': str(i), 'date': '1 hour'} for i in range(count)]
+        self.next_id += count
+        self.items[:0] = reversed(new_items)
+
+    def post_feed(self, post_data, referer=None, timeout=None):
+        self.requests.append((post_data['tags'], post_data['step']))
+        step = post_data['step']
+        return FakeResponse(self.items[step * PAGE_SIZE:(step + 1) * PAGE_SIZE], self.status_code)
+
+
+def test_first_sync_walks_all_pages_then_stops_at_known(monkeypatch, tmp_path):
+    """首次同步遍历所有分页，之后只请求包含新配色方案的页"""
+    feed = NewestFeed(100)
+    monkeypatch.setattr(WebService, 'http_client', feed)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+
+    first = sync_tag('Summer', repo)
+    assert (first['pages'], first['fetched'], first['stopped']) == (4, 100, SYNC_STOP_END)
+    assert repo.count('summer') == 100
+
+    feed.publish(5)
+    feed.requests.clear()
+    second = sync_tag('Summer', repo)
+    assert (second['pages'], second['fetched'], second['stopped']) == (1, 5, SYNC_STOP_KNOWN)
+    assert second['head'] == f"{104:024x}"
+    assert feed.requests == [('summer', 0)]
+    assert repo.count('summer') == 105
+
+    # 没有新配色方案时只请求第一页
+    third = sync_tag('Summer', repo)
+    assert (third['pages'], third['fetched']) == (1, 0)
+    assert repo.sync_state('summer')['runs'] == 3
+    assert repo.sync_state('summer')['fetched'] == 105
+    repo.close()
+
+
+def test_new_items_spanning_pages(monkeypatch, tmp_path):
+    """新配色方案超过一页时继续翻页，跳过分页后移造成的重复记录"""
+    feed = NewestFeed(50)
+    monkeypatch.setattr(WebService, 'http_client', feed)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    sync_tag(None, repo)
+
+    feed.publish(60)
+    result = sync_tag(None, repo)
+    assert (result['pages'], result['fetched'], result['stopped']) == (2, 60, SYNC_STOP_KNOWN)
+    assert repo.count() == 110
+    repo.close()
+
+
+def test_known_codes_are_per_tag(monkeypatch, tmp_path):
+    """其他标签下已保存的配色方案在本标签中仍然写入"""
+    feed = NewestFeed(10)
+    monkeypatch.setattr(WebService, 'http_client', feed)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    sync_tag('blue', repo)
+
+    result = sync_tag('green', repo)
+    assert result['fetched'] == 10
+    assert repo.count('green') == 10 and repo.count() == 10
+    repo.close()
+
+
+def test_max_pages_and_full(monkeypatch, tmp_path):
+    """max_pages 限制请求的页数，full 遍历所有分页"""
+    feed = NewestFeed(100)
+    monkeypatch.setattr(WebService, 'http_client', feed)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+
+    limited = sync_tag('warm', repo, max_pages=2)
+    assert (limited['pages'], limited['fetched'], limited['stopped']) == (2, 80, SYNC_STOP_MAX_PAGES)
+
+    full = sync_tag('warm', repo, full=True)
+    assert (full['pages'], full['fetched'], full['stopped']) == (4, 100, SYNC_STOP_END)
+    assert repo.count('warm') == 100
+    repo.close()
+
+
+def test_truncated_first_sync_is_backfilled(monkeypatch, tmp_path):
+    """首次同步被截断后，之后的同步先抓取新配色方案，再从截断处补抓到feed末尾"""
+    feed = NewestFeed(100)
+    monkeypatch.setattr(WebService, 'http_client', feed)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+
+    first = sync_tag('warm', repo, max_pages=2)
+    assert (first['fetched'], first['pending']) == (80, True)
+
+    # 新配色方案用完页数，补抓继续等待
+    feed.publish(50)
+    second = sync_tag('warm', repo, max_pages=2)
+    assert (second['fetched'], second['stopped'], second['pending']) == (50, SYNC_STOP_KNOWN, True)
+
+    third = sync_tag('warm', repo, max_pages=10)
+    assert (third['fetched'], third['pending']) == (20, False)
+    assert repo.count('warm') == 150
+    assert repo.sync_state('warm')['resume_step'] is None
+    repo.close()
+
+
+def test_truncated_incremental_sync_leaves_no_gap(monkeypatch, tmp_path):
+    """增量同步被截断时补抓到上次同步的最新配色方案为止"""
+    feed = NewestFeed(100)
+    monkeypatch.setattr(WebService, 'http_client', feed)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    sync_tag('warm', repo)
+    old_head = repo.sync_state('warm')['head_code']
+
+    feed.publish(100)
+    truncated = sync_tag('warm', repo, max_pages=1)
+    assert (truncated['fetched'], truncated['stopped'], truncated['pending']) == (40, SYNC_STOP_MAX_PAGES, True)
+    assert repo.sync_state('warm')['backfill_until'] == old_head
+
+    feed.publish(5)
+    feed.requests.clear()
+    result = sync_tag('warm', repo)
+    assert (result['fetched'], result['pending']) == (65, False)
+    assert repo.count('warm') == 205
+    # 补抓在上次同步的最新配色方案处停止，不继续请求更早的页
+    assert feed.requests == [('warm', 0), ('warm', 1), ('warm', 2)]
+    repo.close()
+
+
+def test_sync_tags_reports_errors(monkeypatch, tmp_path):
+    """接口出错时不更新同步进度，返回每个标签的错误"""
+    monkeypatch.setattr(WebService, 'http_client', NewestFeed(10, status_code=503))
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+
+    success, error, results = sync_tags(['blue', 'red'], repo)
+    assert not success and '503' in error
+    assert [result['tag'] for result in results] == ['blue', 'red']
+    assert repo.sync_state('blue') is None
+    repo.close()
+
+
+def test_sync_bypasses_feed_cache(monkeypatch, tmp_path):
+    """未注入客户端时同步使用不缓存feed响应的客户端，不经过默认的缓存客户端"""
+    import services.http_client as http_client
+
+    live = NewestFeed(10)
+    cached = NewestFeed(3)
+    monkeypatch.setattr(WebService, 'http_client', None)
+    monkeypatch.setattr(http_client, '_live_client', live)
+    monkeypatch.setattr(http_client, '_default_client', cached)
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+
+    result = sync_tag('Summer', repo)
+
+    assert result['fetched'] == 10
+    assert cached.requests == []
+    repo.close()
+
+
+def test_live_client_has_no_feed_cache(monkeypatch):
+    """不缓存的共享客户端没有feed缓存，与默认客户端共用限流器"""
+    import services.http_client as http_client
+
+    monkeypatch.setattr(http_client, '_live_client', None)
+    client = http_client.get_live_http_client()
+    assert client.feed_cache is None
+    assert client.rate_limiter is http_client.get_rate_limiter()
+    assert http_client.get_live_http_client() is client
+    client.close()
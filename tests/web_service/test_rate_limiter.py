@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+RateLimiter 令牌桶与AIMD自适应并发测试
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.rate_limiter import RateLimiter
+from services.http_client import HttpClient
+
+from test_http_client import start_server
+
+
+def test_token_bucket_limits_rate():
+    """超出突发容量后按 rate 发放令牌"""
+    limiter = RateLimiter(rate=20, burst=2, initial_concurrency=16, max_concurrency=16)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        with limiter.slot() as slot:
+            slot.status_code = 200
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= (6 - 2) / 20 * 0.9
+
+
+def test_concurrency_limit_is_respected():
+    """同时进行的请求数不超过并发上限"""
+    limiter = RateLimiter(rate=1000, burst=1000, initial_concurrency=3, max_concurrency=3)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limiter.slot() as slot:
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+            slot.status_code = 200
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 3
+
+
+def test_aimd_decrease_and_increase():
+    """出错时乘性下调（同一时间窗口只下调一次），连续健康请求后加性上调"""
+    limiter = RateLimiter(rate=1000, burst=1000, initial_concurrency=8, max_concurrency=16,
+                          decrease_interval=60)
+
+    limiter.record(status_code=503)
+    limiter.record(status_code=429)
+    assert limiter.concurrency_limit == 4
+    assert limiter.stats()['decreases'] == 1
+
+    for _ in range(4):
+        limiter.record(status_code=200, latency=0.1)
+    assert limiter.concurrency_limit == 5
+
+    # 延迟过高的成功请求不提升并发
+    for _ in range(10):
+        limiter.record(status_code=200, latency=5)
+    assert limiter.concurrency_limit == 5
+
+
+def test_timeouts_count_as_errors():
+    """请求抛出异常时记为错误并下调并发"""
+    limiter = RateLimiter(initial_concurrency=4)
+
+    try:
+        with limiter.slot():
+            raise TimeoutError("timeout")
+    except TimeoutError:
+        pass
+
+    stats = limiter.stats()
+    assert stats['errors'] == 1 and stats['concurrency_limit'] == 2 and stats['in_flight'] == 0
+
+
+def test_retry_after_pauses_new_requests():
+    """429响应的 Retry-After 期间不发放新名额"""
+    limiter = RateLimiter(rate=1000, burst=1000)
+    limiter.record(status_code=429, retry_after='0.2')
+
+    start = time.perf_counter()
+    with limiter.slot() as slot:
+        slot.status_code = 200
+    assert time.perf_counter() - start >= 0.15
+
+
+def test_async_slot_shares_state():
+    """异步名额与同步名额共享同一个限流器状态"""
+    limiter = RateLimiter(rate=1000, burst=1000, initial_concurrency=2, max_concurrency=2)
+    peak = []
+    active = []
+
+    async def work():
+        async with limiter.async_slot() as slot:
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.02)
+            active.pop()
+            slot.status_code = 200
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(8)))
+
+    asyncio.run(main())
+    assert max(peak) == 2
+    assert limiter.stats()['requests'] == 8
+
+
+def test_http_client_reports_internal_retries():
+    """连接池内部重试的503响应也会反馈给限流器"""
+    limiter = RateLimiter(rate=1000, burst=1000, initial_concurrency=8, decrease_interval=0)
+    server, url = start_server()
+    try:
+        with HttpClient(max_retries=3, backoff_factor=0, rate_limiter=limiter) as client:
+            response = client.get(url)
+        assert response.status_code == 200
+    finally:
+        server.shutdown()
+
+    stats = limiter.stats()
+    assert stats['requests'] == 3
+    assert stats['errors'] == 2
+    assert stats['concurrency_limit'] == 2
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+ScrapePipeline 两阶段抓取流水线测试
+使用伪造的HTTP客户端，解析阶段运行在真实的进程池中
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.scrape_pipeline import ScrapePipeline, DownloadPipeline, get_parse_context
+from services.web_service import WebService
+
+SAMPLE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           'palette_page.html')
+
+
+class FakeResponse:
+    """模拟 requests 响应对象"""
+
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = 'utf-8'
+
+
+class PageClient:
+    """模拟 HttpClient，所有页面返回保存的调色板页面"""
+
+    def __init__(self, delay: float = 0.0, fail_codes=()):
+        with open(SAMPLE_PAGE, 'rb') as f:
+            self.content = f.read()
+        self.delay = delay
+        self.fail_codes = set(fail_codes)
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def get_page(self, url, timeout=None):
+        with self._lock:
+            self.requested.append(url)
+        time.sleep(self.delay)
+        if url.rsplit('/', 1)[-1] in self.fail_codes:
+            return FakeResponse(b'', status_code=404)
+        return FakeResponse(self.content)
+
+
+def make_urls(count: int):
+    return [f"https://colorhunt.co/palette/{i:024x}" for i in range(count)]
+
+
+def strip_timestamp(palette):
+    palette = dict(palette)
+    palette.pop('timestamp')
+    return palette
+
+
+def test_results_match_sequential_parser():
+    """流水线结果与逐个调用 parse_palette_page 一致"""
+    client = PageClient()
+    urls = make_urls(12)
+
+    pipeline = ScrapePipeline(fetch_workers=4, parse_workers=2, queue_size=3, http_client=client)
+    results = sorted((strip_timestamp(p) for p in pipeline.run(urls)), key=lambda p: p['id'])
+
+    html = client.content.decode('utf-8')
+    expected = sorted((strip_timestamp(WebService.parse_palette_page(url, html, idx, 200))
+                       for idx, url in enumerate(urls)), key=lambda p: p['id'])
+    assert results == expected
+    assert pipeline.stats() == {'fetched': 12, 'fetch_failed': 0, 'parsed': 12, 'parse_failed': 0}
+
+
+
+def test_parse_processes_are_not_forked_from_caller():
+    """解析进程不从已有线程的调用方进程直接fork"""
+    assert get_parse_context().get_start_method() in ('forkserver', 'spawn')
+    assert get_parse_context() is get_parse_context()
+
+def test_failed_fetches_are_skipped():
+    """请求失败的页面被跳过并计入统计"""
+    urls = make_urls(6)
+    client = PageClient(fail_codes={f"{1:024x}", f"{4:024x}"})
+
+    pipeline = ScrapePipeline(fetch_workers=2, parse_workers=1, http_client=client)
+    palettes = list(pipeline.run(urls))
+
+    assert len(palettes) == 4
+    assert pipeline.stats()['fetch_failed'] == 2
+
+
+def test_bounded_queues_limit_fetch_ahead():
+    """调用方停止消费时，抓取阶段最多领先队列容量，不会抓完所有URL"""
+    client = PageClient()
+    pipeline = ScrapePipeline(fetch_workers=2, parse_workers=1, queue_size=2, http_client=client)
+
+    results = pipeline.run(make_urls(200))
+    next(results)
+    time.sleep(0.3)
+    fetched_while_paused = len(client.requested)
+    results.close()
+
+    # 两个队列各2个 + 每个抓取线程手中1个 + 已产出的1个 + 解析中的少量页面
+    assert fetched_while_paused < 20
+
+
+def test_lazy_url_source():
+    """URL可以来自惰性生成器"""
+    client = PageClient()
+    pipeline = ScrapePipeline(fetch_workers=3, parse_workers=2, http_client=client)
+
+    palettes = list(pipeline.run(url for url in make_urls(5)))
+
+    assert len(palettes) == 5
+
+
+def test_fetch_details_runs_through_pipeline(monkeypatch):
+    """scrape_colorhunt_palettes 补充详情时经由流水线抓取，失败的页面保留feed数据"""
+    codes = [f"{i:024x}" for i in range(5)]
+    client = PageClient(fail_codes={codes[2]})
+    monkeypatch.setattr(WebService, 'http_client', client)
+    monkeypatch.setattr(WebService, 'get_palette_feed_items',
+                        staticmethod(lambda: [{'code': code, 'likes': '3', 'date': '1 day'} for code in codes]))
+
+    success, error, palettes = WebService.scrape_colorhunt_palettes(limit=5, fetch_details=True)
+
+    assert success and error is None
+    assert sorted(client.requested) == sorted(f"https://colorhunt.co/palette/{code}" for code in codes)
+    assert [p['palette_id'] for p in palettes] == codes
+    assert [bool(p['metadata'].get('details_fetched')) for p in palettes] == [True, True, False, True, True]
+    assert all(p['likes'] == 3 for p in palettes)
+
+
+def test_enhanced_palettes_keep_url_order(monkeypatch):
+    """get_enhanced_colorhunt_palettes 经由流水线抓取，结果按URL顺序排列"""
+    urls = make_urls(6)
+    client = PageClient(delay=0.01, fail_codes={f"{4:024x}"})
+    monkeypatch.setattr(WebService, 'http_client', client)
+    monkeypatch.setattr(WebService, 'get_palette_urls', staticmethod(lambda: urls))
+
+    success, error, palettes = WebService.get_enhanced_colorhunt_palettes(limit=6)
+
+    assert success and error is None
+    assert [p['source_url'] for p in palettes] == urls[:4] + urls[5:]
+    assert [p['id'].split('-')[1] for p in palettes] == ['1', '2', '3', '4', '6']
+
+
+class SlowDownloader:
+    """模拟GUI下载器的获取和保存函数，记录调用和并发数"""
+
+    def __init__(self, fetch_delay: float = 0.05, save_delay: float = 0.02, fail_fetch=(), fail_save=()):
+        self.fetch_delay = fetch_delay
+        self.save_delay = save_delay
+        self.fail_fetch = set(fail_fetch)
+        self.fail_save = set(fail_save)
+        self.fetched = []
+        self.saved = []
+        self._lock = threading.Lock()
+
+    def fetch(self, url, idx):
+        with self._lock:
+            self.fetched.append(idx)
+        time.sleep(self.fetch_delay)
+        if idx in self.fail_fetch:
+            raise RuntimeError("网络错误")
+        return {"palette_id": url.rsplit('/', 1)[-1], "idx": idx}
+
+    def save(self, palette):
+        time.sleep(self.save_delay)
+        if palette["idx"] in self.fail_save:
+            return None
+        with self._lock:
+            self.saved.append(palette["idx"])
+        return dict(palette, image_path=f"{palette['palette_id']}.png")
+
+
+def test_download_pipeline_overlaps_fetch_and_save():
+    """获取和保存并发执行，总耗时远小于串行执行"""
+    downloader = SlowDownloader()
+    pipeline = DownloadPipeline(downloader.fetch, downloader.save, fetch_workers=8, save_workers=4)
+
+    start = time.time()
+    results = dict(pipeline.run(make_urls(40)))
+    elapsed = time.time() - start
+
+    assert sorted(results) == list(range(40))
+    assert results[3]["image_path"] == f"{3:024x}.png"
+    assert elapsed < 40 * (downloader.fetch_delay + downloader.save_delay) / 3
+    assert pipeline.stats() == {'fetched': 40, 'fetch_failed': 0, 'saved': 40, 'save_failed': 0, 'cancelled': 0}
+
+
+def test_download_pipeline_failures_are_counted():
+    """获取出错、获取为空和保存失败的配色方案不产出"""
+    downloader = SlowDownloader(fetch_delay=0, save_delay=0, fail_fetch={1}, fail_save={4})
+    pipeline = DownloadPipeline(lambda url, idx: None if idx == 2 else downloader.fetch(url, idx), downloader.save,
+                                fetch_workers=2, save_workers=2)
+
+    assert sorted(idx for idx, _ in pipeline.run(make_urls(6))) == [0, 3, 5]
+    stats = pipeline.stats()
+    assert (stats['fetched'], stats['fetch_failed'], stats['saved'], stats['save_failed']) == (4, 2, 3, 1)
+
+    # 不保存时直接产出获取结果
+    fetch_only = DownloadPipeline(downloader.fetch, fetch_workers=2)
+    assert len(list(fetch_only.run(make_urls(3)))) == 2
+
+
+def test_download_pipeline_stop():
+    """停止后不再提交新任务，已产出的配色方案都已保存完成"""
+    downloader = SlowDownloader(fetch_delay=0.02, save_delay=0.02)
+    pipeline = DownloadPipeline(downloader.fetch, downloader.save, fetch_workers=2, save_workers=2)
+
+    results = []
+    for idx, palette in pipeline.run(make_urls(200)):
+        results.append(idx)
+        if len(results) == 5:
+            threading.Thread(target=pipeline.stop).start()
+
+    assert pipeline.stopped
+    assert len(downloader.fetched) < 40
+    assert sorted(downloader.saved) == sorted(results)
+    assert not any(thread.name.startswith('download-') for thread in threading.enumerate())
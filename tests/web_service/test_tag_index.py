@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+标签倒排索引测试，与逐个配色方案判断标签集合的实现对比
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.tag_index import TagIndex, get_tag_index, query_palettes_by_tags
+from services.palette_repository import PaletteRepository
+from models.palette import Palette, PaletteBatch
+
+TAGS = ['warm', 'cold', 'vintage', 'dark', 'pastel']
+
+# (查询, 对每个配色方案标签集合 s 的判断)
+QUERIES = [
+    ('warm', lambda s: 'warm' in s),
+    ('warm AND vintage NOT dark', lambda s: 'warm' in s and 'vintage' in s and 'dark' not in s),
+    ('warm vintage -dark', lambda s: 'warm' in s and 'vintage' in s and 'dark' not in s),
+    ('Warm or PASTEL', lambda s: 'warm' in s or 'pastel' in s),
+    ('warm OR cold AND dark', lambda s: 'warm' in s or ('cold' in s and 'dark' in s)),
+    ('(warm OR cold) AND dark', lambda s: ('warm' in s or 'cold' in s) and 'dark' in s),
+    ('NOT dark', lambda s: 'dark' not in s),
+    ('NOT (warm OR cold) pastel', lambda s: 'warm' not in s and 'cold' not in s and 'pastel' in s),
+    ('NOT NOT vintage', lambda s: 'vintage' in s),
+    ('missing OR dark', lambda s: 'dark' in s),
+]
+
+
+def random_batch(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    rgb = rng.integers(0, 256, size=(n, 12), dtype=np.uint8)
+    selected = rng.random((n, len(TAGS))) < 0.3
+    likes = rng.integers(0, 50, size=n)
+    palettes = [
+        Palette(row.tobytes(), likes=int(like), tags=[tag.title() for tag, on in zip(TAGS, sel) if on])
+        for row, sel, like in zip(rgb, selected, likes)
+    ]
+    return PaletteBatch(palettes), [{t for t, on in zip(TAGS, sel) if on} for sel in selected], likes
+
+
+def test_queries_match_reference():
+    """组合查询的结果与逐个配色方案判断相同"""
+    batch, tag_sets, _ = random_batch()
+    index = TagIndex.from_batch(batch)
+    for query, predicate in QUERIES:
+        expected = [i for i, tags in enumerate(tag_sets) if predicate(tags)]
+        assert index.match(query).tolist() == expected, query
+
+
+def test_search_ranks_by_likes():
+    """结果按点赞数从高到低排列，相同时按序号，分页结果与完整排序一致"""
+    batch, tag_sets, likes = random_batch()
+    index = TagIndex.from_batch(batch)
+    codes = batch.codes()
+    expected = sorted((i for i, tags in enumerate(tag_sets) if 'warm' in tags), key=lambda i: (-likes[i], i))
+
+    total, top = index.search('warm', limit=len(expected))
+    assert total == len(expected)
+    assert [code for code, _ in top] == [codes[i] for i in expected]
+    assert [like for _, like in top] == [int(likes[i]) for i in expected]
+
+    _, page = index.search('warm', limit=7, offset=5)
+    assert [code for code, _ in page] == [codes[i] for i in expected[5:12]]
+    assert index.search('warm', limit=5, offset=len(expected))[1] == []
+    # 负数的偏移和数量按0处理
+    assert index.search('warm', limit=3, offset=-2)[1] == top[:3]
+    assert index.search('warm', limit=-1) == (len(expected), [])
+
+
+@pytest.mark.parametrize('query', ['', 'warm AND', '(warm', 'warm)', 'NOT', 'OR warm'])
+def test_invalid_queries(query):
+    """语法错误抛出 ValueError"""
+    index, _, _ = random_batch(50)
+    with pytest.raises(ValueError):
+        TagIndex.from_batch(index).match(query)
+
+
+def test_repository_index_and_rebuild(tmp_path):
+    """由配色方案库建立索引，写入后重建；查询结果包含配色方案数据"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    batch, tag_sets, _ = random_batch(300)
+    repo.upsert(batch)
+
+    index = get_tag_index(repo)
+    codes = batch.codes()
+    for query, predicate in QUERIES:
+        expected = sorted(codes[i] for i, tags in enumerate(tag_sets) if predicate(tags))
+        assert [index.codes[i] for i in index.match(query)] == expected, query
+
+    repo.upsert([Palette.from_code('ff0000' * 4, likes=10000, tags=['Warm'])])
+    success, error, result = query_palettes_by_tags('warm -dark', limit=3, repository=repo)
+    assert success and error is None
+    assert result['palettes'][0]['palette_id'] == 'ff0000' * 4
+    assert result['total'] == sum(1 for tags in tag_sets if 'warm' in tags and 'dark' not in tags) + 1
+
+    success, error, _ = query_palettes_by_tags('warm AND', repository=repo)
+    assert not success and '语法' in error
+    repo.close()
+
+
+def test_repository_index_skips_orphan_tags(tmp_path):
+    """标签表中配色代码不在配色方案表中的记录被丢弃，不会映射到其他配色方案"""
+    repo = PaletteRepository(str(tmp_path / 'store.sqlite3'))
+    repo.upsert([Palette.from_code('11' * 12, likes=1, tags=['Warm']),
+                 Palette.from_code('33' * 12, likes=3, tags=['Cold'])])
+    with repo._connect() as conn:
+        conn.executemany("INSERT INTO palette_tags (tag, code, likes) VALUES (?, ?, 0)",
+                         [('warm', '22' * 12), ('warm', 'ff' * 12), ('retro', '00' * 12)])
+
+    index = TagIndex.from_repository(repo)
+    assert [index.codes[i] for i in index.postings('warm')] == ['11' * 12]
+    assert [index.codes[i] for i in index.postings('cold')] == ['33' * 12]
+    assert len(index.postings('retro')) == 0
+    repo.close()
@@ -5,24 +5,21 @@
 """
 import sys
 import os
-import requests
 from bs4 import BeautifulSoup
 import re
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import get_http_client
+
+http_client = get_http_client()
+
 def analyze_html_structure():
     """分析HTML结构"""
     print("🔍 分析ColorHunt配色方案页面HTML结构")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
     # 测试截图中的配色方案
     url = 'https://colorhunt.co/palette/626f47a4b465f5ecd5f0bb78'
     
@@ -30,7 +27,7 @@ def analyze_html_structure():
     print("-" * 40)
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get_page(url, timeout=10)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -102,15 +99,6 @@ def check_feed_api():
     print("🔍 检查feed.php API响应")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/html, */*',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-        'X-Requested-With': 'XMLHttpRequest',
-        'Referer': 'https://colorhunt.co/'
-    }
-    
     # 测试不同的API参数，看看是否有其他字段
     test_cases = [
         {'step': 0, 'sort': 'popular', 'tags': '', 'timeframe': '30'},
@@ -122,12 +110,7 @@ def check_feed_api():
         print(f"\n📋 测试API参数 {i+1}: {post_data}")
         
         try:
-            response = requests.post(
-                'https://colorhunt.co/php/feed.php', 
-                headers=headers, 
-                data=post_data,
-                timeout=10
-            )
+            response = http_client.post_feed(post_data, timeout=10)
             
             print(f"状态码: {response.status_code}")
             print(f"响应长度: {len(response.text)}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+调色板页面提取性能测试
+对比原有的逐个正则 + BeautifulSoup 提取、以及新提取器 html.parser 和 lxml 两种引擎
+在保存的页面上的提取速度，并校验结果一致
+"""
+import sys
+import os
+import re
+import glob
+import time
+import argparse
+import logging
+
+from bs4 import BeautifulSoup
+
+# 添加项目根目录到 Python 路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from services.palette_extractor import PaletteExtractor, COLORHUNT_PAGE_TAGS, LXML_SUPPORT
+from services.web_service import WebService
+
+SAMPLE_URL = 'https://colorhunt.co/palette/626f47a4b465f5ecd5f0bb78'
+
+
+def baseline_fields(html: str):
+    """原 parse_palette_page 中的字段提取逻辑（BeautifulSoup 解析整页后逐个查找），作为对比基准"""
+    soup = BeautifulSoup(html, 'html.parser')
+    title_elem = soup.find('title')
+    title = title_elem.text.strip() if title_elem else None
+
+    likes = 0
+    for pattern in [r"'likes':\s*(\d+)", r'"likes":\s*(\d+)', r"likes['\"]:\s*(\d+)",
+                    r"formatThousands\((\d+)\)", r"\.text\((\d+)\)"]:
+        matches = re.findall(pattern, html)
+        if matches:
+            potential_likes = [int(m) for m in matches if int(m) > 0]
+            if potential_likes:
+                likes = max(potential_likes)
+                break
+    if likes == 0:
+        for selector in ['.like span', '.button.like span', '.actions .like span',
+                         '[data-likes]', '.likes-count', '.like-count']:
+            for like_elem in soup.select(selector):
+                try:
+                    like_text = like_elem.text.strip()
+                    if like_text and like_text.isdigit():
+                        likes = int(like_text)
+                        break
+                    elif like_text and 'k' in like_text.lower():
+                        likes = int(float(like_text.lower().replace('k', '')) * 1000)
+                        break
+                except (ValueError, AttributeError):
+                    continue
+            if likes > 0:
+                break
+
+    date = ""
+    for pattern in [r"'date':\s*['\"]([^'\"]+)['\"]", r'"date":\s*"([^"]+)"', r"date['\"]:\s*['\"]([^'\"]+)['\"]"]:
+        matches = re.findall(pattern, html)
+        if matches:
+            date = matches[0]
+            break
+    if not date:
+        for selector in ['.date', '.time', '.timestamp', '.created']:
+            date_elem = soup.select_one(selector)
+            if date_elem and date_elem.text.strip():
+                date = date_elem.text.strip()
+                break
+
+    tags = []
+    for pattern in [r"tags['\"]:\s*['\"]([^'\"]+)['\"]", r"'tags':\s*['\"]([^'\"]+)['\"]", r'"tags":\s*"([^"]+)"']:
+        matches = re.findall(pattern, html)
+        if matches:
+            for tag in matches[0].split('-'):
+                tag = tag.strip().lower()
+                if tag in COLORHUNT_PAGE_TAGS:
+                    tags.append(tag.title())
+            break
+
+    return {'title': title, 'likes': likes, 'date': date, 'tags': tags}
+
+
+def load_pages():
+    """加载 tests/debug_files 和项目根目录下保存的页面"""
+    paths = sorted(glob.glob(os.path.join(ROOT, 'tests', 'debug_files', '*.html')))
+    paths += sorted(glob.glob(os.path.join(ROOT, 'palette_*.html')))
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def time_per_page(func, pages, repeat: int) -> float:
+    """返回每页平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            func(html)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='调色板页面提取性能测试')
+    parser.add_argument('--repeat', '-r', type=int, default=20, help='每页重复次数')
+    args = parser.parse_args()
+
+    # 关闭提取过程中的日志输出，避免影响计时
+    logging.disable(logging.INFO)
+
+    pages = load_pages()
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"📄 共 {len(pages)} 个页面, {total_kb:.0f} KB, 每页重复 {args.repeat} 次")
+    print("=" * 60)
+
+    engines = ['html.parser'] + (['lxml'] if LXML_SUPPORT else [])
+    extractors = {engine: PaletteExtractor(engine) for engine in engines}
+
+    # 校验两种引擎与原实现结果一致
+    for name, html in pages:
+        results = [baseline_fields(html)] + [extractor.extract(html) for extractor in extractors.values()]
+        if any(result != results[0] for result in results):
+            print(f"❌ {name}: 提取结果不一致 {results}")
+            return 1
+    print("✅ 所有引擎与原实现提取结果一致")
+
+    timings = {'原实现 (BeautifulSoup)': time_per_page(baseline_fields, pages, args.repeat)}
+    timings['单次扫描（不解析DOM）'] = time_per_page(PaletteExtractor.scan, pages, args.repeat)
+    for engine, extractor in extractors.items():
+        timings[f'提取字段 ({engine})'] = time_per_page(extractor.extract, pages, args.repeat)
+    timings['parse_palette_page'] = time_per_page(
+        lambda html: WebService.parse_palette_page(SAMPLE_URL, html), pages, args.repeat
+    )
+
+    baseline = timings['原实现 (BeautifulSoup)']
+    for label, ms in timings.items():
+        print(f"{label:<28} {ms:8.2f} ms/页   {baseline / ms:6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
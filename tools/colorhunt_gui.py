@@ -8,7 +8,6 @@ import os
 import json
 import time
 import logging
-import requests
 from bs4 import BeautifulSoup
 import re
 import random
@@ -16,6 +15,16 @@ import concurrent.futures
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import HttpClient, get_http_client
+from services.web_service import WebService, FeedRequestError
+from models.palette import Palette
+from services.color_tagger import get_color_tagger
+from services.scrape_pipeline import DownloadPipeline
+from services.palette_sink import open_palette_sink, SINK_JSON, SINK_TYPES
+
 # PyQt imports
 try:
     from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
@@ -89,15 +98,14 @@ class PaletteImageGenerator:
 class ColorHuntScraper:
     """ColorHunt网站爬虫类"""
     
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/html, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-            'X-Requested-With': 'XMLHttpRequest',
-            'Referer': 'https://colorhunt.co/'
-        }
+    def __init__(self, http_client: Optional[HttpClient] = None):
+        """
+        初始化爬虫
+        
+        Args:
+            http_client: HTTP客户端，为None时使用进程内共享的连接池客户端
+        """
+        self.http_client = http_client or get_http_client()
         
         self.available_tags = [
             "popular", "new", "random", 
@@ -153,7 +161,7 @@ class ColorHuntScraper:
                 url = f'https://colorhunt.co/palettes/{tag}'
             
             logger.info(f"访问URL: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http_client.get_page(url, timeout=10)
             
             if response.status_code == 200:
                 # 使用正则表达式查找配色方案URL
@@ -248,34 +256,24 @@ class ColorHuntScraper:
                 }
             
             logger.info(f"API参数: {post_data}")
-            response = requests.post(
-                'https://colorhunt.co/php/feed.php', 
-                headers=self.headers, 
-                data=post_data,
-                timeout=10
-            )
             
-            if response.status_code == 200:
-                try:
-                    api_data = json.loads(response.text)
-                    if api_data and len(api_data) > 0:
-                        logger.info(f"API成功: 标签 {tag} 获取到 {len(api_data)} 个配色方案")
-                        
-                        palettes = []
-                        for i, item in enumerate(api_data[:limit]):
-                            if 'code' in item:
-                                palette = self.create_palette_from_api_data(item, i, tag)
-                                if palette:
-                                    palettes.append(palette)
-                        
-                        if palettes:
-                            logger.info(f"API方法成功创建 {len(palettes)} 个配色方案数据")
-                            return palettes
-                            
-                except json.JSONDecodeError as e:
-                    logger.warning(f"API JSON解析失败: {e}")
-            else:
-                logger.warning(f"API请求失败, 状态码: {response.status_code}")
+            # 逐页请求API，数量超过单页时自动翻页
+            palettes = []
+            try:
+                api_items = WebService.iter_feed_items(post_data, limit=limit, timeout=10,
+                                                       http_client=self.http_client)
+                for i, item in enumerate(api_items):
+                    palette = self.create_palette_from_api_data(item, i, tag)
+                    if palette:
+                        palettes.append(palette)
+            except FeedRequestError as e:
+                logger.warning(f"API请求失败, 状态码: {e.status_code}")
+            except json.JSONDecodeError as e:
+                logger.warning(f"API JSON解析失败: {e}")
+            
+            if palettes:
+                logger.info(f"API方法成功创建 {len(palettes)} 个配色方案数据")
+                return palettes
                 
         except Exception as e:
             logger.warning(f"API请求异常: {e}")
@@ -296,16 +294,11 @@ class ColorHuntScraper:
         """
         try:
             code = api_item.get('code', '')
-            if not code or len(code) != 24:
+            rgb = Palette.pack_code(code)
+            if rgb is None:
                 logger.warning(f"无效的配色代码: {code}")
                 return None
             
-            # 从code提取颜色
-            colors = []
-            for i in range(4):
-                hex_color = f"#{code[i*6:(i+1)*6].upper()}"
-                colors.append(hex_color)
-            
             # 获取真实的点赞数
             likes = api_item.get('likes', 0)
             if isinstance(likes, str):
@@ -320,37 +313,14 @@ class ColorHuntScraper:
             if not date:
                 date = time.strftime("%Y-%m-%d")  # 如果API没有日期，使用当前日期作为备用
             
-            # 构建配色方案名称
-            if tag == 'popular-month':
-                name = "ColorHunt Popular (Month) Palette"
-            elif tag == 'popular-year':
-                name = "ColorHunt Popular (Year) Palette"
-            elif tag == 'popular-alltime':
-                name = "ColorHunt Popular (All Time) Palette"
-            else:
-                name = f"ColorHunt {tag.title()} Palette"
-            
-            # 构建URL
-            source_url = f"https://colorhunt.co/palette/{code}"
-            
             # 使用用户选择的标签作为默认标签，而不是推断的标签
             tags_list = self.get_user_selected_tags(tag)
             
-            # 创建配色方案数据
-            palette_data = {
-                "id": f"colorhunt-api-{idx+1}-{code}",
-                "name": name,
-                "colors": colors,
-                "source": "colorhunt.co",
-                "source_url": source_url,
-                "palette_id": code,
-                "likes": likes,  # 真实的点赞数
-                "date": date,    # 真实的相对时间格式日期
-                "tags": tags_list,  # 用户选择的标签
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "extraction_method": "Direct API data with user selected tags",
-                "api_source": True  # 标记这是来自API的真实数据
-            }
+            # 名称、URL等字段在 to_dict 时根据标签和代码生成
+            palette = Palette(rgb, likes=likes, date=date, tags=tags_list, idx=idx,
+                              kind=Palette.KIND_GUI, tag=tag)
+            palette_data = palette.to_dict()
+            name = palette_data["name"]
             
             logger.info(f"从API创建配色方案: {name}, 点赞数: {likes}, 日期: {date}, 标签: {tags_list}")
             return palette_data
@@ -413,60 +383,8 @@ class ColorHuntScraper:
         Returns:
             List[str]: 推断的标签列表
         """
-        all_tags = set()
-        
-        # 颜色分析规则
-        color_rules = {
-            'green': lambda r, g, b: g > r and g > b and g > 100,
-            'sage': lambda r, g, b: 90 <= r <= 120 and 100 <= g <= 130 and 60 <= b <= 80,
-            'beige': lambda r, g, b: r > 200 and g > 200 and b > 180 and abs(r-g) < 30,
-            'earth': lambda r, g, b: (r > g > b) or (r > 100 and g > 80 and b < 100),
-            'nature': lambda r, g, b: g > r or g > b,  # 绿色系
-            'warm': lambda r, g, b: r > 150 or (r > g and r > b),
-            'light': lambda r, g, b: r > 200 and g > 200 and b > 200,
-            'pastel': lambda r, g, b: min(r, g, b) > 150 and max(r, g, b) < 255,
-            'vintage': lambda r, g, b: max(r, g, b) - min(r, g, b) < 100 and max(r, g, b) < 200,
-            'dark': lambda r, g, b: max(r, g, b) < 100,
-            'bright': lambda r, g, b: max(r, g, b) > 200 and (max(r, g, b) - min(r, g, b)) > 100,
-            'muted': lambda r, g, b: (max(r, g, b) - min(r, g, b)) < 50,
-            'blue': lambda r, g, b: b > r and b > g and b > 100,
-            'red': lambda r, g, b: r > g and r > b and r > 150,
-            'yellow': lambda r, g, b: r > 200 and g > 200 and b < 150,
-            'orange': lambda r, g, b: r > 200 and g > 150 and b < 100,
-            'purple': lambda r, g, b: r > 100 and b > 100 and g < min(r, b),
-            'pink': lambda r, g, b: r > 200 and b > 150 and g < r,
-            'brown': lambda r, g, b: r > g > b and r < 150 and g < 120,
-            'gray': lambda r, g, b: abs(r-g) < 20 and abs(g-b) < 20 and abs(r-b) < 20,
-            'cream': lambda r, g, b: r > 240 and g > 230 and b > 200,
-            'gold': lambda r, g, b: r > 200 and g > 180 and b < 100,
-            'sky': lambda r, g, b: b > r and b > g and b > 150 and r < 200,
-            'ocean': lambda r, g, b: b > g > r and b > 100,
-            'forest': lambda r, g, b: g > r and g > b and g < 150,
-            'sunset': lambda r, g, b: r > 200 and g > 100 and b < 150,
-            'summer': lambda r, g, b: (r > 200 or g > 200) and b < 200,
-            'winter': lambda r, g, b: max(r, g, b) < 150 or (r > 200 and g > 200 and b > 200),
-            'spring': lambda r, g, b: g > 150 and (r > 150 or b > 150),
-            'fall': lambda r, g, b: r > 150 and g > 100 and b < 150
-        }
-        
-        for color in colors:
-            # 移除#号并转换为RGB
-            hex_color = color.lstrip('#')
-            try:
-                r = int(hex_color[0:2], 16)
-                g = int(hex_color[2:4], 16)
-                b = int(hex_color[4:6], 16)
-                
-                # 应用颜色规则
-                for tag, rule in color_rules.items():
-                    if rule(r, g, b):
-                        all_tags.add(tag.title())
-                        
-            except ValueError:
-                continue
-        
-        # 转换为列表并限制数量
-        tags = sorted(list(all_tags))[:8]  # 最多8个标签
+        # 颜色分析规则见 services.color_tagger.DETAILED_RULES，按名称排序后最多8个标签
+        tags = get_color_tagger().tag_colors(colors)
         
         logger.info(f"基于颜色分析推断的标签: {tags}")
         return tags
@@ -504,7 +422,7 @@ class ColorHuntScraper:
         try:
             logger.info(f"请求调色板页面: {url}")
             
-            response = requests.get(url, headers=self.headers, timeout=8)
+            response = self.http_client.get_page(url, timeout=8)
             if response.status_code != 200:
                 logger.warning(f"请求 {url} 失败, 状态码: {response.status_code}")
                 return None
@@ -597,20 +515,50 @@ class ColorHuntScraper:
             return None
 
 class DownloadThread(QThread):
-    """下载线程"""
+    """下载线程，获取、保存配色方案由 DownloadPipeline 并发执行"""
     progress_updated = pyqtSignal(int)
     status_updated = pyqtSignal(str)
     palette_downloaded = pyqtSignal(dict)
     finished_signal = pyqtSignal(bool, str, list)
     
-    def __init__(self, tag, count, save_dir, save_images, save_json):
+    def __init__(self, tag, count, save_dir, save_images, save_json, json_format=SINK_JSON):
         super().__init__()
         self.tag = tag
         self.count = count
         self.save_dir = save_dir
         self.save_images = save_images
         self.save_json = save_json
+        self.json_format = json_format
+        self.sink = None
         self.scraper = ColorHuntScraper()
+        self.images_dir = os.path.join(save_dir, "images")
+        self.pipeline = DownloadPipeline(self.scraper.extract_palette_data_from_url, self.save_palette)
+    
+    def stop(self):
+        """请求停止下载，进行中的保存任务完成后线程结束"""
+        self.pipeline.stop()
+    
+    @property
+    def stopped(self) -> bool:
+        return self.pipeline.stopped
+    
+    def save_palette(self, palette_data: Dict) -> Dict:
+        """在保存线程中写入JSON和生成图片"""
+        # 保存JSON，写入副本使缓冲的记录不包含之后添加的图片路径
+        if self.sink is not None:
+            self.sink.write(dict(palette_data))
+        
+        # 保存图片
+        if self.save_images and PALETTE_IMAGE_SUPPORT:
+            try:
+                img_path = PaletteImageGenerator.create_palette_image(
+                    palette_data['colors'], palette_data['palette_id'], self.images_dir
+                )
+                palette_data["image_path"] = img_path
+            except Exception as e:
+                logger.warning(f"生成图片失败: {e}")
+        
+        return palette_data
         
     def run(self):
         """运行下载任务"""
@@ -620,6 +568,9 @@ class DownloadThread(QThread):
             # 获取URL列表
             urls = self.scraper.get_palette_urls_by_tag(self.tag, self.count)
             
+            if self.stopped:
+                self.finished_signal.emit(False, "下载已停止", [])
+                return
             if not urls:
                 self.finished_signal.emit(False, f"无法从ColorHunt网站获取标签'{self.tag}'的真实配色方案数据。请检查网络连接或尝试其他标签。", [])
                 return
@@ -629,45 +580,33 @@ class DownloadThread(QThread):
             # 创建保存目录
             os.makedirs(self.save_dir, exist_ok=True)
             if self.save_images:
-                images_dir = os.path.join(self.save_dir, "images")
-                os.makedirs(images_dir, exist_ok=True)
+                os.makedirs(self.images_dir, exist_ok=True)
             
-            # 下载配色方案
-            palettes = []
-            for i, url in enumerate(urls):
-                try:
-                    self.status_updated.emit(f"下载配色方案 {i+1}/{len(urls)}")
-                    
-                    palette_data = self.scraper.extract_palette_data_from_url(url, i)
-                    if palette_data:
-                        palettes.append(palette_data)
-                        
-                        # 保存JSON
-                        if self.save_json:
-                            json_path = os.path.join(self.save_dir, f"palette_{palette_data['palette_id']}.json")
-                            with open(json_path, 'w', encoding='utf-8') as f:
-                                json.dump(palette_data, f, indent=2, ensure_ascii=False)
-                        
-                        # 保存图片
-                        if self.save_images and PALETTE_IMAGE_SUPPORT:
-                            try:
-                                img_path = PaletteImageGenerator.create_palette_image(
-                                    palette_data['colors'], palette_data['palette_id'], images_dir
-                                )
-                                palette_data["image_path"] = img_path
-                            except Exception as e:
-                                logger.warning(f"生成图片失败: {e}")
-                        
-                        self.palette_downloaded.emit(palette_data)
-                    
-                    # 更新进度
-                    progress = int((i + 1) / len(urls) * 100)
-                    self.progress_updated.emit(progress)
+            # 每个配色方案保存完成后立即更新预览和进度
+            results = {}
+            if self.save_json:
+                self.sink = open_palette_sink(self.json_format, self.save_dir)
+            try:
+                for idx, palette_data in self.pipeline.run(urls):
+                    results[idx] = palette_data
+                    self.palette_downloaded.emit(palette_data)
                     
-                except Exception as e:
-                    logger.warning(f"下载 {url} 失败: {e}")
-                    continue
+                    stats = self.pipeline.stats()
+                    done = stats['fetch_failed'] + stats['saved'] + stats['save_failed']
+                    self.status_updated.emit(f"已下载配色方案 {done}/{len(urls)}")
+                    self.progress_updated.emit(int(done / len(urls) * 100))
+            finally:
+                # 停止或出错时同样写入已缓冲的记录
+                if self.sink is not None:
+                    self.sink.close()
+            
+            # 按原始顺序返回结果
+            palettes = [results[idx] for idx in sorted(results)]
+            if self.stopped:
+                self.finished_signal.emit(False, f"下载已停止，已保存 {len(palettes)} 个配色方案", palettes)
+                return
             
+            self.progress_updated.emit(100)
             self.finished_signal.emit(True, f"成功下载 {len(palettes)} 个配色方案", palettes)
             
         except Exception as e:
@@ -736,7 +675,12 @@ class ColorHuntGUI(QMainWindow):
         self.save_images_check = QCheckBox("保存配色图片")
         self.save_images_check.setChecked(PALETTE_IMAGE_SUPPORT)
         self.save_images_check.setEnabled(PALETTE_IMAGE_SUPPORT)
+        self.json_format_combo = QComboBox()
+        self.json_format_combo.addItems(SINK_TYPES)
+        self.json_format_combo.setCurrentText(SINK_JSON)
+        self.json_format_combo.setToolTip("json: 每个配色方案一个文件；jsonl / jsonl.gz / sqlite: 保存到单个文件")
         options_layout.addWidget(self.save_json_check)
+        options_layout.addWidget(self.json_format_combo)
         options_layout.addWidget(self.save_images_check)
         settings_layout.addLayout(options_layout, 3, 0, 1, 2)
         
@@ -797,6 +741,7 @@ class ColorHuntGUI(QMainWindow):
         save_dir = self.dir_label.text()
         save_images = self.save_images_check.isChecked()
         save_json = self.save_json_check.isChecked()
+        json_format = self.json_format_combo.currentText()
         
         # 清空之前的结果
         self.palettes.clear()
@@ -804,7 +749,7 @@ class ColorHuntGUI(QMainWindow):
         self.clear_preview()
         
         # 创建并启动下载线程
-        self.download_thread = DownloadThread(tag, count, save_dir, save_images, save_json)
+        self.download_thread = DownloadThread(tag, count, save_dir, save_images, save_json, json_format)
         self.download_thread.progress_updated.connect(self.update_progress)
         self.download_thread.status_updated.connect(self.update_status)
         self.download_thread.palette_downloaded.connect(self.add_palette_preview)
@@ -818,10 +763,12 @@ class ColorHuntGUI(QMainWindow):
         self.progress_bar.setValue(0)
         
     def stop_download(self):
-        """停止下载"""
+        """停止下载，不强制结束线程，进行中的保存任务完成后由 download_finished 恢复界面"""
         if self.download_thread and self.download_thread.isRunning():
-            self.download_thread.terminate()
-            self.download_thread.wait()
+            self.download_thread.stop()
+            self.stop_button.setEnabled(False)
+            self.status_label.setText("正在停止下载...")
+            return
         
         self.download_button.setEnabled(True)
         self.stop_button.setEnabled(False)
@@ -888,7 +835,9 @@ class ColorHuntGUI(QMainWindow):
         self.download_button.setEnabled(True)
         self.stop_button.setEnabled(False)
         
-        if success:
+        if self.download_thread and self.download_thread.stopped:
+            self.status_label.setText(message)
+        elif success:
             self.status_label.setText(f"下载完成！{message}")
             QMessageBox.information(self, "下载完成", message)
         else:
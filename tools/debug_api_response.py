@@ -6,22 +6,20 @@
 import sys
 import os
 import json
-import requests
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import get_live_http_client
+
+# 调试时需要看到接口的实时响应，不使用feed缓存
+http_client = get_live_http_client()
 
 def debug_api_response():
     """调试API响应数据"""
     print("🔍 调试ColorHunt API响应数据")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/html, */*',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-        'X-Requested-With': 'XMLHttpRequest',
-        'Referer': 'https://colorhunt.co/'
-    }
-    
     # 测试不同的API参数
     test_cases = [
         ('popular', {'step': 0, 'sort': 'popular', 'tags': '', 'timeframe': '30'}),
@@ -35,12 +33,7 @@ def debug_api_response():
         print("-" * 40)
         
         try:
-            response = requests.post(
-                'https://colorhunt.co/php/feed.php', 
-                headers=headers, 
-                data=post_data,
-                timeout=10
-            )
+            response = http_client.post_feed(post_data, timeout=10)
             
             if response.status_code == 200:
                 try:
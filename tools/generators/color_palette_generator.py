@@ -3,15 +3,34 @@
 配色方案图片生成工具
 用于将抓取的配色方案转换为图片格式
 """
+import io
 import os
+import sys
 import json
+import hashlib
+import threading
+from xml.sax.saxutils import escape
+import concurrent.futures
+from collections import OrderedDict
 from PIL import Image, ImageDraw, ImageFont
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 import logging
 import math
 import argparse
 import time
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.palette_sink import open_palette_sink, JsonFileSink, SINK_JSON, SINK_TYPES
+
+try:
+    import numpy as np
+    from utils.color_space import rgb_to_lab, lab_to_rgb
+    NUMPY_SUPPORT = True
+except ImportError:
+    NUMPY_SUPPORT = False
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +38,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 图片颜色提取参数
+EXTRACT_THUMBNAIL_SIZE = (200, 200)   # 提取前将图片缩小到该尺寸以内
+EXTRACT_DISTANCE_THRESHOLD = 60       # 已选颜色之间的最小RGB距离
+EXTRACT_CANDIDATE_BLOCK = 256         # 向量化选择时每次检查的候选颜色数
+DEFAULT_PALETTE_COLORS = ["#3a3845", "#f7ccac", "#c69b7b", "#826f66"]
+
+# 颜色提取模式
+EXTRACT_MODE_FREQUENCY = "frequency"     # 按像素出现频率选择（默认）
+EXTRACT_MODE_MEDIAN_CUT = "median-cut"   # 在Lab空间中用中位切分聚类
+EXTRACT_MODE_KMEANS = "kmeans"           # 以中位切分结果为初始中心，在Lab空间中做k-means
+EXTRACT_MODES = (EXTRACT_MODE_FREQUENCY, EXTRACT_MODE_MEDIAN_CUT, EXTRACT_MODE_KMEANS)
+EXTRACT_SAMPLE_SIZE = 20000              # 聚类模式最多使用的像素数
+KMEANS_ITERATIONS = 10                   # k-means最大迭代次数
+
+# 目录批量提取参数
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif', '.tif', '.tiff')
+BATCH_RESULTS_FILE = "image_palettes.jsonl"   # 默认结果文件名，保存在图片目录中
+BATCH_PENDING_PER_WORKER = 4                  # 每个进程最多排队的任务数
+BATCH_PROGRESS_INTERVAL = 500                 # 每处理多少个文件输出一次进度
+
+# JSON批量生成图片参数
+RENDER_MANIFEST_FILE = ".palette_render_manifest.json"   # 增量生成清单，保存在输出目录中
+RENDER_MANIFEST_VERSION = 1
+RENDER_CHUNK_SIZE = 32                                   # 每个渲染任务包含的文件数
+RENDER_PROGRESS_INTERVAL = 1000
+
+# 配色方案图片绘制参数
+RENDER_FONT_NAME = "Arial"
+RENDER_FONT_SIZE = 24
+RENDER_TEXT_X = 20
+RENDER_BAND_CACHE_SIZE = 512        # 每个绘制器缓存的颜色块数量
+
+# 配色方案图片输出格式
+RENDER_FORMAT_PNG = "png"
+RENDER_FORMAT_WEBP = "webp"
+RENDER_FORMAT_SVG = "svg"           # 矢量格式，不需要光栅化
+RENDER_FORMATS = (RENDER_FORMAT_PNG, RENDER_FORMAT_WEBP, RENDER_FORMAT_SVG)
+RENDER_PNG_COMPRESS_LEVEL = 6       # 与Pillow默认值相同，0最快，9最小
+RENDER_WEBP_OPTIONS = {"lossless": True, "method": 4}
+DEFAULT_RENDER_OPTIONS = {"image_format": RENDER_FORMAT_PNG, "palette_mode": False,
+                          "compress_level": RENDER_PNG_COMPRESS_LEVEL}
+
+# 配色方案拼图参数
+ATLAS_NAME = "palette_atlas"        # 拼图文件名前缀，索引为 <name>.json，拼图为 <name>_<n>.png
+ATLAS_INDEX_VERSION = 1
+ATLAS_TILE_SIZE = (400, 200)        # 拼图中每个配色方案的尺寸
+ATLAS_COLUMNS = 8
+ATLAS_MAX_TILES = 256               # 每张拼图最多包含的配色方案数，超出时生成多张
+
+
 class PaletteImageGenerator:
     """配色方案图片生成器"""
     
@@ -30,7 +99,9 @@ class PaletteImageGenerator:
     
     @staticmethod
     def create_palette_image(colors: List[str], palette_id: str, output_dir: str, 
-                            width: int = 800, height: int = 400) -> Optional[str]:
+                            width: int = 800, height: int = 400, image_format: str = RENDER_FORMAT_PNG,
+                            palette_mode: bool = False,
+                            compress_level: int = RENDER_PNG_COMPRESS_LEVEL) -> Optional[str]:
         """
         从颜色列表创建配色方案图片
         
@@ -40,6 +111,9 @@ class PaletteImageGenerator:
             output_dir: 输出目录路径
             width: 图片宽度，默认800像素
             height: 图片高度，默认400像素
+            image_format: 输出格式，png、webp 或 svg，同时决定文件扩展名
+            palette_mode: 是否以调色板（P）模式绘制，文件更小、编码更快，文字没有抗锯齿
+            compress_level: PNG压缩级别（0-9）
             
         Returns:
             str: 保存的图片路径，如果失败则为None
@@ -53,55 +127,14 @@ class PaletteImageGenerator:
             # 创建输出目录
             os.makedirs(output_dir, exist_ok=True)
             
-            # 创建一个新图片
-            img = Image.new('RGB', (width, height), color='white')
-            draw = ImageDraw.Draw(img)
-            
-            # 计算每个颜色块的高度
-            color_height = height // len(colors)
-            
-            # 绘制颜色块
-            for i, color in enumerate(colors):
-                try:
-                    # 转换颜色格式并验证
-                    if not color.startswith('#'):
-                        color = f"#{color}"
-                    if len(color) != 7:  # #RRGGBB 格式应为7个字符
-                        logger.warning(f"跳过无效的颜色代码: {color}")
-                        continue
-                        
-                    # 计算当前颜色块的位置
-                    y0 = i * color_height
-                    y1 = (i + 1) * color_height
-                    
-                    # 绘制矩形
-                    draw.rectangle([(0, y0), (width, y1)], fill=color)
-                    
-                    # 尝试添加颜色代码文本
-                    try:
-                        # 计算文本颜色（深色背景用白色文本，浅色背景用黑色文本）
-                        r, g, b = PaletteImageGenerator.hex_to_rgb(color)
-                        text_color = "white" if (r + g + b) < 382 else "black"
-                        
-                        # 绘制颜色代码文本
-                        font_size = 24
-                        try:
-                            font = ImageFont.truetype("Arial", font_size)
-                        except IOError:
-                            font = ImageFont.load_default()
-                            
-                        text_pos = (20, y0 + (color_height - font_size) // 2)
-                        draw.text(text_pos, color, fill=text_color, font=font)
-                    except Exception as e:
-                        logger.warning(f"绘制文本时出错: {e}")
-                        
-                except Exception as e:
-                    logger.warning(f"处理颜色 {color} 时出错: {e}")
+            # 绘制器缓存字体和颜色块，批量生成时不重复加载字体
+            data = get_palette_renderer(width, height).encode(colors, image_format, palette_mode, compress_level)
             
             # 保存图片
-            file_name = f"colorhunt_{palette_id}.png"
+            file_name = f"colorhunt_{palette_id}.{image_format}"
             file_path = os.path.join(output_dir, file_name)
-            img.save(file_path)
+            with open(file_path, 'wb') as f:
+                f.write(data)
             logger.info(f"配色方案图片已保存: {file_path}")
             
             return file_path
@@ -111,13 +144,15 @@ class PaletteImageGenerator:
             return None
     
     @staticmethod
-    def generate_from_json(json_file_path: str, output_dir: Optional[str] = None) -> Optional[str]:
+    def generate_from_json(json_file_path: str, output_dir: Optional[str] = None,
+                           **render_options) -> Optional[str]:
         """
         从JSON文件生成配色方案图片
         
         Args:
             json_file_path: JSON文件路径
             output_dir: 输出目录，如果为None则与JSON文件保存在同一目录
+            **render_options: 传给 create_palette_image 的输出参数（image_format、palette_mode、compress_level）
             
         Returns:
             str: 生成的图片路径，如果失败则为None
@@ -136,122 +171,950 @@ class PaletteImageGenerator:
                 output_dir = os.path.dirname(json_file_path)
             
             # 生成图片
-            return PaletteImageGenerator.create_palette_image(colors, palette_id, output_dir)
+            return PaletteImageGenerator.create_palette_image(colors, palette_id, output_dir, **render_options)
             
         except Exception as e:
             logger.exception(f"从JSON生成配色方案图片时出错: {str(e)}")
             return None
 
     @staticmethod
-    def extract_colors_from_image(image_path: str, num_colors: int = 4) -> List[str]:
+    def create_palette_atlas(palettes: List[Dict], output_dir: str, name: str = ATLAS_NAME,
+                             tile_width: int = ATLAS_TILE_SIZE[0], tile_height: int = ATLAS_TILE_SIZE[1],
+                             columns: int = ATLAS_COLUMNS, max_tiles: int = ATLAS_MAX_TILES,
+                             compress_level: int = RENDER_PNG_COMPRESS_LEVEL) -> Optional[str]:
+        """
+        将多个配色方案拼成拼图，并生成配色方案ID到矩形区域的JSON索引
+        
+        配色方案按顺序从左到右、从上到下排列，每张拼图最多 max_tiles 个，超出时依次生成
+        <name>_1.png、<name>_2.png……；索引文件 <name>.json 记录每张拼图的文件名和尺寸，
+        以及每个配色方案所在的拼图序号、矩形 (x, y, w, h) 和颜色。
+        
+        Args:
+            palettes: 配色方案数据列表，每项包含 id 和 colors
+            output_dir: 输出目录路径
+            name: 拼图和索引的文件名前缀
+            tile_width: 每个配色方案的宽度
+            tile_height: 每个配色方案的高度
+            columns: 每行的配色方案数
+            max_tiles: 每张拼图最多包含的配色方案数
+            compress_level: PNG压缩级别（0-9）
+            
+        Returns:
+            str: 索引文件路径，如果失败则为None
+        """
+        try:
+            # 跳过缺少ID或颜色的配色方案，ID重复时保留第一个
+            tiles = []
+            seen = set()
+            for palette in palettes:
+                palette_id = str(palette.get('id') or '')
+                colors = palette.get('colors') or []
+                if not palette_id or not colors:
+                    logger.warning(f"跳过缺少ID或颜色的配色方案: {palette_id or '未知'}")
+                    continue
+                if palette_id in seen:
+                    logger.warning(f"跳过重复的配色方案: {palette_id}")
+                    continue
+                seen.add(palette_id)
+                tiles.append((palette_id, colors))
+            
+            if not tiles:
+                logger.error("没有可以生成拼图的配色方案")
+                return None
+            
+            os.makedirs(output_dir, exist_ok=True)
+            renderer = get_palette_renderer(tile_width, tile_height)
+            columns = max(1, columns)
+            max_tiles = max(1, max_tiles)
+            index = {
+                "version": ATLAS_INDEX_VERSION,
+                "tile_width": tile_width,
+                "tile_height": tile_height,
+                "sheets": [],
+                "palettes": {}
+            }
+            
+            for sheet_no, start in enumerate(range(0, len(tiles), max_tiles)):
+                chunk = tiles[start:start + max_tiles]
+                sheet_columns = min(columns, len(chunk))
+                sheet_rows = math.ceil(len(chunk) / sheet_columns)
+                sheet = Image.new('RGB', (sheet_columns * tile_width, sheet_rows * tile_height), color='white')
+                
+                for i, (palette_id, colors) in enumerate(chunk):
+                    x = (i % sheet_columns) * tile_width
+                    y = (i // sheet_columns) * tile_height
+                    sheet.paste(renderer.render(colors), (x, y))
+                    index["palettes"][palette_id] = {
+                        "sheet": sheet_no, "x": x, "y": y, "w": tile_width, "h": tile_height, "colors": colors
+                    }
+                
+                file_name = f"{name}_{sheet_no + 1}.png"
+                sheet.save(os.path.join(output_dir, file_name), compress_level=compress_level)
+                index["sheets"].append({"file": file_name, "width": sheet.width, "height": sheet.height})
+            
+            # 先写入临时文件再替换，读取方不会看到不完整的索引
+            index_path = os.path.join(output_dir, f"{name}.json")
+            tmp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+            logger.info(f"配色方案拼图已保存: {len(tiles)} 个配色方案，{len(index['sheets'])} 张拼图，索引 {index_path}")
+            
+            return index_path
+            
+        except Exception as e:
+            logger.exception(f"生成配色方案拼图时出错: {str(e)}")
+            return None
+    
+    @staticmethod
+    def build_image_palette(colors: List[str], image_path: str, content_hash: str) -> Dict:
+        """
+        构建从图片提取的配色方案数据
+        
+        Args:
+            colors: 提取的颜色列表
+            image_path: 图片路径
+            content_hash: 图片内容的MD5值，前8位用于生成ID
+            
+        Returns:
+            Dict: 配色方案数据
+        """
+        palette_id = f"image-{content_hash[:8]}"
+        return {
+            "id": palette_id,
+            "name": f"Image Palette {palette_id}",
+            "colors": colors,
+            "source": "image_extract",
+            "source_image": image_path,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    @staticmethod
+    def extract_colors_from_image(image_path: str, num_colors: int = 4, quantize_bits: int = 8,
+                                  mode: str = EXTRACT_MODE_FREQUENCY) -> List[str]:
         """
         从图片中提取主要颜色
         
+        默认按像素出现频率从高到低选择颜色，跳过接近白色和黑色的颜色以及与已选颜色太接近的颜色。
+        聚类模式在Lab空间中对采样像素聚类，按聚类大小返回聚类中心，相近色不会重复出现，
+        更适合照片（需要NumPy）。
+        
         Args:
             image_path: 图片路径
             num_colors: 要提取的颜色数量
+            quantize_bits: 频率模式统计时每通道保留的位数，8为按精确颜色统计；
+                           较小的值将相近色合并统计，并以合并像素的平均色作为结果（需要NumPy）
+            mode: 提取模式，见 EXTRACT_MODES
             
         Returns:
             List[str]: 颜色代码列表，如 ["#FF5733", "#33FF57"]
         """
+        if mode not in EXTRACT_MODES:
+            raise ValueError(f"未知的颜色提取模式: {mode}")
+        if mode != EXTRACT_MODE_FREQUENCY and not NUMPY_SUPPORT:
+            logger.warning(f"未安装NumPy，{mode} 模式不可用，改为按频率提取")
+            mode = EXTRACT_MODE_FREQUENCY
+        
         try:
-            # 打开图片
-            img = Image.open(image_path)
-            
-            # 调整图片大小以加快处理速度
-            img.thumbnail((200, 200))
+            return PaletteImageGenerator._extract_colors(image_path, num_colors, quantize_bits, mode)
+        except Exception as e:
+            logger.exception(f"从图片提取颜色时出错: {str(e)}")
+            # 返回默认颜色
+            return DEFAULT_PALETTE_COLORS[:num_colors]
+    
+    @staticmethod
+    def _extract_colors(image_source, num_colors: int, quantize_bits: int, mode: str) -> List[str]:
+        """
+        extract_colors_from_image 的实现，出错时抛出异常
+        
+        Args:
+            image_source: 图片路径或已打开的二进制文件对象
+            num_colors: 要提取的颜色数量
+            quantize_bits: 频率模式统计时每通道保留的位数
+            mode: 提取模式
             
+        Returns:
+            List[str]: 颜色代码列表
+        """
+        # 打开图片
+        img = Image.open(image_source)
+        
+        # 调整图片大小以加快处理速度
+        img.thumbnail(EXTRACT_THUMBNAIL_SIZE)
+        
+        if NUMPY_SUPPORT:
+            # 调色板、灰度等模式统一转换为RGB
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            if mode == EXTRACT_MODE_FREQUENCY:
+                result = PaletteImageGenerator._select_colors_numpy(np.asarray(img), num_colors, quantize_bits)
+            else:
+                result = PaletteImageGenerator._cluster_colors_lab(np.asarray(img), num_colors, mode)
+        else:
             # 如果是有透明通道的图片，转换为RGB
             if img.mode == 'RGBA':
                 img = img.convert('RGB')
-                
-            # 获取所有像素
-            pixels = list(img.getdata())
-            
-            # 像素颜色计数
-            color_count = {}
-            for pixel in pixels:
-                if pixel in color_count:
-                    color_count[pixel] += 1
-                else:
-                    color_count[pixel] = 1
+            result = PaletteImageGenerator._select_colors_python(list(img.getdata()), num_colors)
+        
+        # 如果没有足够的颜色，添加一些默认颜色
+        while len(result) < num_colors:
+            for color in DEFAULT_PALETTE_COLORS:
+                if color not in result:
+                    result.append(color)
+                    break
+            else:
+                break
+        
+        return result[:num_colors]
+    
+    @staticmethod
+    def _select_colors_numpy(pixels, num_colors: int, quantize_bits: int = 8) -> List[str]:
+        """
+        向量化的主要颜色选择
+        
+        像素打包为24位整数后用 np.unique 统计频率，频率相同时按首次出现的顺序排列；
+        候选颜色分块检查，每选中一个颜色，一次性剔除块内所有与其距离小于阈值的候选颜色。
+        
+        Args:
+            pixels: (H, W, 3) uint8 像素数组
+            num_colors: 要提取的颜色数量
+            quantize_bits: 每通道保留的位数
+            
+        Returns:
+            List[str]: 颜色代码列表，可能少于 num_colors
+        """
+        pixels = pixels.reshape(-1, 3)
+        shift = 8 - quantize_bits
+        channels = (pixels >> shift).astype(np.uint32) if shift else pixels.astype(np.uint32)
+        keys = (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+        
+        unique_keys, first_index, inverse, counts = np.unique(
+            keys, return_index=True, return_inverse=True, return_counts=True
+        )
+        if shift:
+            # 相近色合并后取合并像素的平均色
+            sums = np.stack([np.bincount(inverse, weights=pixels[:, c], minlength=len(unique_keys))
+                             for c in range(3)], axis=1)
+            colors = np.rint(sums / counts[:, None]).astype(np.int32)
+        else:
+            colors = pixels[first_index].astype(np.int32)
+        
+        # 按频率降序排列，频率相同时按首次出现的顺序
+        order = np.argsort(-counts.astype(np.int64) * len(keys) + first_index)
+        
+        # 候选颜色按顺序分块处理，通常只需检查前几块
+        result = []
+        selected = np.empty((0, 3), dtype=np.int32)
+        threshold_sq = EXTRACT_DISTANCE_THRESHOLD ** 2
+        for start in range(0, len(order), EXTRACT_CANDIDATE_BLOCK):
+            candidates = colors[order[start:start + EXTRACT_CANDIDATE_BLOCK]]
             
-            # 按出现频率排序
-            sorted_colors = sorted(color_count.items(), key=lambda x: x[1], reverse=True)
+            # 跳过接近白色和黑色的颜色
+            near_white = (candidates > 240).all(axis=1)
+            near_black = (candidates < 15).all(axis=1)
+            candidates = candidates[~(near_white | near_black)]
             
-            # 选择最常见的颜色，但忽略太接近的颜色
-            result = []
-            threshold = 60  # 颜色差异阈值
+            # 剔除与已选颜色太接近的候选颜色
+            for color in selected:
+                candidates = candidates[((candidates - color) ** 2).sum(axis=1) >= threshold_sq]
             
-            for color, _ in sorted_colors:
-                # 跳过接近白色和黑色的颜色
-                r, g, b = color
-                # 跳过接近白色的颜色
-                if r > 240 and g > 240 and b > 240:
-                    continue
-                # 跳过接近黑色的颜色
-                if r < 15 and g < 15 and b < 15:
-                    continue
-                
-                # 检查是否与已选颜色太接近
-                too_close = False
-                for selected_color in result:
-                    sr, sg, sb = PaletteImageGenerator.hex_to_rgb(selected_color)
-                    # 计算颜色距离
-                    distance = math.sqrt((r - sr) ** 2 + (g - sg) ** 2 + (b - sb) ** 2)
-                    if distance < threshold:
-                        too_close = True
-                        break
+            while len(candidates) and len(result) < num_colors:
+                color = candidates[0]
+                result.append("#{:02x}{:02x}{:02x}".format(*color.tolist()))
+                selected = np.vstack([selected, color])
+                candidates = candidates[((candidates - color) ** 2).sum(axis=1) >= threshold_sq]
+            
+            if len(result) >= num_colors:
+                break
+        return result
+    
+    @staticmethod
+    def _median_cut(lab, num_colors: int):
+        """
+        中位切分：反复将误差平方和最大的颜色盒沿跨度最大的轴从中位数处一分为二
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (聚类中心, 聚类大小)
+        """
+        boxes = [lab]
+        while len(boxes) < num_colors:
+            scores = [box.var(axis=0).sum() * len(box) for box in boxes]
+            i = int(np.argmax(scores))
+            if scores[i] <= 0:
+                break
+            box = boxes.pop(i)
+            axis = int(np.ptp(box, axis=0).argmax())
+            order = np.argsort(box[:, axis], kind='stable')
+            middle = len(box) // 2
+            boxes.extend([box[order[:middle]], box[order[middle:]]])
+        centers = np.array([box.mean(axis=0) for box in boxes])
+        sizes = np.array([len(box) for box in boxes])
+        return centers, sizes
+    
+    @staticmethod
+    def _kmeans(lab, centers):
+        """
+        k-means迭代，最多 KMEANS_ITERATIONS 次，中心不再移动时提前结束
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (聚类中心, 聚类大小)
+        """
+        k = len(centers)
+        for _ in range(KMEANS_ITERATIONS):
+            distance = (lab ** 2).sum(axis=1)[:, None] - 2 * lab @ centers.T + (centers ** 2).sum(axis=1)
+            labels = distance.argmin(axis=1)
+            sizes = np.bincount(labels, minlength=k)
+            sums = np.stack([np.bincount(labels, weights=lab[:, c], minlength=k) for c in range(3)], axis=1)
+            # 空聚类保留原中心
+            new_centers = np.where(sizes[:, None] > 0, sums / np.maximum(sizes, 1)[:, None], centers)
+            moved = np.abs(new_centers - centers).max()
+            centers = new_centers
+            if moved < 0.01:
+                break
+        distance = (lab ** 2).sum(axis=1)[:, None] - 2 * lab @ centers.T + (centers ** 2).sum(axis=1)
+        sizes = np.bincount(distance.argmin(axis=1), minlength=k)
+        return centers, sizes
+    
+    @staticmethod
+    def _cluster_colors_lab(pixels, num_colors: int, mode: str = EXTRACT_MODE_KMEANS) -> List[str]:
+        """
+        在Lab空间中聚类提取主要颜色
+        
+        跳过接近白色和黑色的像素后最多随机采样 EXTRACT_SAMPLE_SIZE 个像素，先做中位切分，
+        kmeans 模式再以切分结果为初始中心迭代，运行时间与图片大小无关。
+        
+        Args:
+            pixels: (H, W, 3) uint8 像素数组
+            num_colors: 要提取的颜色数量
+            mode: EXTRACT_MODE_MEDIAN_CUT 或 EXTRACT_MODE_KMEANS
+            
+        Returns:
+            List[str]: 按聚类大小降序排列的颜色代码列表，可能少于 num_colors
+        """
+        pixels = pixels.reshape(-1, 3)
+        near_white = (pixels > 240).all(axis=1)
+        near_black = (pixels < 15).all(axis=1)
+        pixels = pixels[~(near_white | near_black)]
+        if not len(pixels) or num_colors <= 0:
+            return []
+        if len(pixels) > EXTRACT_SAMPLE_SIZE:
+            rng = np.random.default_rng(0)
+            pixels = pixels[rng.choice(len(pixels), EXTRACT_SAMPLE_SIZE, replace=False)]
+        
+        lab = rgb_to_lab(pixels)
+        centers, sizes = PaletteImageGenerator._median_cut(lab, num_colors)
+        if mode == EXTRACT_MODE_KMEANS:
+            centers, sizes = PaletteImageGenerator._kmeans(lab, centers)
+        
+        result = []
+        for i in np.argsort(-sizes, kind='stable'):
+            if sizes[i] == 0:
+                continue
+            hex_color = "#{:02x}{:02x}{:02x}".format(*lab_to_rgb(centers[i]).tolist())
+            if hex_color not in result:
+                result.append(hex_color)
+        return result
+    
+    @staticmethod
+    def _select_colors_python(pixels: List[tuple], num_colors: int) -> List[str]:
+        """未安装NumPy时逐像素统计的主要颜色选择"""
+        # 像素颜色计数
+        color_count = {}
+        for pixel in pixels:
+            if pixel in color_count:
+                color_count[pixel] += 1
+            else:
+                color_count[pixel] = 1
+        
+        # 按出现频率排序
+        sorted_colors = sorted(color_count.items(), key=lambda x: x[1], reverse=True)
+        
+        # 选择最常见的颜色，但忽略太接近的颜色
+        result = []
+        
+        for color, _ in sorted_colors:
+            # 跳过接近白色和黑色的颜色
+            r, g, b = color
+            # 跳过接近白色的颜色
+            if r > 240 and g > 240 and b > 240:
+                continue
+            # 跳过接近黑色的颜色
+            if r < 15 and g < 15 and b < 15:
+                continue
+            
+            # 检查是否与已选颜色太接近
+            too_close = False
+            for selected_color in result:
+                sr, sg, sb = PaletteImageGenerator.hex_to_rgb(selected_color)
+                # 计算颜色距离
+                distance = math.sqrt((r - sr) ** 2 + (g - sg) ** 2 + (b - sb) ** 2)
+                if distance < EXTRACT_DISTANCE_THRESHOLD:
+                    too_close = True
+                    break
+            
+            if not too_close:
+                # 转换为十六进制
+                hex_color = f"#{r:02x}{g:02x}{b:02x}"
+                result.append(hex_color)
                 
-                if not too_close:
-                    # 转换为十六进制
-                    hex_color = f"#{r:02x}{g:02x}{b:02x}"
-                    result.append(hex_color)
-                    
-                    # 如果已经选择了足够的颜色，就退出
-                    if len(result) >= num_colors:
-                        break
-            
-            # 如果没有足够的颜色，添加一些默认颜色
-            default_colors = ["#3a3845", "#f7ccac", "#c69b7b", "#826f66"]
-            while len(result) < num_colors:
-                for color in default_colors:
-                    if color not in result:
-                        result.append(color)
-                        break
+                # 如果已经选择了足够的颜色，就退出
                 if len(result) >= num_colors:
                     break
+        
+        return result
+
+class PaletteRenderer:
+    """
+    配色方案图片绘制器
+    
+    字体只加载一次；每个带文字的颜色块绘制后按 (颜色, 块高度) 缓存，之后直接粘贴，
+    文字的边界框同样缓存，用于判断文字是否完全落在颜色块内。输出与逐块在整张图片上
+    绘制矩形和文字的结果逐像素相同：文字超出颜色块时改为直接在整张图片上绘制。
+    调色板（P）模式和SVG输出直接绘制，不使用颜色块缓存。
+    多线程共享时绘制过程加锁，编码图片不加锁。
+    """
+    
+    def __init__(self, width: int = 800, height: int = 400, font_size: int = RENDER_FONT_SIZE,
+                 font_name: str = RENDER_FONT_NAME, cache_size: int = RENDER_BAND_CACHE_SIZE):
+        """
+        初始化绘制器
+        
+        Args:
+            width: 图片宽度
+            height: 图片高度
+            font_size: 颜色代码文字大小，同时用于计算文字的垂直位置
+            font_name: 字体名称，无法加载时使用Pillow默认字体
+            cache_size: 缓存的颜色块数量上限
+        """
+        self.width = width
+        self.height = height
+        self.font_size = font_size
+        self.font_name = font_name
+        self.cache_size = cache_size
+        self._font = None
+        self._bands: "OrderedDict[Tuple[str, int, int], Image.Image]" = OrderedDict()
+        self._text_boxes: Dict[str, Tuple[int, int, int, int]] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def font(self):
+        """绘制文字使用的字体（首次使用时加载）"""
+        if self._font is None:
+            try:
+                self._font = ImageFont.truetype(self.font_name, self.font_size)
+            except IOError:
+                self._font = ImageFont.load_default()
+        return self._font
+    
+    def _text_box(self, text: str) -> Tuple[int, int, int, int]:
+        box = self._text_boxes.get(text)
+        if box is None:
+            box = self._text_boxes[text] = tuple(self.font.getbbox(text))
+        return box
+    
+    def _draw_text(self, draw: ImageDraw.ImageDraw, y0: int, band_height: int, color: str) -> None:
+        """在颜色块上绘制颜色代码，深色背景用白色文本，浅色背景用黑色文本"""
+        try:
+            r, g, b = PaletteImageGenerator.hex_to_rgb(color)
+            text_color = "white" if (r + g + b) < 382 else "black"
+            text_pos = (RENDER_TEXT_X, y0 + (band_height - self.font_size) // 2)
+            draw.text(text_pos, color, fill=text_color, font=self.font)
+        except Exception as e:
+            logger.warning(f"绘制文本时出错: {e}")
+    
+    def _band(self, color: str, band_height: int, rows: int) -> Optional[Image.Image]:
+        """
+        获取带文字的颜色块，文字超出颜色块时返回None
+        
+        Args:
+            color: #RRGGBB 颜色
+            band_height: 颜色块高度，用于计算文字位置
+            rows: 颜色块实际覆盖的行数（矩形包含下边界，比块高度多一行，最后一块受图片高度限制）
+        """
+        key = (color, band_height, rows)
+        band = self._bands.get(key)
+        if band is not None:
+            self._bands.move_to_end(key)
+            return band
+        
+        text_top = (band_height - self.font_size) // 2
+        left, top, right, bottom = self._text_box(color)
+        if text_top + top < 0 or text_top + bottom > rows:
+            return None
+        
+        band = Image.new('RGB', (self.width, rows), color=color)
+        self._draw_text(ImageDraw.Draw(band), 0, band_height, color)
+        self._bands[key] = band
+        if len(self._bands) > self.cache_size:
+            self._bands.popitem(last=False)
+        return band
+    
+    def render(self, colors: List[str], palette_mode: bool = False) -> Image.Image:
+        """
+        绘制配色方案图片，颜色从上到下依次排列
+        
+        Args:
+            colors: 颜色代码列表，无效的颜色被跳过
+            palette_mode: 是否绘制为调色板（P）模式图片，只包含颜色块、白色和黑色
             
-            return result[:num_colors]
+        Returns:
+            Image.Image: RGB或P模式图片
+        """
+        img = Image.new('P' if palette_mode else 'RGB', (self.width, self.height), color='white')
+        draw = None
+        
+        # 计算每个颜色块的高度
+        color_height = self.height // len(colors)
+        
+        with self._lock:
+            for i, color in enumerate(colors):
+                # 转换颜色格式并验证
+                if not color.startswith('#'):
+                    color = f"#{color}"
+                if len(color) != 7:  # #RRGGBB 格式应为7个字符
+                    logger.warning(f"跳过无效的颜色代码: {color}")
+                    continue
+                
+                y0 = i * color_height
+                rows = min(color_height + 1, self.height - y0)
+                if rows <= 0:
+                    continue
+                try:
+                    # 颜色块模板的调色板与画布不同，调色板模式不能直接粘贴
+                    band = None if palette_mode else self._band(color, color_height, rows)
+                    if band is not None:
+                        img.paste(band, (0, y0))
+                        continue
+                    
+                    # 文字超出颜色块时与原来一样直接在整张图片上绘制
+                    draw = draw or ImageDraw.Draw(img)
+                    draw.rectangle([(0, y0), (self.width, y0 + color_height)], fill=color)
+                    self._draw_text(draw, y0, color_height, color)
+                except Exception as e:
+                    logger.warning(f"处理颜色 {color} 时出错: {e}")
+        return img
+    
+    def render_svg(self, colors: List[str]) -> str:
+        """
+        生成SVG格式的配色方案，布局与 render 相同
+        
+        Args:
+            colors: 颜色代码列表，无效的颜色被跳过
             
-        except Exception as e:
-            logger.exception(f"从图片提取颜色时出错: {str(e)}")
-            # 返回默认颜色
-            return ["#3a3845", "#f7ccac", "#c69b7b", "#826f66"][:num_colors]
+        Returns:
+            str: SVG文本
+        """
+        color_height = self.height // len(colors)
+        with self._lock:
+            ascent = self.font.getmetrics()[0]
+        
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+            f'viewBox="0 0 {self.width} {self.height}">',
+            f'<rect width="{self.width}" height="{self.height}" fill="#ffffff"/>'
+        ]
+        for i, color in enumerate(colors):
+            if not color.startswith('#'):
+                color = f"#{color}"
+            if len(color) != 7:
+                logger.warning(f"跳过无效的颜色代码: {color}")
+                continue
+            try:
+                r, g, b = PaletteImageGenerator.hex_to_rgb(color)
+            except ValueError:
+                logger.warning(f"跳过无效的颜色代码: {color}")
+                continue
+            
+            y0 = i * color_height
+            text_color = "white" if (r + g + b) < 382 else "black"
+            # Pillow以字体上沿定位文字，SVG以基线定位
+            baseline = y0 + (color_height - self.font_size) // 2 + ascent
+            parts.append(f'<rect y="{y0}" width="{self.width}" height="{color_height}" fill="{color}"/>')
+            parts.append(f'<text x="{RENDER_TEXT_X}" y="{baseline}" font-family="{escape(self.font_name)}" '
+                         f'font-size="{self.font_size}" fill="{text_color}">{escape(color)}</text>')
+        parts.append('</svg>')
+        return "\n".join(parts) + "\n"
+    
+    def encode(self, colors: List[str], image_format: str = RENDER_FORMAT_PNG, palette_mode: bool = False,
+               compress_level: int = RENDER_PNG_COMPRESS_LEVEL) -> bytes:
+        """
+        绘制配色方案并编码为文件内容
+        
+        Args:
+            colors: 颜色代码列表
+            image_format: 输出格式，png、webp 或 svg
+            palette_mode: 是否以调色板（P）模式绘制（svg格式忽略）
+            compress_level: PNG压缩级别（0-9）
+            
+        Returns:
+            bytes: 编码后的文件内容
+        """
+        if image_format not in RENDER_FORMATS:
+            raise ValueError(f"不支持的输出格式: {image_format}，可选: {', '.join(RENDER_FORMATS)}")
+        if image_format == RENDER_FORMAT_SVG:
+            return self.render_svg(colors).encode('utf-8')
+        
+        img = self.render(colors, palette_mode)
+        buffer = io.BytesIO()
+        if image_format == RENDER_FORMAT_WEBP:
+            img.save(buffer, 'WEBP', **RENDER_WEBP_OPTIONS)
+        else:
+            img.save(buffer, 'PNG', compress_level=compress_level)
+        return buffer.getvalue()
+
+
+_renderers: Dict[Tuple[int, int], PaletteRenderer] = {}
+_renderers_lock = threading.Lock()
+
+
+def get_palette_renderer(width: int = 800, height: int = 400) -> PaletteRenderer:
+    """获取进程内共享的指定尺寸绘制器（首次调用时创建）"""
+    renderer = _renderers.get((width, height))
+    if renderer is None:
+        with _renderers_lock:
+            renderer = _renderers.get((width, height))
+            if renderer is None:
+                renderer = _renderers[(width, height)] = PaletteRenderer(width, height)
+    return renderer
+
+
+def iter_image_files(image_dir: str) -> Iterator[str]:
+    """按路径顺序遍历目录树中的所有图片文件"""
+    for dir_path, dir_names, file_names in os.walk(image_dir):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dir_path, file_name)
+
+
+def _batch_key(content_hash: str, num_colors: int, quantize_bits: int, mode: str) -> str:
+    """结果去重键：图片内容相同且提取参数相同时视为已有结果"""
+    return f"{content_hash}:{mode}:{num_colors}:{quantize_bits}"
+
+
+def load_batch_keys(jsonl_path: str) -> set:
+    """读取已有JSONL结果中的去重键，忽略中断时写了一半的行"""
+    keys = set()
+    if not os.path.exists(jsonl_path):
+        return keys
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                options = record["extract_options"]
+                keys.add(_batch_key(record["content_hash"], options["num_colors"],
+                                    options["quantize_bits"], options["mode"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return keys
+
+
+# 批量提取进程中已有结果的去重键，由进程池初始化函数设置
+_batch_known_keys = frozenset()
+
+
+def _init_batch_worker(known_keys: frozenset) -> None:
+    global _batch_known_keys
+    _batch_known_keys = known_keys
+
+
+def _extract_image_record(image_path: str, num_colors: int, quantize_bits: int, mode: str) -> Dict:
+    """
+    在提取进程中读取图片、计算内容哈希并提取颜色
+    
+    Returns:
+        Dict: 处理结果，status 为 ok / skipped / failed
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        content_hash = hashlib.md5(data).hexdigest()
+        key = _batch_key(content_hash, num_colors, quantize_bits, mode)
+        if key in _batch_known_keys:
+            return {"status": "skipped", "key": key}
+        
+        colors = PaletteImageGenerator._extract_colors(io.BytesIO(data), num_colors, quantize_bits, mode)
+    except Exception as e:
+        return {"status": "failed", "path": image_path, "error": str(e)}
+    
+    record = PaletteImageGenerator.build_image_palette(colors, image_path, content_hash)
+    record["content_hash"] = content_hash
+    record["extract_options"] = {"mode": mode, "num_colors": num_colors, "quantize_bits": quantize_bits}
+    return {"status": "ok", "key": key, "record": record}
 
-def process_all_json_files(json_dir: str, output_dir: Optional[str] = None) -> int:
+
+def batch_extract_images(image_dir: str, jsonl_path: Optional[str] = None, num_colors: int = 4,
+                         quantize_bits: int = 8, mode: str = EXTRACT_MODE_FREQUENCY,
+                         max_workers: Optional[int] = None) -> Dict[str, float]:
+    """
+    用进程池从目录树中的所有图片提取配色方案，逐条追加写入JSONL文件
+    
+    图片内容（MD5）和提取参数都与已有结果相同的文件会被跳过，中断后重新运行只处理剩余的文件。
+    
+    Args:
+        image_dir: 图片目录
+        jsonl_path: 结果文件路径，为None时为图片目录下的 image_palettes.jsonl
+        num_colors: 每张图片提取的颜色数量
+        quantize_bits: 频率模式统计时每通道保留的位数
+        mode: 提取模式，见 EXTRACT_MODES
+        max_workers: 进程数，为None时使用CPU核心数
+        
+    Returns:
+        Dict[str, float]: 统计信息，包括 processed、skipped、failed 和 elapsed（秒）
+    """
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"未知的颜色提取模式: {mode}")
+    jsonl_path = jsonl_path or os.path.join(image_dir, BATCH_RESULTS_FILE)
+    known_keys = load_batch_keys(jsonl_path)
+    max_workers = max(1, max_workers or os.cpu_count() or 1)
+    stats = {"processed": 0, "skipped": 0, "failed": 0}
+    start = time.time()
+    
+    os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+    # 上次运行中断时最后一行可能不完整，先补上换行
+    needs_newline = False
+    if os.path.exists(jsonl_path) and os.path.getsize(jsonl_path) > 0:
+        with open(jsonl_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    
+    with open(jsonl_path, 'a', encoding='utf-8') as out, concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_batch_worker, initargs=(frozenset(known_keys),)) as pool:
+        if needs_newline:
+            out.write('\n')
+        
+        def handle(done):
+            for future in done:
+                result = future.result()
+                if result["status"] == "failed":
+                    stats["failed"] += 1
+                    logger.warning(f"提取 {result['path']} 失败: {result['error']}")
+                elif result["status"] == "skipped" or result["key"] in known_keys:
+                    # 已有结果，或本次运行中已处理过内容相同的图片
+                    stats["skipped"] += 1
+                else:
+                    known_keys.add(result["key"])
+                    out.write(json.dumps(result["record"], ensure_ascii=False) + '\n')
+                    stats["processed"] += 1
+                total = stats["processed"] + stats["skipped"] + stats["failed"]
+                if total % BATCH_PROGRESS_INTERVAL == 0:
+                    out.flush()
+                    elapsed = time.time() - start
+                    logger.info(f"已处理 {total} 个文件 ({total / max(elapsed, 1e-6):.1f} 个/秒)")
+        
+        # 限制排队的任务数，目录中文件再多也不会一次性提交
+        pending = set()
+        for image_path in iter_image_files(image_dir):
+            pending.add(pool.submit(_extract_image_record, image_path, num_colors, quantize_bits, mode))
+            if len(pending) >= max_workers * BATCH_PENDING_PER_WORKER:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                handle(done)
+        handle(concurrent.futures.as_completed(pending))
+    
+    stats["elapsed"] = time.time() - start
+    logger.info(f"批量提取完成: {stats}")
+    return stats
+
+def _render_json_file(json_path: str, output_dir: Optional[str], known_hash: Optional[str] = None,
+                      known_image: Optional[str] = None, render_options: Optional[Dict] = None) -> Dict:
+    """
+    在渲染进程中计算JSON文件的哈希，内容有变化或图片缺失时生成图片
+    
+    Returns:
+        Dict: 处理结果，status 为 rendered / unchanged / failed
+    """
+    try:
+        with open(json_path, 'rb') as f:
+            content_hash = hashlib.sha1(f.read()).hexdigest()
+    except OSError as e:
+        return {"status": "failed", "json_path": json_path, "error": str(e)}
+    if content_hash == known_hash and known_image and os.path.exists(known_image):
+        return {"status": "unchanged", "json_path": json_path, "hash": content_hash, "image": known_image}
+    
+    image_path = PaletteImageGenerator.generate_from_json(json_path, output_dir, **(render_options or {}))
+    if not image_path:
+        return {"status": "failed", "json_path": json_path, "error": "生成图片失败"}
+    return {"status": "rendered", "json_path": json_path, "hash": content_hash, "image": image_path}
+
+
+def _load_render_manifest(manifest_path: str) -> Dict[str, Dict]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest.get("files", {}) if manifest.get("version") == RENDER_MANIFEST_VERSION else {}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _save_render_manifest(manifest_path: str, entries: Dict[str, Dict]) -> None:
+    """先写入临时文件再替换，中断时不会留下不完整的清单"""
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": RENDER_MANIFEST_VERSION, "files": entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def render_json_directory(json_dir: str, output_dir: Optional[str] = None, incremental: bool = True,
+                          max_workers: Optional[int] = None, image_format: str = RENDER_FORMAT_PNG,
+                          palette_mode: bool = False,
+                          compress_level: int = RENDER_PNG_COMPRESS_LEVEL) -> Dict[str, float]:
+    """
+    并行地为目录中的 colorhunt*.json 配色方案文件生成图片
+    
+    增量模式下，清单文件记录每个JSON文件的修改时间、大小、内容哈希、输出参数和生成的图片；
+    修改时间和大小未变的文件直接跳过，修改时间变化但内容未变的文件只更新清单，
+    输出参数变化的文件重新生成。
+    
+    Args:
+        json_dir: JSON文件目录
+        output_dir: 输出目录，如果为None则与JSON文件保存在同一目录
+        incremental: 是否跳过未变化的文件，为False时全部重新生成
+        max_workers: 渲染进程数，为None时使用CPU核心数，为1时在当前进程中渲染
+        image_format: 输出格式，png、webp 或 svg
+        palette_mode: 是否以调色板（P）模式绘制
+        compress_level: PNG压缩级别（0-9）
+        
+    Returns:
+        Dict[str, float]: 统计信息，包括 total、rendered、unchanged、failed、elapsed（秒）和 rate（个/秒）
+    """
+    start = time.time()
+    manifest_path = os.path.join(output_dir or json_dir, RENDER_MANIFEST_FILE)
+    previous = _load_render_manifest(manifest_path) if incremental else {}
+    entries: Dict[str, Dict] = {}
+    stats = {"total": 0, "rendered": 0, "unchanged": 0, "failed": 0}
+    if image_format not in RENDER_FORMATS:
+        raise ValueError(f"不支持的输出格式: {image_format}，可选: {', '.join(RENDER_FORMATS)}")
+    render_options = {"image_format": image_format, "palette_mode": palette_mode, "compress_level": compress_level}
+    
+    # 修改时间和大小都未变化且图片存在的文件不需要读取
+    tasks = []
+    for file_name in sorted(os.listdir(json_dir)):
+        if not (file_name.endswith('.json') and 'colorhunt' in file_name):
+            continue
+        stats["total"] += 1
+        json_path = os.path.join(json_dir, file_name)
+        stat = os.stat(json_path)
+        known = previous.get(file_name, {})
+        # 没有记录输出参数的清单条目由默认参数生成
+        if known.get("options", DEFAULT_RENDER_OPTIONS) != render_options:
+            known = {}
+        if (known.get("mtime_ns") == stat.st_mtime_ns and known.get("size") == stat.st_size
+                and os.path.exists(known.get("image", ""))):
+            entries[file_name] = known
+            stats["unchanged"] += 1
+            continue
+        tasks.append((json_path, output_dir, known.get("hash"), known.get("image"), render_options, stat))
+    
+    def handle(result: Dict, stat) -> None:
+        stats[result["status"]] += 1
+        if result["status"] == "failed":
+            logger.warning(f"处理 {result['json_path']} 失败: {result['error']}")
+        else:
+            entries[os.path.basename(result["json_path"])] = {
+                "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                "hash": result["hash"], "image": result["image"], "options": render_options
+            }
+        done = stats["rendered"] + stats["failed"] + stats["unchanged"]
+        if done % RENDER_PROGRESS_INTERVAL == 0:
+            elapsed = time.time() - start
+            logger.info(f"进度 {done}/{stats['total']}，{done / max(elapsed, 1e-6):.1f} 个/秒")
+    
+    max_workers = max(1, max_workers or os.cpu_count() or 1)
+    try:
+        if max_workers == 1 or len(tasks) < RENDER_CHUNK_SIZE:
+            for json_path, out_dir, known_hash, known_image, options, stat in tasks:
+                handle(_render_json_file(json_path, out_dir, known_hash, known_image, options), stat)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = pool.map(_render_json_file, *zip(*(task[:5] for task in tasks)),
+                                   chunksize=RENDER_CHUNK_SIZE)
+                for result, task in zip(results, tasks):
+                    handle(result, task[5])
+    finally:
+        # 中断时也保存已完成的部分；非增量模式同样写入清单，供下次增量运行使用
+        if os.path.isdir(os.path.dirname(manifest_path) or '.'):
+            _save_render_manifest(manifest_path, entries)
+    
+    stats["elapsed"] = time.time() - start
+    stats["rate"] = stats["total"] / max(stats["elapsed"], 1e-6)
+    logger.info(f"共 {stats['total']} 个文件：生成 {stats['rendered']}，未变化 {stats['unchanged']}，"
+                f"失败 {stats['failed']}，耗时 {stats['elapsed']:.2f} 秒 ({stats['rate']:.1f} 个/秒)")
+    return stats
+
+
+def process_all_json_files(json_dir: str, output_dir: Optional[str] = None, incremental: bool = True,
+                           max_workers: Optional[int] = None, **render_options) -> int:
     """
     批量处理目录中所有的JSON配色方案文件
     
     Args:
         json_dir: JSON文件目录
         output_dir: 输出目录，如果为None则与JSON文件保存在同一目录
+        incremental: 是否跳过上次处理后未变化的文件
+        max_workers: 渲染进程数，为None时使用CPU核心数
+        **render_options: 输出参数（image_format、palette_mode、compress_level）
         
     Returns:
-        int: 成功处理的文件数量
+        int: 成功处理的文件数量（包括未变化而跳过的文件）
     """
     try:
-        count = 0
-        for file_name in os.listdir(json_dir):
-            if file_name.endswith('.json') and 'colorhunt' in file_name:
-                json_path = os.path.join(json_dir, file_name)
-                if PaletteImageGenerator.generate_from_json(json_path, output_dir):
-                    count += 1
-        return count
+        stats = render_json_directory(json_dir, output_dir, incremental, max_workers, **render_options)
+        return stats["rendered"] + stats["unchanged"]
     except Exception as e:
         logger.exception(f"批量处理JSON文件时出错: {str(e)}")
         return 0
 
+
+def render_json_atlas(json_dir: str, output_dir: Optional[str] = None, name: str = ATLAS_NAME,
+                      **layout) -> Optional[str]:
+    """
+    将目录中所有的 colorhunt*.json 配色方案文件生成拼图
+    
+    Args:
+        json_dir: JSON文件目录
+        output_dir: 输出目录，如果为None则与JSON文件保存在同一目录
+        name: 拼图和索引的文件名前缀
+        **layout: 传给 PaletteImageGenerator.create_palette_atlas 的布局参数
+        
+    Returns:
+        str: 索引文件路径，如果失败则为None
+    """
+    palettes = []
+    for file_name in sorted(os.listdir(json_dir)):
+        if not (file_name.endswith('.json') and 'colorhunt' in file_name):
+            continue
+        try:
+            with open(os.path.join(json_dir, file_name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取 {file_name} 失败: {e}")
+            continue
+        # 没有ID的文件以文件名作为ID，避免多个文件都成为 unknown
+        palettes.append({"id": data.get('id') or os.path.splitext(file_name)[0], "colors": data.get('colors', [])})
+    
+    return PaletteImageGenerator.create_palette_atlas(palettes, output_dir or json_dir, name, **layout)
+
+
+def load_atlas_tile(index_path: str, palette_id: str) -> Optional[Image.Image]:
+    """
+    从拼图中取出一个配色方案的图片
+    
+    Args:
+        index_path: 拼图索引文件路径
+        palette_id: 配色方案ID
+        
+    Returns:
+        Image.Image: 配色方案图片，索引中没有该配色方案时为None
+    """
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    rect = index.get("palettes", {}).get(palette_id)
+    if rect is None:
+        return None
+    sheet_path = os.path.join(os.path.dirname(index_path), index["sheets"][rect["sheet"]]["file"])
+    with Image.open(sheet_path) as sheet:
+        return sheet.crop((rect["x"], rect["y"], rect["x"] + rect["w"], rect["y"] + rect["h"]))
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='配色方案工具')
     subparsers = parser.add_subparsers(dest='command', help='子命令')
@@ -260,13 +1123,30 @@ if __name__ == "__main__":
     create_parser = subparsers.add_parser('create', help='从JSON创建配色方案图片')
     create_parser.add_argument('json_path', help='JSON文件路径或目录')
     create_parser.add_argument('--output', '-o', help='输出目录')
+    create_parser.add_argument('--full', action='store_true', help='忽略增量清单，重新生成所有图片')
+    create_parser.add_argument('--workers', '-w', type=int, help='渲染进程数，默认为CPU核心数')
+    create_parser.add_argument('--atlas', action='store_true', help='将目录中的配色方案拼成拼图并生成JSON索引')
+    create_parser.add_argument('--format', '-f', choices=RENDER_FORMATS, default=RENDER_FORMAT_PNG,
+                               help='输出格式，svg 不需要光栅化')
+    create_parser.add_argument('--palette-mode', '-p', action='store_true',
+                               help='以调色板（P）模式绘制，文件更小、编码更快，文字没有抗锯齿')
+    create_parser.add_argument('--compress-level', type=int, default=RENDER_PNG_COMPRESS_LEVEL, choices=range(10),
+                               help='PNG压缩级别，0最快，9最小')
     
     # 从图片提取颜色的命令
     extract_parser = subparsers.add_parser('extract', help='从图片提取配色方案')
-    extract_parser.add_argument('image_path', help='图片文件路径')
+    extract_parser.add_argument('image_path', help='图片文件路径或目录（目录时批量提取）')
     extract_parser.add_argument('--colors', '-c', type=int, default=4, help='要提取的颜色数量')
+    extract_parser.add_argument('--quantize-bits', '-q', type=int, default=8, choices=range(1, 9),
+                                help='统计颜色频率时每通道保留的位数，较小的值合并相近色')
+    extract_parser.add_argument('--mode', '-m', choices=EXTRACT_MODES, default=EXTRACT_MODE_FREQUENCY,
+                                help='提取模式：frequency 按像素频率，median-cut / kmeans 在Lab空间中聚类')
     extract_parser.add_argument('--output', '-o', help='输出目录')
     extract_parser.add_argument('--save', '-s', action='store_true', help='保存提取的配色方案')
+    extract_parser.add_argument('--sink', choices=SINK_TYPES, default=SINK_JSON,
+                                help='保存格式：json 每个配色方案一个文件，jsonl / jsonl.gz / sqlite 追加到单个文件')
+    extract_parser.add_argument('--jsonl', help='批量提取的结果文件，默认为图片目录下的 image_palettes.jsonl')
+    extract_parser.add_argument('--workers', '-w', type=int, help='批量提取的进程数，默认为CPU核心数')
     
     # 测试命令
     test_parser = subparsers.add_parser('test', help='测试生成配色方案图片')
@@ -275,43 +1155,53 @@ if __name__ == "__main__":
     
     # 根据命令执行相应的操作
     if args.command == 'create':
-        if os.path.isdir(args.json_path):
-            count = process_all_json_files(args.json_path, args.output)
-            print(f"成功处理 {count} 个配色方案文件")
+        if args.atlas and os.path.isdir(args.json_path):
+            index_path = render_json_atlas(args.json_path, args.output, compress_level=args.compress_level)
+            if index_path:
+                print(f"配色方案拼图索引已保存到: {index_path}")
+            else:
+                print("生成配色方案拼图失败")
+        elif os.path.isdir(args.json_path):
+            stats = render_json_directory(args.json_path, args.output, not args.full, args.workers,
+                                          args.format, args.palette_mode, args.compress_level)
+            print(f"成功处理 {stats['rendered'] + stats['unchanged']} 个配色方案文件"
+                  f"（新生成 {stats['rendered']}，未变化 {stats['unchanged']}，失败 {stats['failed']}，"
+                  f"{stats['rate']:.1f} 个/秒）")
         else:
-            result = PaletteImageGenerator.generate_from_json(args.json_path, args.output)
+            result = PaletteImageGenerator.generate_from_json(args.json_path, args.output, image_format=args.format,
+                                                              palette_mode=args.palette_mode,
+                                                              compress_level=args.compress_level)
             if result:
                 print(f"配色方案图片已保存到: {result}")
             else:
                 print("生成配色方案图片失败")
     
+    elif args.command == 'extract' and os.path.isdir(args.image_path):
+        stats = batch_extract_images(args.image_path, args.jsonl, args.colors, args.quantize_bits,
+                                     args.mode, args.workers)
+        print(f"新提取 {stats['processed']} 个，跳过 {stats['skipped']} 个，失败 {stats['failed']} 个，"
+              f"耗时 {stats['elapsed']:.1f} 秒")
+    
     elif args.command == 'extract':
-        colors = PaletteImageGenerator.extract_colors_from_image(args.image_path, args.colors)
+        colors = PaletteImageGenerator.extract_colors_from_image(args.image_path, args.colors, args.quantize_bits,
+                                                                 args.mode)
         print(f"从图片提取的颜色: {', '.join(colors)}")
         
         if args.save:
             # 生成ID
-            import hashlib
-            image_hash = hashlib.md5(open(args.image_path, 'rb').read()).hexdigest()[:8]
-            palette_id = f"image-{image_hash}"
+            with open(args.image_path, 'rb') as f:
+                image_hash = hashlib.md5(f.read()).hexdigest()
+            palette_data = PaletteImageGenerator.build_image_palette(colors, args.image_path, image_hash)
+            palette_id = palette_data["id"]
             
             # 确定输出目录
             output_dir = args.output or os.path.expanduser("~/Downloads/colorhunt_palettes")
             os.makedirs(output_dir, exist_ok=True)
             
             # 保存为JSON
-            palette_data = {
-                "id": palette_id,
-                "name": f"Image Palette {palette_id}",
-                "colors": colors,
-                "source": "image_extract",
-                "source_image": args.image_path,
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            json_path = os.path.join(output_dir, f"image_palette_{palette_id}.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(palette_data, f, indent=2)
+            with open_palette_sink(args.sink, output_dir, file_pattern="image_palette_{key}.json") as sink:
+                sink.write(palette_data)
+            json_path = sink.file_path(palette_data) if isinstance(sink, JsonFileSink) else sink.path
             print(f"配色方案JSON已保存: {json_path}")
             
             # 生成图片
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+本地配色方案库增量同步
+按标签从最新的配色方案开始翻页，遇到已保存的配色方案即停止，可由计划任务定期运行
+"""
+import sys
+import os
+import time
+import argparse
+import logging
+
+# 添加项目根目录到 Python 路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from services.palette_repository import PaletteRepository
+from services.palette_sync import sync_tags
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地配色方案库增量同步')
+    parser.add_argument('tags', nargs='*', help='要同步的标签，不指定时同步不限标签的最新列表')
+    parser.add_argument('--max-pages', '-m', type=int, default=None, help='每个标签最多请求的页数，默认不限制')
+    parser.add_argument('--full', action='store_true', help='遍历所有分页并刷新点赞数，不在已保存的配色方案处停止')
+    parser.add_argument('--db', default=None, help='配色方案库文件路径，默认为缓存目录下的 palette_store.sqlite3')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    repository = PaletteRepository(args.db)
+    start = time.perf_counter()
+    success, error, results = sync_tags(args.tags or [''], repository, args.max_pages, args.full)
+    elapsed = time.perf_counter() - start
+
+    for result in results or []:
+        name = result['tag'] or '最新列表'
+        if 'error' in result:
+            print(f"❌ {name}: {result['error']}")
+        else:
+            print(f"✅ {name}: 请求 {result['pages']} 页, 新增 {result['fetched']} 个, "
+                  f"停止原因 {result['stopped']}, 该标签共 {repository.count(result['tag'] or None)} 个"
+                  + (", 还有未补抓的配色方案，下次同步继续" if result['pending'] else ""))
+    print(f"⏱️ 耗时 {elapsed:.1f} 秒")
+    repository.close()
+
+    if not success:
+        print(f"同步失败: {error}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
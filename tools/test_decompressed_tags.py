@@ -5,26 +5,23 @@
 import sys
 import os
 import json
-import requests
 from bs4 import BeautifulSoup
 import re
 import gzip
 import time
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import get_http_client
+
+http_client = get_http_client()
+
 def test_decompressed_response():
     """测试正确解压响应内容"""
     print("🔍 测试正确解压ColorHunt响应内容")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
     # 测试截图中的配色方案
     target_code = '626f47a4b465f5ecd5f0bb78'
     url = f'https://colorhunt.co/palette/{target_code}'
@@ -34,7 +31,7 @@ def test_decompressed_response():
     
     try:
         # 使用requests自动处理压缩
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http_client.get_page(url, timeout=15)
         
         print(f"状态码: {response.status_code}")
         print(f"响应头: {dict(response.headers)}")
@@ -189,15 +186,6 @@ def analyze_api_structure():
     print("🔍 分析API结构")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/html, */*',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-        'X-Requested-With': 'XMLHttpRequest',
-        'Referer': 'https://colorhunt.co/'
-    }
-    
     # 测试不同的API参数组合
     test_cases = [
         # 尝试获取特定配色方案的详细信息
@@ -213,12 +201,7 @@ def analyze_api_structure():
         print(f"\n📋 测试API参数 {i+1}: {post_data}")
         
         try:
-            response = requests.post(
-                'https://colorhunt.co/php/feed.php', 
-                headers=headers, 
-                data=post_data,
-                timeout=10
-            )
+            response = http_client.post_feed(post_data, timeout=10)
             
             print(f"状态码: {response.status_code}")
             print(f"响应长度: {len(response.text)}")
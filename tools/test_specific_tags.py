@@ -6,27 +6,22 @@
 import sys
 import os
 import json
-import requests
 from bs4 import BeautifulSoup
 import re
 import time
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import get_http_client
+
+http_client = get_http_client()
+
 def test_specific_palette_tags():
     """测试特定配色方案的标签获取"""
     print("🏷️ 测试特定配色方案标签获取")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Cache-Control': 'no-cache',
-        'Pragma': 'no-cache'
-    }
-    
     # 测试截图中的配色方案
     test_palette = {
         'code': '626f47a4b465f5ecd5f0bb78',
@@ -42,7 +37,7 @@ def test_specific_palette_tags():
     # 方法1: 直接访问配色方案页面
     print("\n🔍 方法1: 直接访问配色方案页面")
     try:
-        response = requests.get(test_palette['url'], headers=headers, timeout=15)
+        response = http_client.get_page(test_palette['url'], timeout=15)
         print(f"状态码: {response.status_code}")
         print(f"响应长度: {len(response.text)}")
         
@@ -94,7 +89,7 @@ def test_specific_palette_tags():
     # 方法2: 尝试获取页面的JSON数据
     print("\n🔍 方法2: 查找页面中的JSON数据")
     try:
-        response = requests.get(test_palette['url'], headers=headers, timeout=15)
+        response = http_client.get_page(test_palette['url'], timeout=15)
         if response.status_code == 200:
             # 查找script标签中的JSON数据
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -130,7 +125,7 @@ def test_specific_palette_tags():
     for endpoint in api_endpoints:
         try:
             print(f"尝试: {endpoint}")
-            response = requests.get(endpoint, headers=headers, timeout=10)
+            response = http_client.get_page(endpoint, timeout=10)
             print(f"  状态码: {response.status_code}")
             if response.status_code == 200:
                 print(f"  响应: {response.text[:200]}...")
@@ -145,7 +140,7 @@ def test_specific_palette_tags():
     # 方法4: 分析ColorHunt主页，看看标签是如何组织的
     print("\n🔍 方法4: 分析ColorHunt主页标签结构")
     try:
-        response = requests.get('https://colorhunt.co/', headers=headers, timeout=10)
+        response = http_client.get_page('https://colorhunt.co/', timeout=10)
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             
@@ -165,10 +160,6 @@ def analyze_colorhunt_structure():
     print("🏗️ 分析ColorHunt网站结构")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-    }
-    
     # 分析不同页面的结构
     pages_to_analyze = [
         ('主页', 'https://colorhunt.co/'),
@@ -180,7 +171,7 @@ def analyze_colorhunt_structure():
     for page_name, url in pages_to_analyze:
         print(f"\n📄 分析 {page_name}: {url}")
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get_page(url, timeout=10)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
@@ -205,10 +196,6 @@ def test_alternative_approach():
     print("🔄 测试替代方法：通过标签页面反向查找")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-    }
-    
     target_code = '626f47a4b465f5ecd5f0bb78'
     expected_tags = ['sage', 'green', 'beige', 'nature', 'earth', 'summer', 'food', 'vintage']
     
@@ -218,7 +205,7 @@ def test_alternative_approach():
         print(f"\n🔍 在标签页面 '{tag}' 中查找配色方案 {target_code}")
         try:
             url = f'https://colorhunt.co/palettes/{tag}'
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get_page(url, timeout=10)
             
             if response.status_code == 200:
                 if target_code in response.text:
@@ -6,24 +6,21 @@
 import sys
 import os
 import json
-import requests
 from bs4 import BeautifulSoup
 import re
 
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_client import get_http_client
+
+http_client = get_http_client()
+
 def test_webpage_tags():
     """测试从网页提取标签"""
     print("🔍 测试从ColorHunt配色方案页面提取标签")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
     # 测试几个不同的配色方案URL
     test_urls = [
         'https://colorhunt.co/palette/626f47a4b465f5ecd5f0bb78',  # 从截图推测的URL
@@ -36,7 +33,7 @@ def test_webpage_tags():
         print("-" * 40)
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get_page(url, timeout=10)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -0,0 +1,57 @@
+"""
+颜色空间转换工具，在sRGB与CIELAB（D65白点）之间批量转换
+"""
+import numpy as np
+
+# sRGB线性值到XYZ的转换矩阵及其逆矩阵
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+
+# D65参考白点
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+_DELTA = 6 / 29
+
+
+def rgb_to_lab(rgb) -> np.ndarray:
+    """
+    将sRGB颜色转换为CIELAB
+
+    Args:
+        rgb: 最后一维为 (R, G, B) 的数组，取值0-255
+
+    Returns:
+        np.ndarray: 形状相同的float64数组，最后一维为 (L, a, b)
+    """
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _RGB_TO_XYZ.T / _WHITE
+    f = np.where(xyz > _DELTA ** 3, np.cbrt(xyz), xyz / (3 * _DELTA ** 2) + 4 / 29)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+
+def lab_to_rgb(lab) -> np.ndarray:
+    """
+    将CIELAB颜色转换为sRGB，超出sRGB色域的值被截断
+
+    Args:
+        lab: 最后一维为 (L, a, b) 的数组
+
+    Returns:
+        np.ndarray: 形状相同的uint8数组，最后一维为 (R, G, B)
+    """
+    lab = np.asarray(lab, dtype=np.float64)
+    fy = (lab[..., 0] + 16) / 116
+    f = np.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    xyz = np.where(f > _DELTA, f ** 3, 3 * _DELTA ** 2 * (f - 4 / 29)) * _WHITE
+    linear = np.clip(xyz @ _XYZ_TO_RGB.T, 0, 1)
+    c = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return np.rint(np.clip(c, 0, 1) * 255).astype(np.uint8)
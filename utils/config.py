@@ -1,6 +1,8 @@
 """
 配置工具类
 """
+import os
+
 
 class Config:
     """配置工具类，提供应用程序配置"""
@@ -11,4 +13,14 @@ class Config:
         return {
             "theme": "dark",
             "language": "zh-CN"
-        } 
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def get_cache_dir() -> str:
+        """
+        获取本地缓存目录，可通过环境变量 JONNYMCP_CACHE_DIR 覆盖
+        
+        Returns:
+            str: 缓存目录路径（不保证已存在）
+        """
+        return os.environ.get("JONNYMCP_CACHE_DIR") or os.path.expanduser("~/.cache/jonnymcp")
@@ -51,6 +51,74 @@ class IMcpView(ABC):
         """
         pass
     
+    @abstractmethod
+    def show_local_palettes(self, palettes: list, tag: str, total: int) -> str:
+        """
+        展示本地配色方案库的查询结果
+        Args:
+            palettes: 配色方案列表
+            tag: 查询的标签，为空时表示全部
+            total: 库中符合标签的配色方案总数
+        Returns:
+            str: 展示字符串
+        """
+        pass
+    
+    @abstractmethod
+    def show_store_result(self, success: bool, error: str, stored: int, tag: str, total: int) -> str:
+        """
+        展示配色方案写入本地库的结果
+        Args:
+            success: 是否成功
+            error: 错误信息
+            stored: 本次写入的数量
+            tag: 标签名称
+            total: 库中该标签的配色方案总数
+        Returns:
+            str: 展示字符串
+        """
+        pass
+    
+    @abstractmethod
+    def show_sync_result(self, success: bool, error: str, results: list) -> str:
+        """
+        展示增量同步的结果
+        Args:
+            success: 是否成功
+            error: 错误信息
+            results: 每个标签的同步结果
+        Returns:
+            str: 展示字符串
+        """
+        pass
+    
+    @abstractmethod
+    def show_similar_palettes(self, success: bool, error: str, palettes: list) -> str:
+        """
+        展示相似配色方案的查询结果
+        Args:
+            success: 是否成功
+            error: 错误信息
+            palettes: 配色方案列表，按相似度从高到低排列
+        Returns:
+            str: 展示字符串
+        """
+        pass
+    
+    @abstractmethod
+    def show_tag_query_result(self, success: bool, error: str, query: str, result: dict) -> str:
+        """
+        展示标签组合查询的结果
+        Args:
+            success: 是否成功
+            error: 错误信息
+            query: 标签查询
+            result: 包含 total（符合查询的总数）和 palettes（配色方案列表）的字典
+        Returns:
+            str: 展示字符串
+        """
+        pass
+    
     @abstractmethod
     def show_error(self, error_message: str) -> str:
         """
@@ -119,6 +187,72 @@ class McpView(IMcpView):
             
         return "\n".join(result)
     
+    def show_local_palettes(self, palettes: list, tag: str, total: int) -> str:
+        """
+        展示本地配色方案库的查询结果
+        """
+        scope = f"标签 {tag}" if tag else "全部"
+        if not palettes:
+            return f"本地配色方案库中没有符合条件的配色方案（{scope}，共 {total} 个）。"
+        result = [f"本地配色方案库（{scope}，共 {total} 个）:"]
+        result.extend(
+            f"{p['name']}: {', '.join(p['colors'])} - 点赞数: {p['likes']}, 日期: {p['date']}, 标签: {', '.join(p['tags'])}"
+            for p in palettes
+        )
+        return "\n".join(result)
+    
+    def show_store_result(self, success: bool, error: str, stored: int, tag: str, total: int) -> str:
+        """
+        展示配色方案写入本地库的结果
+        """
+        if not success:
+            return f"保存失败: {error}"
+        return f"已保存 {stored} 个 {tag} 标签的配色方案到本地配色方案库，该标签共 {total} 个。"
+    
+    def show_sync_result(self, success: bool, error: str, results: list) -> str:
+        """
+        展示增量同步的结果
+        """
+        lines = [] if success else [f"同步失败: {error}"]
+        for result in results or []:
+            name = result['tag'] or '最新列表'
+            if 'error' in result:
+                lines.append(f"{name}: 同步失败 - {result['error']}")
+            else:
+                pending = "，还有未补抓的配色方案，下次同步继续" if result.get('pending') else ""
+                lines.append(f"{name}: 新增 {result['fetched']} 个配色方案，请求 {result['pages']} 页{pending}")
+        return "\n".join(lines)
+    
+    def show_similar_palettes(self, success: bool, error: str, palettes: list) -> str:
+        """
+        展示相似配色方案的查询结果
+        """
+        if not success:
+            return f"查找失败: {error}"
+        if not palettes:
+            return "没有找到相似的配色方案。"
+        result = ["相似的配色方案（距离为每种颜色的平均ΔE，越小越相似）:"]
+        result.extend(
+            f"{p['name']}: {', '.join(p['colors'])} - 距离: {p['distance']}, 点赞数: {p['likes']}"
+            for p in palettes
+        )
+        return "\n".join(result)
+    
+    def show_tag_query_result(self, success: bool, error: str, query: str, result: dict) -> str:
+        """
+        展示标签组合查询的结果
+        """
+        if not success:
+            return f"查询失败: {error}"
+        if not result['palettes']:
+            return f"本地配色方案库中没有符合 {query} 的配色方案（共 {result['total']} 个）。"
+        lines = [f"符合 {query} 的配色方案共 {result['total']} 个，按点赞数排序:"]
+        lines.extend(
+            f"{p['name']}: {', '.join(p['colors'])} - 点赞数: {p['likes']}, 标签: {', '.join(p['tags'])}"
+            for p in result['palettes']
+        )
+        return "\n".join(lines)
+    
     def show_error(self, error_message: str) -> str:
         """
         展示错误信息